@@ -0,0 +1,305 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To process many periods, or collate many transactions files, with
+    reading, aggregation and writing of outputs overlapping each other
+License: GPLv3+
+"""
+
+import os
+import asyncio
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import budget_analysis
+import report_render
+import tx_cache
+from batch_analysis import read_manifest, glob_periods
+
+def read_bytes(a_tx_file):
+    """ Function to read the contents of a file
+    Parameters:
+        a_tx_file (str): Name of file
+    Returns:
+        raw_bytes (bytes): Contents of file
+    """
+    with open(a_tx_file, 'rb') as tf:
+        return tf.read()
+    # endwith #
+# enddef read_bytes() #
+
+def aggregate(a_tx_file, a_raw_bytes=None, a_cache_dir=None):
+    """ Function to parse and categorize the transactions of one period
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_raw_bytes (bytes): Contents of a_tx_file, if already read
+        a_cache_dir (str): Directory of the parsed-transaction cache, used if
+            the contents were not read; the cache is bypassed if None
+    Returns:
+        grouped (tuple(DataFrame)): Grouped income, expenses and savings
+    """
+    if a_raw_bytes is None:
+        return budget_analysis.analyze_tx_file(a_tx_file, a_cache_dir)
+    # endif #
+    return tuple(budget_analysis.categorize_tx(t) for t in
+            budget_analysis.parse_tx_bytes(a_raw_bytes))
+# enddef aggregate() #
+
+def parse_tables(a_tx_file, a_raw_bytes=None, a_cache_dir=None):
+    """ Function to parse the transactions of one file
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_raw_bytes (bytes): Contents of a_tx_file, if already read
+        a_cache_dir (str): Directory of the parsed-transaction cache, used if
+            the contents were not read
+    Returns:
+        income (DataFrame): Dataframe containing only income information
+        expenses (DataFrame): Dataframe containing only expense information
+        savings (DataFrame): Dataframe containing only savings information
+    """
+    if a_raw_bytes is None:
+        return tx_cache.read_tx_file_cached(a_tx_file, a_cache_dir)
+    # endif #
+    return budget_analysis.parse_tx_bytes(a_raw_bytes)
+# enddef parse_tables() #
+
+def make_pools(a_jobs):
+    """ Function to start the pools of the pipeline stages
+    Parameters:
+        a_jobs (int): No. of worker processes for parsing and plots; a single
+            worker thread is used if a_jobs <= 1
+    Returns:
+        io_pool (ThreadPoolExecutor): Pool for reading and writing files
+        cpu_pool (Executor): Pool for parsing, aggregation and plots
+    """
+    io_pool = ThreadPoolExecutor(max_workers=2)
+    if a_jobs > 1:
+        cpu_pool = ProcessPoolExecutor(max_workers=a_jobs)
+    else:
+        cpu_pool = ThreadPoolExecutor(max_workers=1)
+    # endif #
+    return io_pool, cpu_pool
+# enddef make_pools() #
+
+async def reader(a_items, a_queue, a_io_pool, a_cache_dir=None):
+    """ Coroutine of the stage loading files
+    Parameters:
+        a_items (list(tuple(str))): (key, tx_file) pairs to load, in order
+        a_queue (Queue): Queue to put (key, tx_file, raw_bytes) on, followed
+            by None; raw_bytes is None if files are loaded through the cache
+        a_io_pool (Executor): Pool in which files are read
+        a_cache_dir (str): Directory of the parsed-transaction cache; cached
+            files are loaded by the aggregator instead
+    Returns:
+        None
+    """
+    loop = asyncio.get_running_loop()
+    for key, tx_file in a_items:
+        raw_bytes = None
+        if a_cache_dir is None:
+            raw_bytes = await loop.run_in_executor(a_io_pool, read_bytes,
+                    tx_file)
+        # endif #
+        # waits while the aggregator is a queue's capacity behind
+        await a_queue.put((key, tx_file, raw_bytes))
+    # endfor #
+    await a_queue.put(None)
+# enddef reader() #
+
+async def aggregator(a_in_queue, a_out_queue, a_cpu_pool, a_func,
+        a_cache_dir=None):
+    """ Coroutine of the stage parsing files in a pool
+    Parameters:
+        a_in_queue (Queue): Queue filled by reader()
+        a_out_queue (Queue): Queue to put (key, future of the result) on,
+            followed by None
+        a_cpu_pool (Executor): Pool in which files are parsed
+        a_func (function): Called as a_func(tx_file, raw_bytes, a_cache_dir)
+        a_cache_dir (str): Directory of the parsed-transaction cache
+    Returns:
+        None
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await a_in_queue.get()
+        if item is None:
+            break
+        # endif #
+        key, tx_file, raw_bytes = item
+        # futures are queued in input order, so the next stage gets results
+        # in that order however long each one takes
+        future = loop.run_in_executor(a_cpu_pool, a_func, tx_file, raw_bytes,
+                a_cache_dir)
+        await a_out_queue.put((key, future))
+    # endwhile #
+    await a_out_queue.put(None)
+# enddef aggregator() #
+
+async def collate_tables(a_tx_files, a_jobs=2, a_queue_size=4,
+        a_cache_dir=None):
+    """ Function to parse several transactions files in two overlapping
+    stages: a reader loading files and an aggregator parsing them in a pool
+    Parameters:
+        a_tx_files (list of strings): Names of transactions CSV files
+        a_jobs (int): No. of worker processes used to parse the files; a
+            single worker thread is used if a_jobs <= 1
+        a_queue_size (int): Capacity of the queues between stages
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+    Returns:
+        tables (list(tuple(DataFrame))): Income, expenses and savings of
+            each file, in the order of a_tx_files
+    """
+    raw_queue = asyncio.Queue(maxsize=a_queue_size)
+    parsed_queue = asyncio.Queue(maxsize=a_queue_size)
+    io_pool, cpu_pool = make_pools(a_jobs)
+    tables = []
+
+    async def collector():
+        while True:
+            item = await parsed_queue.get()
+            if item is None:
+                break
+            # endif #
+            tables.append(await item[1])
+        # endwhile #
+    # enddef collector() #
+
+    try:
+        await asyncio.gather(reader(list(enumerate(a_tx_files)), raw_queue,
+            io_pool, a_cache_dir), aggregator(raw_queue, parsed_queue,
+                cpu_pool, parse_tables, a_cache_dir), collector())
+    finally:
+        io_pool.shutdown()
+        cpu_pool.shutdown()
+    # endtry #
+    return tables
+# enddef collate_tables() #
+
+def read_tables(a_tx_files, a_jobs=2, a_queue_size=4, a_cache_dir=None):
+    """ Function to parse several transactions files through the pipeline
+    Parameters:
+        See collate_tables()
+    Returns:
+        tables (list(tuple(DataFrame))): Income, expenses and savings of
+            each file, in the order of a_tx_files
+    """
+    return asyncio.run(collate_tables(a_tx_files, a_jobs, a_queue_size,
+        a_cache_dir))
+# enddef read_tables() #
+
+async def run_pipeline(a_periods, a_summary_file="MyBudget_summary.csv",
+        a_report_dir=".", a_jobs=2, a_queue_size=4, a_cache_dir=None,
+        a_plots=True, a_formats=("text",)):
+    """ Function to process periods in three overlapping stages: a reader
+    loading files, an aggregator parsing and categorizing them in a pool,
+    and a writer writing reports in period order while plots are rendered
+    in the pool
+    Parameters:
+        a_periods (list(tuple(str))): (period, tx_file) pairs to process
+        a_summary_file (str): Filename where summaries of previous runs
+            are stored
+        a_report_dir (str): Directory in which "<period>_report.txt" files and
+            plots are written
+        a_jobs (int): No. of worker processes for aggregation and plots;
+            a single worker thread is used if a_jobs <= 1
+        a_queue_size (int): Capacity of the queues between stages and of
+            pending plots; at most about 3 * a_queue_size + 2 periods are held
+            in memory
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_plots (bool): Whether to plot the category breakdown of each period
+        a_formats (tuple(str)): Formats of the reports, out of
+            report_render.FORMATS
+    Returns:
+        None
+    """
+    loop = asyncio.get_running_loop()
+    raw_queue = asyncio.Queue(maxsize=a_queue_size)
+    grouped_queue = asyncio.Queue(maxsize=a_queue_size)
+    io_pool, cpu_pool = make_pools(a_jobs)
+
+    async def writer():
+        plots = []
+        while True:
+            item = await grouped_queue.get()
+            if item is None:
+                break
+            # endif #
+            period, future = item
+            grouped = await future
+            report_file = os.path.join(a_report_dir, period + "_report.txt")
+            # the summary file is appended to by this stage only, in order
+            await loop.run_in_executor(io_pool, partial(
+                budget_analysis.write_reports, report_file, period, *grouped,
+                a_summary_file, a_formats=a_formats))
+            if a_plots:
+                # plots hold on to their tables, so they are bounded as well
+                if len(plots) >= a_queue_size:
+                    await plots.pop(0)
+                # endif #
+                plots.append(loop.run_in_executor(cpu_pool, partial(
+                    budget_analysis.plot_period, period, *grouped,
+                    a_plot_dir=a_report_dir)))
+            # endif #
+        # endwhile #
+        await asyncio.gather(*plots)
+    # enddef writer() #
+
+    try:
+        await asyncio.gather(reader(a_periods, raw_queue, io_pool,
+            a_cache_dir), aggregator(raw_queue, grouped_queue, cpu_pool,
+                aggregate, a_cache_dir), writer())
+    finally:
+        io_pool.shutdown()
+        cpu_pool.shutdown()
+    # endtry #
+# enddef run_pipeline() #
+
+def main(a_periods, a_summary_file="MyBudget_summary.csv", a_report_dir=".",
+        a_jobs=2, a_queue_size=4, a_cache_dir=None, a_plots=True,
+        a_formats=("text",)):
+    """ Main function.
+    Parameters:
+        See run_pipeline()
+    Returns:
+        None
+    """
+    asyncio.run(run_pipeline(a_periods, a_summary_file, a_report_dir, a_jobs,
+        a_queue_size, a_cache_dir, a_plots, a_formats))
+# enddef main() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--manifest",
+            help="CSV file with lines \"period,transactions file\"")
+    group.add_argument("--glob",
+            help="Glob pattern of transactions files, named after the period")
+    parser.add_argument("--summary-file", default="MyBudget_summary.csv",
+            help="Name of summary file")
+    parser.add_argument("--report-dir", default=".",
+            help="Directory in which to write period reports and plots")
+    parser.add_argument("--jobs", type=int, default=2,
+            help="No. of worker processes")
+    parser.add_argument("--queue-size", type=int, default=4,
+            help="Capacity of the queues between pipeline stages")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write reports and the summary, without plots")
+    parser.add_argument("--formats", nargs='+', default=["text"],
+            choices=report_render.FORMATS, help="Formats of the reports")
+    args = parser.parse_args()
+    if args.manifest is not None:
+        periods = read_manifest(args.manifest)
+    else:
+        periods = glob_periods(args.glob)
+    # endif #
+    main(periods, args.summary_file, args.report_dir, args.jobs,
+            args.queue_size, None if args.no_cache else args.cache_dir,
+            not args.no_plots, args.formats)
+# endif #
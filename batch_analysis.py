@@ -0,0 +1,149 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To tally several monthly budget sheets in one process
+License: GPLv3+
+"""
+
+import os
+import csv
+import glob
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import budget_analysis
+import tx_cache
+
+def read_manifest(a_manifest_file):
+    """ Function to read a manifest of periods and transactions files
+    Parameters:
+        a_manifest_file (str): CSV file with lines "period,tx_file"; relative
+            tx_file paths are taken relative to the manifest. Blank lines and
+            lines starting with "#" are ignored.
+    Returns:
+        periods (list(tuple(str))): (period, tx_file) pairs in manifest order
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(a_manifest_file))
+    periods = []
+    with open(a_manifest_file, newline='') as mf:
+        for row in csv.reader(mf):
+            if not row or row[0].strip().startswith("#"):
+                continue
+            # endif #
+            period, tx_file = [r.strip() for r in row[:2]]
+            periods.append((period, os.path.join(manifest_dir, tx_file)))
+        # endfor #
+    # endwith #
+    return periods
+# enddef read_manifest() #
+
+def glob_periods(a_pattern):
+    """ Function to find transactions files matching a glob pattern
+    Parameters:
+        a_pattern (str): Glob pattern of transactions files
+    Returns:
+        periods (list(tuple(str))): (period, tx_file) pairs sorted by file
+            name, the period being the file name without extension
+    """
+    return [(os.path.splitext(os.path.basename(f))[0], f)
+            for f in sorted(glob.glob(a_pattern))]
+# enddef glob_periods() #
+
+def process_period(a_period_file, a_cache_dir=None, a_chunksize=None,
+        a_plots=True, a_plot_dir="."):
+    """ Function to categorize and plot the transactions of one period
+    Parameters:
+        a_period_file (tuple(str)): (period, tx_file) pair
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_chunksize (int): If given, the transaction file is streamed in
+            chunks of this many rows instead of being read in at once
+        a_plots (bool): Whether to plot the category breakdown
+        a_plot_dir (str): Directory in which to write the plots
+    Returns:
+        grouped (tuple(DataFrame)): Grouped income, expenses and savings
+    """
+    period, tx_file = a_period_file
+    grouped = budget_analysis.analyze_tx_file(tx_file, a_cache_dir,
+            a_chunksize)
+    if a_plots:
+        budget_analysis.plot_period(period, *grouped, a_plot_dir=a_plot_dir)
+    # endif #
+    return grouped
+# enddef process_period() #
+
+def main(a_periods, a_summary_file="MyBudget_summary.csv", a_report_dir=".",
+        a_jobs=1, a_cache_dir=None, a_chunksize=None, a_plots=True):
+    """ Main function.
+    Parameters:
+        a_periods (list(tuple(str))): (period, tx_file) pairs to process
+        a_summary_file (str): Filename where summaries of previous runs
+            are stored
+        a_report_dir (str): Directory in which "<period>_report.txt" files and
+            plots are written
+        a_jobs (int): No. of worker processes; periods are processed serially
+            if a_jobs <= 1
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_chunksize (int): If given, transaction files are streamed in
+            chunks of this many rows instead of being read in at once
+        a_plots (bool): Whether to plot the category breakdown of each period
+    Returns:
+        None
+    """
+    worker = partial(process_period, a_cache_dir=a_cache_dir,
+            a_chunksize=a_chunksize, a_plots=a_plots, a_plot_dir=a_report_dir)
+    executor = None
+    if a_jobs > 1 and len(a_periods) > 1:
+        executor = ProcessPoolExecutor(max_workers=a_jobs)
+        results = executor.map(worker, a_periods)
+    else:
+        results = map(worker, a_periods)
+    # endif #
+    try:
+        # results arrive in the order of a_periods, so the summary file is
+        # only ever appended to by this process and in a deterministic order
+        for (period, _), grouped in zip(a_periods, results):
+            report_file = os.path.join(a_report_dir, period + "_report.txt")
+            budget_analysis.write_reports(report_file, period, *grouped,
+                    a_summary_file)
+        # endfor #
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # endif #
+    # endtry #
+# enddef main() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--manifest",
+            help="CSV file with lines \"period,transactions file\"")
+    group.add_argument("--glob",
+            help="Glob pattern of transactions files, named after the period")
+    parser.add_argument("--summary-file", default="MyBudget_summary.csv",
+            help="Name of summary file")
+    parser.add_argument("--report-dir", default=".",
+            help="Directory in which to write period reports and plots")
+    parser.add_argument("--jobs", type=int, default=1,
+            help="No. of worker processes")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    parser.add_argument("--chunksize", type=int, default=None,
+            help="Stream transaction files in chunks of this many rows")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write reports and the summary, without plots")
+    args = parser.parse_args()
+    if args.manifest is not None:
+        periods = read_manifest(args.manifest)
+    else:
+        periods = glob_periods(args.glob)
+    # endif #
+    main(periods, args.summary_file, args.report_dir, args.jobs,
+            None if args.no_cache else args.cache_dir, args.chunksize,
+            not args.no_plots)
+# endif #
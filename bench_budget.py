@@ -0,0 +1,219 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To benchmark the budget pipeline on synthetic transaction sheets
+License: GPLv3+
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import batch_analysis
+import budget_analysis
+import collate_all_periods
+import collate_periods
+import gen_tx_sheet
+
+STAGES = ["read_tx_file", "categorize_tx", "write_reports", "collate",
+        "summarize_all_periods"]
+
+def run_stages(a_periods, a_work_dir):
+    """ Function to run every pipeline stage once over all periods
+    Parameters:
+        a_periods (list(tuple(str))): (period, tx_file) pairs
+        a_work_dir (str): Directory in which outputs are written
+    Returns:
+        stages (generator): Yields (stage name, function running the stage);
+            stages depend on the output of the previous ones
+    """
+    tables = {}
+    grouped = {}
+    summary_file = os.path.join(a_work_dir, "MyBudget_summary.csv")
+
+    def read():
+        for period, tx_file in a_periods:
+            tables[period] = budget_analysis.read_tx_file(tx_file)
+        # endfor #
+    # enddef read() #
+
+    def categorize():
+        for period in tables:
+            grouped[period] = [budget_analysis.categorize_tx(t)
+                    for t in tables[period]]
+        # endfor #
+    # enddef categorize() #
+
+    def report():
+        for k, period in enumerate(grouped):
+            budget_analysis.write_reports(
+                    os.path.join(a_work_dir, period + "_report.txt"), period,
+                    *grouped[period], summary_file, a_reset_summary=(k == 0))
+        # endfor #
+    # enddef report() #
+
+    def collate():
+        collate_all_periods.main(argparse.Namespace(period="All",
+            report_file=os.path.join(a_work_dir, "All_report.txt"),
+            summary_file=os.path.join(a_work_dir, "All_summary.csv"),
+            tx_files=[f for _, f in a_periods], jobs=1, no_cache=True,
+            cache_dir=None, no_plots=True, compact=False))
+    # enddef collate() #
+
+    def summarize():
+        collate_periods.summarize_all_periods(0.0, summary_file)
+    # enddef summarize() #
+
+    for stage in zip(STAGES, [read, categorize, report, collate, summarize]):
+        yield stage
+    # endfor #
+# enddef run_stages() #
+
+def bench_size(a_n_rows, a_n_periods, a_n_categories, a_repeats=3,
+        a_data_dir=None):
+    """ Function to time the pipeline stages for one sheet size
+    Parameters:
+        a_n_rows (int): No. of expense transactions per sheet
+        a_n_periods (int): No. of monthly sheets
+        a_n_categories (int): No. of expense categories
+        a_repeats (int): No. of timed repetitions; the fastest one is kept
+        a_data_dir (str): Directory in which generated sheets are kept
+            between runs; a temporary directory is used if None
+    Returns:
+        results (dict): Per stage, wall time [s] and peak traced memory [MB]
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = a_data_dir
+        if data_dir is None:
+            data_dir = os.path.join(work_dir, "data")
+        # endif #
+        data_dir = os.path.join(data_dir, "rows{}_periods{}_cats{}".format(
+            a_n_rows, a_n_periods, a_n_categories))
+        manifest = os.path.join(data_dir, "manifest.csv")
+        if os.path.exists(manifest):
+            periods = batch_analysis.read_manifest(manifest)
+        else:
+            periods = gen_tx_sheet.write_tx_sheets(data_dir, a_n_rows,
+                    a_n_periods, a_n_categories)
+        # endif #
+        results = {s: {"time [s]": float("inf")} for s in STAGES}
+        for _ in range(a_repeats):
+            for stage, func in run_stages(periods, work_dir):
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                results[stage]["time [s]"] = min(results[stage]["time [s]"],
+                        elapsed)
+            # endfor #
+        # endfor #
+        # tracing slows everything down, so measure memory in a separate pass
+        for stage, func in run_stages(periods, work_dir):
+            tracemalloc.start()
+            func()
+            results[stage]["peak memory [MB]"] = (
+                    tracemalloc.get_traced_memory()[1] / 1e6)
+            tracemalloc.stop()
+        # endfor #
+    # endwith #
+    return results
+# enddef bench_size() #
+
+def compare(a_results, a_baseline, a_tolerance):
+    """ Function to find stages that got slower than the baseline
+    Parameters:
+        a_results (dict): Benchmark results, keyed by size and stage
+        a_baseline (dict): Baseline results in the same layout
+        a_tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%
+    Returns:
+        regressions (list of strings): Description of each regression
+    """
+    regressions = []
+    for size, stages in a_results.items():
+        for stage, result in stages.items():
+            base = a_baseline.get(size, {}).get(stage)
+            if base is None:
+                continue
+            # endif #
+            for key in ("time [s]", "peak memory [MB]"):
+                if result[key] > base[key] * (1.0 + a_tolerance):
+                    regressions.append("{} {}: {} {:.3f} -> {:.3f}".format(
+                        size, stage, key, base[key], result[key]))
+                # endif #
+            # endfor #
+        # endfor #
+    # endfor #
+    return regressions
+# enddef compare() #
+
+def main(a_sizes, a_n_periods=1, a_n_categories=20, a_repeats=3,
+        a_data_dir=None, a_output=None, a_baseline=None, a_tolerance=0.2):
+    """ Main function.
+    Parameters:
+        a_sizes (list(int)): No. of expense transactions per sheet to bench
+        a_n_periods (int): No. of monthly sheets
+        a_n_categories (int): No. of expense categories
+        a_repeats (int): No. of timed repetitions per size
+        a_data_dir (str): Directory in which generated sheets are kept
+        a_output (str): JSON file to write the results to
+        a_baseline (str): JSON file of earlier results to compare against
+        a_tolerance (float): Allowed relative slowdown against the baseline
+    Returns:
+        regressions (list of strings): Description of each regression
+    """
+    results = {}
+    for n_rows in a_sizes:
+        size = "rows={} periods={} categories={}".format(n_rows, a_n_periods,
+                a_n_categories)
+        results[size] = bench_size(n_rows, a_n_periods, a_n_categories,
+                a_repeats, a_data_dir)
+        for stage, result in results[size].items():
+            print("{:45s} {:22s} {:9.4f} s {:9.2f} MB".format(size, stage,
+                result["time [s]"], result["peak memory [MB]"]))
+        # endfor #
+    # endfor #
+    if a_output is not None:
+        with open(a_output, 'w') as of:
+            json.dump(results, of, indent=2)
+        # endwith #
+    # endif #
+    regressions = []
+    if a_baseline is not None:
+        with open(a_baseline) as bf:
+            regressions = compare(results, json.load(bf), a_tolerance)
+        # endwith #
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        # endfor #
+    # endif #
+    return regressions
+# enddef main() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs='+', default=[1000, 100000],
+            help="No. of expense transactions per sheet, one run per value")
+    parser.add_argument("--periods", type=int, default=1,
+            help="No. of monthly sheets")
+    parser.add_argument("--categories", type=int, default=20,
+            help="No. of expense categories")
+    parser.add_argument("--repeats", type=int, default=3,
+            help="No. of timed repetitions per size")
+    parser.add_argument("--data-dir", default=None,
+            help="Directory in which to keep generated sheets between runs")
+    parser.add_argument("--output", default=None,
+            help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=None,
+            help="JSON file of earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+            help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+    # warnings about negative savings are expected for random sheets
+    warnings.simplefilter('ignore')
+    regressions = main(args.rows, args.periods, args.categories, args.repeats,
+            args.data_dir, args.output, args.baseline, args.tolerance)
+    sys.exit(1 if regressions else 0)
+# endif #
@@ -0,0 +1,247 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To keep transactions of many periods in a fixed-width binary ledger
+    that is memory-mapped instead of parsed
+License: GPLv3+
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from budget_analysis import read_tx_file, parse_dates
+
+KINDS = ("income", "expenses", "savings")
+# one fixed-width, packed record per transaction; dates that are missing or
+# could not be parsed are NaT
+LEDGER_DTYPE = np.dtype([('period', '<u4'), ('kind', 'u1'),
+    ('category', '<u4'), ('cents', '<i8'), ('date', '<M8[D]')])
+
+def ledger_files(a_ledger):
+    """ Function to get the names of the files making up a ledger
+    Parameters:
+        a_ledger (str): Name of ledger, without extension
+    Returns:
+        records_file (str): Binary file of transaction records
+        meta_file (str): JSON file of category and period dictionaries
+    """
+    return a_ledger + ".bin", a_ledger + ".json"
+# enddef ledger_files() #
+
+def read_meta(a_ledger):
+    """ Function to read the dictionaries of a ledger
+    Parameters:
+        a_ledger (str): Name of ledger, without extension
+    Returns:
+        meta (dict): "categories" and "periods" names, indexed by their id,
+            "offsets" of the first record of each period plus the total
+            no. of records; an empty ledger if there are no files yet
+    """
+    meta_file = ledger_files(a_ledger)[1]
+    if not os.path.exists(meta_file):
+        return {"categories": [], "periods": [], "offsets": [0]}
+    # endif #
+    with open(meta_file) as mf:
+        return json.load(mf)
+    # endwith #
+# enddef read_meta() #
+
+def open_ledger(a_ledger):
+    """ Function to memory-map the records of a ledger
+    Parameters:
+        a_ledger (str): Name of ledger, without extension
+    Returns:
+        records (ndarray): Read-only structured array of LEDGER_DTYPE
+            records; pages are only read from disk when they are used
+        meta (dict): Dictionaries of the ledger, see read_meta()
+    """
+    meta = read_meta(a_ledger)
+    n_records = meta["offsets"][-1]
+    if n_records == 0:
+        return np.zeros(0, dtype=LEDGER_DTYPE), meta
+    # endif #
+    # records appended after the meta file was last written are ignored
+    records = np.memmap(ledger_files(a_ledger)[0], dtype=LEDGER_DTYPE,
+            mode='r', shape=(n_records,))
+    return records, meta
+# enddef open_ledger() #
+
+def to_records(a_tables, a_period_id, a_categories, a_cols=['Category',
+        'Amount [$]'], a_date_col='Date'):
+    """ Function to convert the tables of one period to ledger records
+    Parameters:
+        a_tables (tuple(DataFrame)): Income, expenses and savings tables as
+            returned by read_tx_file
+        a_period_id (int): Id of the period
+        a_categories (list of strings): Category dictionary shared by all
+            periods; new categories are appended to it in place
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+        a_date_col (str): Column name of unparsed dates; dates are NaT if the
+            tables have no such column
+    Returns:
+        records (ndarray): Structured array of LEDGER_DTYPE records
+    """
+    records = np.zeros(sum(len(t) for t in a_tables), dtype=LEDGER_DTYPE)
+    records['period'] = a_period_id
+    start = 0
+    for kind, table in enumerate(a_tables):
+        stop = start + len(table)
+        names = table[a_cols[0]].astype(str)
+        new = pd.Index(names.unique()).difference(a_categories, sort=False)
+        a_categories.extend(new)
+        records['kind'][start:stop] = kind
+        records['category'][start:stop] = pd.Categorical(names,
+                categories=a_categories).codes
+        records['cents'][start:stop] = np.rint(100.0 *
+                table[a_cols[1]].to_numpy(dtype=np.float64))
+        if a_date_col in table.columns:
+            records['date'][start:stop] = parse_dates(
+                    table[a_date_col]).to_numpy(dtype='datetime64[D]')
+        else:
+            records['date'][start:stop] = np.datetime64('NaT')
+        # endif #
+        start = stop
+    # endfor #
+    return records
+# enddef to_records() #
+
+def append_period(a_ledger, a_period, a_tables):
+    """ Function to append the transactions of a new period to a ledger
+    Parameters:
+        a_ledger (str): Name of ledger, without extension
+        a_period (str): Time period of the transactions
+        a_tables (tuple(DataFrame)): Income, expenses and savings tables as
+            returned by read_tx_file(..., a_date_col="Date")
+    Returns:
+        meta (dict): Updated dictionaries of the ledger
+    """
+    records_file, meta_file = ledger_files(a_ledger)
+    meta = read_meta(a_ledger)
+    if a_period in meta["periods"]:
+        raise ValueError("Period {} is already in the ledger".format(a_period))
+    # endif #
+    records = to_records(a_tables, len(meta["periods"]), meta["categories"])
+    # drop records of an append that was interrupted before the meta file
+    # was written, then append the new ones
+    with open(records_file, 'ab') as rf:
+        rf.truncate(meta["offsets"][-1] * LEDGER_DTYPE.itemsize)
+        rf.write(records.tobytes())
+        rf.flush()
+        os.fsync(rf.fileno())
+    # endwith #
+    meta["periods"].append(a_period)
+    meta["offsets"].append(meta["offsets"][-1] + len(records))
+    # the records only count once the meta file points at them
+    tmp_file = meta_file + ".tmp"
+    with open(tmp_file, 'w') as mf:
+        json.dump(meta, mf)
+    # endwith #
+    os.replace(tmp_file, meta_file)
+    return meta
+# enddef append_period() #
+
+def export_tx_files(a_ledger, a_periods, a_cache_dir=None):
+    """ Function to append transactions files of new periods to a ledger
+    Parameters:
+        a_ledger (str): Name of ledger, without extension
+        a_periods (list(tuple(str))): (period, tx_file) pairs, in order
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+    Returns:
+        meta (dict): Updated dictionaries of the ledger
+    """
+    meta = read_meta(a_ledger)
+    for period, tx_file in a_periods:
+        if a_cache_dir is None:
+            tables = read_tx_file(tx_file, a_date_col='Date')
+        else:
+            from tx_cache import read_tx_file_cached
+            tables = read_tx_file_cached(tx_file, a_cache_dir,
+                    a_date_col='Date')
+        # endif #
+        meta = append_period(a_ledger, period, tables)
+    # endfor #
+    return meta
+# enddef export_tx_files() #
+
+def period_totals(a_records, a_meta, a_initial_net_worth=0.0):
+    """ Function to total income, expenses and savings of every period
+    Parameters:
+        a_records (ndarray): Records returned by open_ledger()
+        a_meta (dict): Dictionaries returned by open_ledger()
+        a_initial_net_worth (float): Net worth at the beginning of all periods
+    Returns:
+        totals_df (DataFrame): Income, expenses, savings and net worth [$]
+            per period, in ledger order
+    """
+    n_periods = len(a_meta["periods"])
+    # bincount reads the fields straight from the mapped pages; sums are
+    # exact in float64 up to 2**53 cents
+    key = a_records['period'] * np.int64(len(KINDS)) + a_records['kind']
+    cents = np.rint(np.bincount(key, weights=a_records['cents'],
+        minlength=n_periods * len(KINDS))).astype(np.int64).reshape(
+            n_periods, len(KINDS))
+    totals_df = pd.DataFrame(cents / 100.0, index=pd.Index(a_meta["periods"],
+        name="Time period"), columns=[k.capitalize() + " [$]" for k in KINDS])
+    totals_df["Net worth [$]"] = (round(100.0 * a_initial_net_worth) +
+            (cents[:, 0] - cents[:, 1]).cumsum()) / 100.0
+    return totals_df
+# enddef period_totals() #
+
+def category_totals(a_records, a_meta, a_kind, a_periods=None):
+    """ Function to total transactions per category, like categorize_tx
+    Parameters:
+        a_records (ndarray): Records returned by open_ledger()
+        a_meta (dict): Dictionaries returned by open_ledger()
+        a_kind (str): One of "income", "expenses" or "savings"
+        a_periods (list of strings): Time periods to include; all periods if
+            None
+    Returns:
+        grouped_tx (DataFrame): Total of transactions per category
+    """
+    if a_periods is None:
+        parts = [a_records]
+    else:
+        # records are stored period by period, so each period is a view
+        offsets = a_meta["offsets"]
+        ids = [a_meta["periods"].index(p) for p in a_periods]
+        parts = [a_records[offsets[k]:offsets[k + 1]] for k in ids]
+    # endif #
+    n_categories = len(a_meta["categories"])
+    counts = np.zeros(n_categories, dtype=np.int64)
+    sums = np.zeros(n_categories)
+    for part in parts:
+        mask = part['kind'] == KINDS.index(a_kind)
+        categories = part['category'][mask]
+        counts += np.bincount(categories, minlength=n_categories)
+        sums += np.bincount(categories, weights=part['cents'][mask],
+                minlength=n_categories)
+    # endfor #
+    used = np.flatnonzero(counts)
+    cents = np.rint(sums[used]).astype(np.int64)
+    grouped_tx = pd.DataFrame({'Amount [$]': cents / 100.0},
+            index=pd.Index(np.array(a_meta["categories"], dtype=object)[used],
+                name='Category'))
+    grouped_tx['Contribution [%]'] = 100 * cents / np.abs(cents.sum())
+    return grouped_tx.sort_index()
+# enddef category_totals() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("ledger", help="Name of ledger, without extension")
+    parser.add_argument("--manifest", default=None,
+            help="CSV file with lines \"period,transactions file\" of new " +
+            "periods to append")
+    parser.add_argument("--initial-net-worth", type=float, default=0.0,
+            help="Net worth at the beginning of all periods")
+    args = parser.parse_args()
+    if args.manifest is not None:
+        from batch_analysis import read_manifest
+        export_tx_files(args.ledger, read_manifest(args.manifest))
+    # endif #
+    records, meta = open_ledger(args.ledger)
+    print(period_totals(records, meta, args.initial_net_worth).to_string())
+# endif #
@@ -5,15 +5,40 @@ Purpose: To tally monthly budget sheet
 License: GPLv3+
 """
 
+import io
 import os
-import sys
 import warnings
+import argparse
+import functools
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+import profiling
+import budget_variance
+import tx_validate
+import summary_store
+import plot_render
+import report_render
+
+# column holding amounts of compact transactions, see compact_tx()
+CENTS_COLNAME = 'Amount [cents]'
+# separator of the levels of hierarchical categories, e.g. "Utilities:Electric"
+CATEGORY_SEP = ':'
+# format of dates in transactions files, e.g. "12/8/2000"
+DATE_FORMAT = '%m/%d/%Y'
+# pandas period frequency of each way of splitting a ledger
+SPLIT_FREQS = {'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+# whitespace that stands in for the currency symbol while the C parser
+# converts amounts to floats, see read_marked_tx()
+AMOUNT_MARK = '\v'
+# text other than empty cells that pandas.read_csv() reads as missing by
+# default; read_marked_tx() leaves it to unmark_text()
+NA_STRINGS = frozenset(['#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN',
+    '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN',
+    'None', 'n/a', 'nan', 'null'])
 
 def read_tx_file(a_tx_file, a_skiprows=3, a_skipfooter=0,
-        a_cols=['Category', 'Amount'], a_currency_symbols='[\$,]'):
+        a_cols=['Category', 'Amount'], a_currency_symbol='$',
+        a_thousands=',', a_date_col=None):
     """ Function to read in transactions file (in CSV format)
     Parameters:
         a_tx_file (str): Name of transactions CSV file
@@ -21,60 +46,359 @@ def read_tx_file(a_tx_file, a_skiprows=3, a_skipfooter=0,
         a_skipfooter (int): No. of lines to skip at the bottom
         a_cols (list of strings): Column names containing relevant
             transaction information in the order (Category, Amount)
-        a_currency_symbols (str): regex to replace in strings when dealing with
-            amounts listed in a specific currency specification.
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+        a_date_col (str): If given, name of the date column to keep as an
+            unparsed third column of each table, e.g. "Date"
     Returns:
         income (DataFrame): Dataframe containing only income information
         expenses (DataFrame): Dataframe containing only expense information
         savings (DataFrame): Dataframe containing only savings information
     """
-    # Read in transactions file
-    raw_df = pd.read_csv(a_tx_file, skiprows=a_skiprows,
-            skipfooter=a_skipfooter)
-    # read expenses
-    expenses = raw_df[a_cols]
-    # drop extraneous rows, if required
-    expenses = expenses.dropna()
-    # read income
-    # duplicate column names are appended with ".1"
-    dup_cols = [c + ".1" for c in a_cols]
-    income = raw_df[dup_cols]
-    # rename the columns
-    income.columns = a_cols
-    # drop extraneous rows, if required
-    income = income.dropna()
-    # read savings
-    # duplicate column names are appended with ".2"
-    dup_cols = [c + ".2" for c in a_cols]
-    savings = raw_df[dup_cols].copy()
-    # rename the columns
-    savings.columns = a_cols
-    # drop extraneous rows, if required
-    savings = savings.dropna()
-    # replace currency format into float
-    expenses[a_cols[1]] = pd.to_numeric(
-            expenses[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    income = income.dropna()
-    income[a_cols[1]] = pd.to_numeric(
-            income[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    savings[a_cols[1]] = pd.to_numeric(
-            savings[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    # rename columns to include unit
-    expenses = expenses.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    income = income.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    savings = savings.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    return income, expenses, savings
+    # Read in transactions file in one go
+    with open(a_tx_file, 'rb') as tf:
+        raw_bytes = tf.read()
+    # endwith #
+    return parse_tx_bytes(raw_bytes, a_skiprows, a_skipfooter, a_cols,
+            a_currency_symbol, a_thousands, a_date_col)
 # enddef read_tx_file() #
 
+def parse_tx_bytes(a_raw_bytes, a_skiprows=3, a_skipfooter=0,
+        a_cols=['Category', 'Amount'], a_currency_symbol='$',
+        a_thousands=',', a_date_col=None):
+    """ Function to parse the contents of a transactions file
+    Parameters:
+        a_raw_bytes (bytes): Contents of transactions CSV file
+        See read_tx_file() for the other parameters
+    Returns:
+        income (DataFrame): Dataframe containing only income information
+        expenses (DataFrame): Dataframe containing only expense information
+        savings (DataFrame): Dataframe containing only savings information
+    """
+    # the expenses, income and savings tables sit side by side; pandas
+    # appends ".1" and ".2" to the duplicate column names of the latter two
+    suffixes = ["", ".1", ".2"]
+    amt_cols = [a_cols[1] + s for s in suffixes]
+    text_cols = [a_cols[0]] if a_date_col is None else [a_cols[0], a_date_col]
+    text_cols = [c + s for s in suffixes for c in text_cols]
+    # most category cells are empty or repeat a few categories, so they are
+    # only made str once the empty rows are dropped
+    dtypes = dict.fromkeys(text_cols, str)
+    dtypes.update(dict.fromkeys([a_cols[0] + s for s in suffixes], object))
+    dtypes.update(dict.fromkeys(amt_cols, np.float64))
+    raw_df = read_marked_tx(a_raw_bytes, a_skiprows, dtypes,
+            a_currency_symbol, a_thousands)
+    marked = raw_df is not None
+    if not marked:
+        raw_df = pd.read_csv(io.BytesIO(a_raw_bytes), skiprows=a_skiprows,
+                usecols=amt_cols + text_cols,
+                dtype=dict.fromkeys(amt_cols + text_cols, str), engine='c')
+    # endif #
+    # skipfooter is only supported by the slow python engine, so drop the
+    # footer rows after parsing; they may hold text in the amount columns
+    raw_df = raw_df.iloc[:max(len(raw_df) - a_skipfooter, 0)]
+    if not marked:
+        for amt_col in amt_cols:
+            raw_df[amt_col] = tx_validate.parse_amounts(raw_df[amt_col],
+                    a_currency_symbol, a_thousands)
+        # endfor #
+    # endif #
+    tables = split_tables(raw_df, a_cols, a_date_col,
+            a_currency_symbol if marked else None)
+    return tables
+# enddef parse_tx_bytes() #
+
+def read_marked_tx(a_raw_bytes, a_skiprows, a_dtypes, a_currency_symbol='$',
+        a_thousands=','):
+    """ Function to read the amounts of a transactions file as floats in a
+    single C parser pass
+    Parameters:
+        a_raw_bytes (bytes): Contents of transactions CSV file
+        a_skiprows (int): No. of lines to skip at the start of the file
+        a_dtypes (dict): Type of each column to read; amount columns are
+            float64, currency symbols in the text columns are left as
+            AMOUNT_MARK and only empty text cells are missing, see
+            unmark_text()
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+    Returns:
+        raw_df (DataFrame): Columns read, or None if the file holds an
+            AMOUNT_MARK of its own or an amount column holds anything else
+            than a number, such as a footer or a negative amount
+    """
+    if AMOUNT_MARK.encode() in a_raw_bytes:
+        # the mark could not be told apart from the currency symbol
+        return None
+    # endif #
+    raw_bytes = a_raw_bytes
+    if a_currency_symbol:
+        # the C parser skips whitespace around floats; the mark is no CSV
+        # delimiter or quote, so the rows and columns stay the same
+        raw_bytes = raw_bytes.replace(a_currency_symbol.encode(),
+                AMOUNT_MARK.encode())
+    # endif #
+    try:
+        # matching every cell against NA_STRINGS is left to the few
+        # distinct values of the rows kept
+        return pd.read_csv(io.BytesIO(raw_bytes), skiprows=a_skiprows,
+                usecols=list(a_dtypes), thousands=a_thousands,
+                dtype=a_dtypes, keep_default_na=False, na_values=[''],
+                engine='c')
+    except ValueError:
+        return None
+    # endtry #
+# enddef read_marked_tx() #
+
+def unmark_text(a_text, a_currency_symbol='$'):
+    """ Function to put the currency symbol back into text read by
+    read_marked_tx(), and to make text in NA_STRINGS missing
+    Parameters:
+        a_text (Series): Text, such as categories
+        a_currency_symbol (str): Currency symbol that AMOUNT_MARK stands for
+    Returns:
+        text (Series): Text with the currency symbol, as pandas.read_csv()
+            reads it by default; a_text itself if that is the same
+        present (ndarray): Boolean mask of the text that is not missing
+    """
+    # text columns share few distinct values, so only those are looked at
+    codes, uniques = pd.factorize(a_text)
+    unmarked = np.array([u.replace(AMOUNT_MARK, a_currency_symbol)
+        for u in uniques], dtype=object)
+    # the code of missing text is -1, i.e. the last, missing, entry
+    missing = np.array([u in NA_STRINGS for u in unmarked] + [True],
+            dtype=bool)
+    present = ~missing[codes]
+    if not missing[:-1].any() and \
+            all(u == v for u, v in zip(uniques, unmarked)):
+        return a_text, present
+    # endif #
+    unmarked = np.append(unmarked, np.nan)
+    unmarked[missing] = np.nan
+    return pd.Series(unmarked[codes], index=a_text.index,
+            name=a_text.name).astype(a_text.dtype), present
+# enddef unmark_text() #
+
+def split_tables(a_raw_df, a_cols=['Category', 'Amount'], a_date_col=None,
+        a_marked_symbol=None):
+    """ Function to split the side-by-side tables of a transactions file
+    Parameters:
+        a_raw_df (DataFrame): Dataframe containing the Category and Amount
+            columns of all three tables, with amounts already parsed
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+        a_date_col (str): If given, name of the date column to keep as a
+            third column
+        a_marked_symbol (str): If given, currency symbol that AMOUNT_MARK
+            stands for in the text columns, see read_marked_tx()
+    Returns:
+        income (DataFrame): Dataframe containing only income information
+        expenses (DataFrame): Dataframe containing only expense information
+        savings (DataFrame): Dataframe containing only savings information
+    """
+    tables = []
+    for suffix in ["", ".1", ".2"]:
+        cols = [c + suffix for c in a_cols]
+        # drop extraneous rows, if required; most rows of the income and
+        # savings tables are empty, so drop those by their amounts first
+        table = a_raw_df.loc[a_raw_df[cols[1]].notna().to_numpy(), cols]
+        if a_marked_symbol is None:
+            table = table.loc[table[cols[0]].notna().to_numpy()]
+        else:
+            categories, present = unmark_text(table[cols[0]],
+                    a_marked_symbol)
+            table = table.loc[present]
+            table[cols[0]] = categories.loc[present].astype(str)
+        # endif #
+        # rename columns to include unit
+        table.columns = [a_cols[0], a_cols[1] + " [$]"]
+        if a_date_col is not None:
+            dates = a_raw_df.loc[table.index, a_date_col + suffix]
+            if a_marked_symbol is not None:
+                dates, _ = unmark_text(dates, a_marked_symbol)
+            # endif #
+            table[a_date_col] = dates
+        # endif #
+        tables.append(table)
+    # endfor #
+    expenses, income, savings = tables
+    return income, expenses, savings
+# enddef split_tables() #
+
+def parse_dates(a_dates, a_format=DATE_FORMAT):
+    """ Function to parse dates with a fixed format
+    Parameters:
+        a_dates (Series): Unparsed dates, as read by
+            read_tx_file(..., a_date_col="Date")
+        a_format (str): strptime format of the dates
+    Returns:
+        dates (Series): Parsed dates; dates not matching a_format are NaT
+    """
+    # transactions share few distinct dates, so each is only parsed once
+    codes, uniques = pd.factorize(a_dates)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=a_format,
+            errors='coerce').to_numpy()
+    dates = np.full(len(codes), np.datetime64('NaT'), dtype=parsed.dtype)
+    dates[codes >= 0] = parsed[codes[codes >= 0]]
+    return pd.Series(dates, index=a_dates.index, name=a_dates.name)
+# enddef parse_dates() #
+
+def split_tx_by_period(a_tables, a_split='month', a_date_col='Date',
+        a_cols=['Category', 'Amount [$]']):
+    """ Function to categorize the transactions of every period of a ledger
+    with one groupby per table
+    Parameters:
+        a_tables (tuple(DataFrame)): Income, expenses and savings tables as
+            returned by read_tx_file(..., a_date_col="Date")
+        a_split (str): One of "month", "quarter" or "year"
+        a_date_col (str): Column name of unparsed dates
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+    Returns:
+        periods (dict): Per period, e.g. "2000-12", "2000Q4" or "2000", in
+            chronological order, the grouped income, expenses and savings
+            like categorize_tx returns them
+    """
+    grouped_tables = []
+    for table in a_tables:
+        dates = parse_dates(table[a_date_col])
+        if dates.isna().any():
+            warnings.warn("Skipping {} transactions without a valid date"
+                    .format(int(dates.isna().sum())))
+        # endif #
+        period = dates.dt.to_period(SPLIT_FREQS[a_split]).rename('Period')
+        grouped = table.groupby([period, table[a_cols[0]]])[[a_cols[1]]].sum()
+        grouped['Contribution [%]'] = 100 * grouped[a_cols[1]] / np.abs(
+                grouped.groupby(level=0)[a_cols[1]].transform('sum'))
+        grouped_tables.append(grouped)
+    # endfor #
+    parts = [dict((p, sub.droplevel(0)) for p, sub in g.groupby(level=0))
+            for g in grouped_tables]
+    # a period may lack e.g. savings altogether
+    empty = pd.DataFrame({a_cols[1]: [], 'Contribution [%]': []},
+            index=pd.Index([], name=a_cols[0]))
+    result = {}
+    for period in sorted(set().union(*parts)):
+        result[str(period)] = tuple(p.get(period, empty) for p in parts)
+    # endfor #
+    return result
+# enddef split_tx_by_period() #
+
+def categorize_tx_file_chunked(a_tx_file, a_chunksize=100000, a_skiprows=3,
+        a_skipfooter=0, a_cols=['Category', 'Amount'], a_currency_symbol='$',
+        a_thousands=','):
+    """ Function to categorize the transactions of a file that is read in
+    chunks, without holding the whole file in memory
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_chunksize (int): No. of rows to read at a time
+        a_skiprows (int): No. of lines to skip at the start of the file
+        a_skipfooter (int): No. of lines to skip at the bottom
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+    Returns:
+        grp_inc (DataFrame): Total of income transactions per category
+        grp_exp (DataFrame): Total of expense transactions per category
+        grp_sav (DataFrame): Total of savings transactions per category
+    """
+    suffixes = ["", ".1", ".2"]
+    amt_cols = [a_cols[1] + s for s in suffixes]
+    amt_colname = a_cols[1] + " [$]"
+    # running per-category sums and overall totals of income, expenses and
+    # savings; their size depends only on the number of categories
+    sums = [pd.Series(dtype=np.float64) for _ in suffixes]
+    totals = [0.0 for _ in suffixes]
+    chunks = pd.read_csv(a_tx_file, skiprows=a_skiprows,
+            usecols=[c + s for s in suffixes for c in a_cols], dtype=str,
+            chunksize=a_chunksize, engine='c')
+    # the last a_skipfooter rows read so far, held back until it is known
+    # whether they are the footer
+    held = None
+    for chunk in chunks:
+        if a_skipfooter > 0:
+            chunk = chunk if held is None else pd.concat([held, chunk])
+            held = chunk.iloc[max(len(chunk) - a_skipfooter, 0):]
+            chunk = chunk.iloc[:max(len(chunk) - a_skipfooter, 0)]
+        # endif #
+        for amt_col in amt_cols:
+            chunk[amt_col] = tx_validate.parse_amounts(chunk[amt_col],
+                    a_currency_symbol, a_thousands)
+        # endfor #
+        for k, table in enumerate(split_tables(chunk, a_cols)):
+            grp_sum = table.groupby(a_cols[0])[amt_colname].sum()
+            sums[k] = sums[k].add(grp_sum, fill_value=0.0)
+            totals[k] += table[amt_colname].sum()
+        # endfor #
+    # endfor #
+    grouped = []
+    for grp_sum, total in zip(sums, totals):
+        grouped_tx = grp_sum.sort_index().rename(amt_colname).to_frame()
+        grouped_tx.index.name = a_cols[0]
+        grouped_tx['Contribution [%]'] = (100 * grouped_tx[amt_colname] /
+                np.abs(total))
+        grouped.append(grouped_tx)
+    # endfor #
+    grp_inc, grp_exp, grp_sav = grouped
+    return grp_inc, grp_exp, grp_sav
+# enddef categorize_tx_file_chunked() #
+
+def compact_tx(a_tx, a_categories, a_cols=['Category', 'Amount [$]']):
+    """ Function to convert transactions to the compact representation
+    Parameters:
+        a_tx (DataFrame): Dataframe containing transactions
+        a_categories (list of strings): Category dictionary shared by all
+            compacted transactions; new categories are appended in place
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+    Returns:
+        compact_tx (DataFrame): Transactions with a categorical Category
+            column and amounts as int64 in an "Amount [cents]" column
+    """
+    known = set(a_categories)
+    a_categories.extend(sorted(set(a_tx[a_cols[0]].unique()) - known))
+    compact_tx = pd.DataFrame({
+        a_cols[0]: pd.Categorical(a_tx[a_cols[0]], categories=a_categories),
+        CENTS_COLNAME: np.rint(100.0 * a_tx[a_cols[1]].to_numpy()).astype(
+            np.int64)}, index=a_tx.index)
+    return compact_tx
+# enddef compact_tx() #
+
+def to_dollars(a_grouped_tx):
+    """ Function to convert grouped compact transactions back to dollars
+    Parameters:
+        a_grouped_tx (DataFrame): Total of transactions per category, with
+            amounts in an "Amount [cents]" column
+    Returns:
+        grouped_tx (DataFrame): Total of transactions per category, with
+            amounts in an "Amount [$]" column
+    """
+    grouped_tx = a_grouped_tx.copy()
+    grouped_tx[CENTS_COLNAME] = grouped_tx[CENTS_COLNAME] / 100.0
+    return grouped_tx.rename(columns={CENTS_COLNAME: 'Amount [$]'})
+# enddef to_dollars() #
+
 def categorize_tx(a_tx, a_cols=['Category', 'Amount [$]']):
     """ Function to categorize transactions in income or expenses
     Parameters:
-        a_tx (DataFrame): Dataframe containing transactions
+        a_tx (DataFrame): Dataframe containing transactions, either as read
+            by read_tx_file or compacted by compact_tx
         a_cols (list of strings): Column names containing relevant
             transaction information in the order (Category, Amount)
     Returns:
         grouped_tx (DataFrame): Total of transactions per category
     """
+    if CENTS_COLNAME in a_tx.columns:
+        # compact transactions: integer sums over the categorical codes
+        grouped_tx = a_tx.groupby(a_cols[0], observed=True)[
+                [CENTS_COLNAME]].sum()
+        # plain, alphabetically sorted category index, like below
+        grouped_tx.index = grouped_tx.index.astype(object)
+        grouped_tx = grouped_tx.sort_index()
+        grouped_tx['Contribution [%]'] = (100 * grouped_tx[CENTS_COLNAME] /
+                np.abs(grouped_tx[CENTS_COLNAME].sum()))
+        return grouped_tx
+    # endif #
     # group transactions and add them
     grouped_tx =  a_tx.groupby(a_cols[0]).aggregate(np.sum)
     grouped_tx['Contribution [%]'] = 100 * grouped_tx[a_cols[1]]/np.abs(np.sum(
@@ -82,8 +406,102 @@ def categorize_tx(a_tx, a_cols=['Category', 'Amount [$]']):
     return grouped_tx
 # enddef categorize_tx() #
 
+@functools.lru_cache(maxsize=64)
+def category_tree(a_categories, a_sep=CATEGORY_SEP):
+    """ Function to build the prefix index of hierarchical categories
+    Parameters:
+        a_categories (tuple of strings): Leaf categories such as
+            "Utilities:Electric:Peak"
+        a_sep (str): Separator of the levels of a category
+    Returns:
+        nodes (list of strings): Every category and every prefix of one,
+            e.g. "Utilities" and "Utilities:Electric"
+        depths (ndarray): Depth of each node, 1 for top-level categories
+        ancestors (ndarray): Per leaf, the node id of its prefix at each
+            depth, padded with the leaf's own node id below its depth
+    """
+    parts = [c.split(a_sep) for c in a_categories]
+    max_depth = max([len(p) for p in parts] + [1])
+    node_ids = {}
+    ancestors = np.zeros((len(parts), max_depth), dtype=np.int64)
+    for k, levels in enumerate(parts):
+        for d in range(len(levels)):
+            node = a_sep.join(levels[:d + 1])
+            ancestors[k, d] = node_ids.setdefault(node, len(node_ids))
+        # endfor #
+        ancestors[k, len(levels):] = ancestors[k, len(levels) - 1]
+    # endfor #
+    nodes = list(node_ids)
+    depths = np.array([n.count(a_sep) + 1 for n in nodes], dtype=np.int64)
+    return nodes, depths, ancestors
+# enddef category_tree() #
+
+def rollup_categories(a_grouped_tx, a_depth=None, a_sep=CATEGORY_SEP):
+    """ Function to total grouped transactions at the levels of hierarchical
+    categories, rolling the leaf totals of categorize_tx up the tree
+    Parameters:
+        a_grouped_tx (DataFrame): Total of transactions per leaf category, as
+            returned by categorize_tx
+        a_depth (int): If given, only categories at this depth (>= 1) are
+            kept, with deeper ones added to their prefix; shallower categories
+            stay as they are. Otherwise every node of the tree is kept, with
+            its depth in a "Depth" column.
+        a_sep (str): Separator of the levels of a category
+    Returns:
+        rolled_tx (DataFrame): Total and contribution of each category
+    """
+    if a_depth is not None and a_depth < 1:
+        raise ValueError("Depth of categories must be >= 1, not {}".format(
+            a_depth))
+    # endif #
+    nodes, depths, ancestors = category_tree(
+            tuple(a_grouped_tx.index.astype(str)), a_sep)
+    amt_col = a_grouped_tx.columns[0]
+    amounts = a_grouped_tx[amt_col].to_numpy(dtype=np.float64)
+    if a_depth is None:
+        # every leaf adds to each of its distinct prefixes once
+        n_levels = ancestors.shape[1]
+        distinct = np.ones(ancestors.shape, dtype=bool)
+        distinct[:, 1:] = ancestors[:, 1:] != ancestors[:, :-1]
+        node_ids = ancestors[distinct]
+        weights = np.repeat(amounts[:, None], n_levels, axis=1)[distinct]
+    else:
+        node_ids = ancestors[:, min(a_depth, ancestors.shape[1]) - 1]
+        weights = amounts
+    # endif #
+    sums = np.bincount(node_ids, weights=weights, minlength=len(nodes))
+    used = np.flatnonzero(np.bincount(node_ids, minlength=len(nodes)))
+    totals = sums[used]
+    if a_grouped_tx[amt_col].dtype.kind in "iu":
+        totals = np.rint(totals).astype(np.int64)
+    # endif #
+    rolled_tx = pd.DataFrame({amt_col: totals}, index=pd.Index(
+        np.array(nodes, dtype=object)[used], name=a_grouped_tx.index.name))
+    rolled_tx['Contribution [%]'] = 100 * totals / np.abs(amounts.sum())
+    if a_depth is None:
+        rolled_tx['Depth'] = depths[used]
+    # endif #
+    return rolled_tx.sort_index()
+# enddef rollup_categories() #
+
+def positive_int(a_value):
+    """ Function to parse a command line argument that must be >= 1
+    Parameters:
+        a_value (str): Argument
+    Returns:
+        value (int): Parsed argument
+    """
+    value = int(a_value)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be >= 1, not {}".format(value))
+    # endif #
+    return value
+# enddef positive_int() #
+
 def write_reports(a_report_file, a_period, a_grp_inc, a_grp_exp, a_grp_sav,
-        a_summary_file, a_amt_colname='Amount [$]'):
+        a_summary_file, a_amt_colname='Amount [$]', a_reset_summary=False,
+        a_replace_summary=False, a_formats=("text",), a_depth=None,
+        a_targets=None, a_sort_summary=False):
     """ Function to create summary reports.
     Parameters:
         a_report_file (str): Filename of where to store reports for
@@ -94,18 +512,47 @@ def write_reports(a_report_file, a_period, a_grp_inc, a_grp_exp, a_grp_sav,
         a_summary_file (str): Filename where summaries of previous runs
             are stored
         a_amt_colname (str): Column name containing raw amount values
+        a_reset_summary (bool): Whether to start a new summary file instead
+            of appending to it
+        a_replace_summary (bool): Whether to replace the summary row of a
+            period that is already in the summary file instead of appending
+            another one
+        a_formats (tuple(str)): Formats of the report, out of
+            report_render.FORMATS; formats other than text are written next
+            to a_report_file with their own extension
+        a_depth (int): If given, category-wise tables are rolled up to this
+            depth of the category hierarchy, see rollup_categories()
+        a_targets (DataFrame): If given, budget targets of the expense
+            categories from budget_variance.read_budget_targets(); their
+            variance is reported and they are stored next to the summary file
+        a_sort_summary (bool): Whether a period that is new to the summary
+            file is inserted in the order of period names when replacing,
+            see summary_store.replace_period()
     Returns:
         None
     """
-    # compute total income, expenses, savings
-    tot_inc = np.sum(a_grp_inc[a_amt_colname])
-    tot_exp = np.sum(a_grp_exp[a_amt_colname])
-    tot_sav = np.sum(a_grp_sav[a_amt_colname])
-    # compute net savings (i.e., excess of income over expenses),
-    # net-savings-% (% of income)
-    net_sav = tot_inc - tot_exp
-    # unutilized savings
-    xtra_sav = net_sav - tot_sav
+    if CENTS_COLNAME in a_grp_inc.columns:
+        # compact transactions: compute totals exactly in integer cents
+        inc_c, exp_c, sav_c = [int(np.sum(g[CENTS_COLNAME])) for g in
+                (a_grp_inc, a_grp_exp, a_grp_sav)]
+        # numpy floats, so that the ratios below divide like the float totals
+        tot_inc, tot_exp, tot_sav = [np.float64(c) / 100.0 for c in
+                (inc_c, exp_c, sav_c)]
+        net_sav = np.float64(inc_c - exp_c) / 100.0
+        xtra_sav = np.float64(inc_c - exp_c - sav_c) / 100.0
+        a_grp_inc, a_grp_exp, a_grp_sav = [to_dollars(g) for g in
+                (a_grp_inc, a_grp_exp, a_grp_sav)]
+    else:
+        # compute total income, expenses, savings
+        tot_inc = np.sum(a_grp_inc[a_amt_colname])
+        tot_exp = np.sum(a_grp_exp[a_amt_colname])
+        tot_sav = np.sum(a_grp_sav[a_amt_colname])
+        # compute net savings (i.e., excess of income over expenses),
+        # net-savings-% (% of income)
+        net_sav = tot_inc - tot_exp
+        # unutilized savings
+        xtra_sav = net_sav - tot_sav
+    # endif #
     # %-savings
     if tot_inc < 0:
         warning_msg = "Total income for {:s} is negative (-${:.2f})!"
@@ -113,7 +560,10 @@ def write_reports(a_report_file, a_period, a_grp_inc, a_grp_exp, a_grp_sav,
         warnings.warn(warning_msg)
         sav_pct = -np.inf
     else:
-        sav_pct = 100.0 * net_sav / tot_inc
+        # inf or NaN without income
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sav_pct = 100.0 * net_sav / tot_inc
+        # endwith #
     # endif #
     # net savings utilization ratio (total savings : net savings)
     if net_sav < 0:
@@ -122,66 +572,228 @@ def write_reports(a_report_file, a_period, a_grp_inc, a_grp_exp, a_grp_sav,
         warnings.warn(warning_msg)
         sav_util = -np.inf
     else:
-        sav_util = 100.0 * tot_sav / net_sav
-    # endif #
-    # compute and plot grouped expenses and income
-    with open(a_report_file,'w') as rf:
-        rf.write("Budget Report for {}\n".format(a_period))
-        rf.write("Total income = $ {:.2f}\n".format(tot_inc))
-        rf.write("Total expenses = $ {:.2f}\n".format(tot_exp))
-        rf.write("Net savings = $ {:.2f}\n".format(net_sav))
-        rf.write("Utilized savings = $ {:.2f}\n".format(tot_sav))
-        rf.write("Unutilized savings = $ {:.2f}\n".format(xtra_sav))
-        rf.write("Net savings as a % of income = {:.2f}%\n".format(sav_pct))
-        rf.write("Net savings utilization ratio = {:.2f}%\n".format(sav_util))
-        rf.write("\nCategory-wise income:\n")
-        rf.write(a_grp_inc.to_string())
-        rf.write("\n\nCategory-wise expenses:\n")
-        rf.write(a_grp_exp.to_string())
-        rf.write("\n\nCategory-wise savings:\n")
-        rf.write(a_grp_sav.to_string())
-    # endwith #
-    if not os.path.exists(a_summary_file):
-        with  open(a_summary_file,'w') as sf:
-            sf.write("Time period,Income [$],Expenses [$],"+
-                    "Utilized savings [$],"+
-                    "Unutilzed savings [$],pct-savings [%]," +
-                    "Savings utilization ratio [%]\n")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sav_util = 100.0 * tot_sav / net_sav
         # endwith #
     # endif #
-    with open(a_summary_file,'a') as sf:
-        sf.write("{},{:.2f},{:.2f},{:.2f},{:.2f},{:.2f},{:.2f}\n".format(
-            a_period, tot_inc, tot_exp, tot_sav, xtra_sav, sav_pct, sav_util))
-    # endwith #
+    # format totals and grouped expenses and income once for all formats
+    blocks = [report_render.lines_block(None, [
+        ("Total income [$]", tot_inc, "Total income = $ {:.2f}"),
+        ("Total expenses [$]", tot_exp, "Total expenses = $ {:.2f}"),
+        ("Net savings [$]", net_sav, "Net savings = $ {:.2f}"),
+        ("Utilized savings [$]", tot_sav, "Utilized savings = $ {:.2f}"),
+        ("Unutilized savings [$]", xtra_sav, "Unutilized savings = $ {:.2f}"),
+        ("Net savings [% of income]", sav_pct,
+            "Net savings as a % of income = {:.2f}%"),
+        ("Net savings utilization ratio [%]", sav_util,
+            "Net savings utilization ratio = {:.2f}%")])]
+    for grouped_tx, kind in [(a_grp_inc, "income"), (a_grp_exp, "expenses"),
+            (a_grp_sav, "savings")]:
+        if a_depth is not None:
+            grouped_tx = rollup_categories(grouped_tx, a_depth)
+        # endif #
+        blocks.append(report_render.table_block("Category-wise " + kind,
+            grouped_tx.reset_index()))
+    # endfor #
+    if a_targets is not None:
+        targets = a_targets.reset_index()
+        targets.insert(0, "Time period", a_period)
+        variance = budget_variance.compute_variance(targets)
+        blocks.append(report_render.table_block("Budget variance of expenses",
+            variance[["Category", "Actual [$]", "Budget [$]", "Variance [$]",
+                "Over budget [%]"]]))
+    # endif #
+    report_render.write_report(a_report_file,
+            "Budget Report for {}".format(a_period), blocks, a_formats)
+    if a_replace_summary and not a_reset_summary:
+        summary_store.replace_period(a_summary_file, a_period, tot_inc,
+                tot_exp, tot_sav, xtra_sav, sav_pct, sav_util, a_sort_summary)
+    else:
+        summary_store.append_period(a_summary_file, a_period, tot_inc,
+                tot_exp, tot_sav, xtra_sav, sav_pct, sav_util, a_reset_summary)
+    # endif #
+    if a_targets is not None:
+        # targets of a period reported again replace the earlier ones
+        budget_variance.append_targets(a_summary_file, a_period, a_targets,
+                a_reset_summary)
+    # endif #
 # enddef write_reports() #
 
-def plot_tallied_tx(a_grouped_tx, a_title, a_plotfile, a_col='Contribution [%]'):
+def draw_tallied_tx(a_fig, a_grouped_tx, a_title, a_col='Contribution [%]'):
     """
-    Function to plot tallied transactions
+    Function to draw tallied transactions on a figure
     Paramaters:
+        a_fig (Figure): Figure to draw on
         a_grouped_tx(DataFrame): Total of transactions per category
-        a_plotfile (str): Filename to save pie plot in
-        a_title (str): Title of pie plot
+        a_title (str): Title of plot
         a_col (str): Column name containing contribution of each category
     Returns:
         None
     """
-    plt.close('all')
-    fig, ax = plt.subplots()
+    ax = a_fig.subplots()
     ax.bar(np.arange(a_grouped_tx.shape[0]), a_grouped_tx[a_col],
             tick_label=a_grouped_tx.index.values)
     ax.set_title(a_title)
     ax.minorticks_on()
-    ax.grid(b=True, which='both', axis='both')
-    plt.xticks(rotation=90)
+    ax.grid(visible=True, which='both', axis='both')
+    ax.tick_params(axis='x', labelrotation=90)
     ax.set_ylabel('%')
-    plt.tight_layout()
-    plt.savefig(a_plotfile)
+    a_fig.tight_layout()
+# enddef draw_tallied_tx() #
+
+def plot_tallied_tx(a_grouped_tx, a_title, a_plotfile, a_col='Contribution [%]',
+        a_depth=None):
+    """
+    Function to plot tallied transactions
+    Paramaters:
+        a_grouped_tx(DataFrame): Total of transactions per category
+        a_plotfile (str): Filename to save pie plot in
+        a_title (str): Title of pie plot
+        a_col (str): Column name containing contribution of each category
+        a_depth (int): If given, categories are rolled up to this depth of
+            the category hierarchy, see rollup_categories()
+    Returns:
+        None
+    """
+    if a_depth is not None:
+        a_grouped_tx = rollup_categories(a_grouped_tx, a_depth)
+    # endif #
+    plot_render.render_plot(draw_tallied_tx, a_plotfile, a_grouped_tx[[a_col]],
+            a_title, a_col)
 # enddef plot_tallied_tx() #
 
+def analyze_tx_file(a_tx_file, a_cache_dir=None, a_chunksize=None,
+        a_categories=None):
+    """ Function to read in and categorize a transactions file
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_chunksize (int): If given, the transaction file is streamed in
+            chunks of this many rows instead of being read in at once
+        a_categories (list of strings): If given, transactions are converted
+            to the compact representation using this shared category
+            dictionary (see compact_tx); ignored when streaming in chunks
+    Returns:
+        grp_inc (DataFrame): Total of income transactions per category
+        grp_exp (DataFrame): Total of expense transactions per category
+        grp_sav (DataFrame): Total of savings transactions per category
+    """
+    if a_chunksize is not None:
+        # stream the transaction file and categorize on the fly
+        with profiling.stage("categorize_tx_file_chunked"):
+            return categorize_tx_file_chunked(a_tx_file, a_chunksize)
+        # endwith #
+    # endif #
+    # read the transaction file
+    with profiling.stage("read_tx_file"):
+        if a_cache_dir is None:
+            inc, exp, sav = read_tx_file(a_tx_file)
+        else:
+            from tx_cache import read_tx_file_cached
+            inc, exp, sav = read_tx_file_cached(a_tx_file, a_cache_dir)
+        # endif #
+        if a_categories is not None:
+            inc, exp, sav = [compact_tx(t, a_categories)
+                    for t in (inc, exp, sav)]
+        # endif #
+    # endwith #
+    # categorize expenses and income
+    with profiling.stage("categorize_tx"):
+        grp_inc = categorize_tx(inc)
+        grp_exp = categorize_tx(exp)
+        grp_sav = categorize_tx(sav)
+    # endwith #
+    return grp_inc, grp_exp, grp_sav
+# enddef analyze_tx_file() #
+
+def plot_period(a_period, a_grp_inc, a_grp_exp, a_grp_sav, a_jobs=1,
+        a_col='Contribution [%]', a_depth=None, a_plot_dir="."):
+    """ Function to plot category breakdown of a period; plots whose data
+    did not change since they were last rendered are skipped
+    Parameters:
+        a_period (str): Time period for which transactions are processed
+        a_grp_inc (Dataframe): Dataframe containing grouped income information
+        a_grp_exp (Dataframe): Dataframe containing grouped expense information
+        a_grp_sav (Dataframe): Dataframe containing grouped savings information
+        a_jobs (int): No. of worker processes used to render the plots
+        a_col (str): Column name containing contribution of each category
+        a_depth (int): If given, categories are rolled up to this depth of
+            the category hierarchy, see rollup_categories()
+        a_plot_dir (str): Directory in which to write the plots
+    Returns:
+        None
+    """
+    plots = []
+    for grouped_tx, title in [(a_grp_inc, "Income"), (a_grp_exp, "Expenses"),
+            (a_grp_sav, "Savings")]:
+        if a_depth is not None:
+            grouped_tx = rollup_categories(grouped_tx, a_depth)
+        # endif #
+        plotfile = os.path.join(a_plot_dir,
+                "Plot_" + title + "_" + a_period + ".png")
+        plots.append((draw_tallied_tx, plotfile,
+            (grouped_tx[[a_col]], title, a_col)))
+    # endfor #
+    plot_render.render_plots(plots, a_jobs)
+# enddef plot_period() #
+
+def analyze_ledger(a_tx_file, a_split='month', a_report_dir=".",
+        a_summary_file="MyBudget_summary.csv", a_cache_dir=None, a_plots=True,
+        a_jobs=1, a_formats=("text",), a_depth=None):
+    """ Function to read a ledger of many periods once, and write the report,
+    summary row and plots of each period
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_split (str): One of "month", "quarter" or "year"
+        a_report_dir (str): Directory in which "<period>_report.txt" files
+            and plots are written
+        a_summary_file (str): Filename where summaries of all periods are
+            stored; rows of periods already in it are replaced, and new
+            periods are inserted in the order of period names
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_plots (bool): Whether to plot the category breakdown
+        a_jobs (int): No. of worker processes used to render plots
+        a_formats (tuple(str)): Formats of the reports, out of
+            report_render.FORMATS
+        a_depth (int): If given, categories in the reports and plots are
+            rolled up to this depth of the "A:B:C" category hierarchy
+    Returns:
+        periods (list of strings): Periods found in the ledger
+    """
+    with profiling.stage("read_tx_file"):
+        if a_cache_dir is None:
+            tables = read_tx_file(a_tx_file, a_date_col='Date')
+        else:
+            from tx_cache import read_tx_file_cached
+            tables = read_tx_file_cached(a_tx_file, a_cache_dir,
+                    a_date_col='Date')
+        # endif #
+    # endwith #
+    with profiling.stage("categorize_tx"):
+        periods = split_tx_by_period(tables, a_split)
+    # endwith #
+    for period, grouped in periods.items():
+        with profiling.stage("write_reports"):
+            write_reports(os.path.join(a_report_dir, period + "_report.txt"),
+                    period, *grouped, a_summary_file, a_replace_summary=True,
+                    a_formats=a_formats, a_depth=a_depth, a_sort_summary=True)
+        # endwith #
+        if a_plots:
+            plot_period(period, *grouped, a_jobs, a_depth=a_depth,
+                    a_plot_dir=a_report_dir)
+        # endif #
+    # endfor #
+    return list(periods)
+# enddef analyze_ledger() #
+
 def main(a_tx_file, a_period="Test period",
         a_report_file="TestPeriod_report.txt",
-        a_summary_file="MyBudget_summary.csv"):
+        a_summary_file="MyBudget_summary.csv", a_cache_dir=None,
+        a_chunksize=None, a_plots=True, a_jobs=1, a_compact=False,
+        a_profile_file=None, a_formats=("text",), a_depth=None,
+        a_budget=False, a_index_file=None):
     """ Main function.
     Parameters:
         a_tx_file (str): Name of transactions CSV file
@@ -189,26 +801,158 @@ def main(a_tx_file, a_period="Test period",
         a_report_file (str): Filename of where to store reports for
         a_summary_file (str): Filename where summaries of previous runs
             are stored
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None, and when validating with a_index_file
+        a_chunksize (int): If given, the transaction file is streamed in
+            chunks of this many rows instead of being read in at once; not
+            allowed with a_index_file
+        a_plots (bool): Whether to plot the category breakdown
+        a_jobs (int): No. of worker processes used to render plots
+        a_compact (bool): Whether to use categorical categories and integer
+            cents amounts
+        a_profile_file (str): If given, time and memory of each stage are
+            written to this JSON file (see profiling.py)
+        a_formats (tuple(str)): Formats of the report, out of
+            report_render.FORMATS
+        a_depth (int): If given, categories in the report and plots are
+            rolled up to this depth of the "A:B:C" category hierarchy
+        a_budget (bool): Whether to report the variance of expenses from the
+            budget targets in the "Diff." column of the transactions file
+        a_index_file (str): If given, file of fingerprints of transactions
+            of all periods ingested so far; transactions ingested in another
+            period are left out, and they and malformed rows are warned about
+            (see tx_validate.py)
     Returns:
         None
     """
-    # read the transaction file
-    inc, exp, sav = read_tx_file(a_tx_file)
-    # categorize expenses and income
-    grp_inc = categorize_tx(inc)
-    grp_exp = categorize_tx(exp)
-    grp_sav = categorize_tx(sav)
-    # compute total expenses, income, savings, %-savings, and write reports
-    write_reports(a_report_file, a_period, grp_inc, grp_exp, grp_sav,
-            a_summary_file)
-    # plot category breakdown for this period and overall summary
-    plot_tallied_tx(grp_inc, "Income", "Plot_Income_" + a_period + ".png")
-    plot_tallied_tx(grp_exp, "Expenses", "Plot_Expenses_" + a_period + ".png")
-    plot_tallied_tx(grp_sav, "Savings", "Plot_Savings_" + a_period + ".png")
+    if a_index_file is not None and a_chunksize is not None:
+        raise ValueError("Transactions cannot be streamed in chunks when " +
+                "they are validated against an index file")
+    # endif #
+    with profiling.profile(a_profile_file):
+        # the category dictionary is shared by all periods of the summary
+        categories = summary_store.read_categories(a_summary_file) \
+                if a_compact else None
+        n_categories = len(categories) if a_compact else 0
+        if a_index_file is not None:
+            with profiling.stage("validate_tx_file"):
+                # the index is only saved once the report is written
+                rows = tx_validate.read_tx_rows(a_tx_file)
+                tables, malformed, duplicates, index = \
+                        tx_validate.validate_rows(rows, a_period,
+                                tx_validate.load_index(a_index_file))
+                for line in tx_validate.format_issues(a_tx_file, malformed,
+                        duplicates):
+                    warnings.warn(line)
+                # endfor #
+                if a_compact:
+                    tables = [compact_tx(t, categories) for t in tables]
+                # endif #
+                grp_inc, grp_exp, grp_sav = [categorize_tx(t) for t in tables]
+            # endwith #
+        else:
+            grp_inc, grp_exp, grp_sav = analyze_tx_file(a_tx_file,
+                    a_cache_dir, a_chunksize, categories)
+        # endif #
+        if a_compact and len(categories) > n_categories:
+            summary_store.save_categories(a_summary_file, categories)
+        # endif #
+        targets = None
+        if a_budget:
+            with profiling.stage("read_budget_targets"):
+                targets = budget_variance.read_budget_targets(a_tx_file)
+            # endwith #
+        # endif #
+        # compute total expenses, income, savings, %-savings, and write reports
+        with profiling.stage("write_reports"):
+            write_reports(a_report_file, a_period, grp_inc, grp_exp, grp_sav,
+                    a_summary_file, a_formats=a_formats, a_depth=a_depth,
+                    a_targets=targets)
+        # endwith #
+        if a_index_file is not None:
+            tx_validate.save_index(a_index_file, index)
+        # endif #
+        # plot category breakdown for this period and overall summary
+        if a_plots:
+            plot_period(a_period, grp_inc, grp_exp, grp_sav, a_jobs,
+                    a_depth=a_depth)
+        # endif #
+    # endwith #
 # enddef main() #
 
 if __name__ == "__main__":
-    passed_args = sys.argv[1:]
-    main(*passed_args)
+    import tx_cache
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tx_file", help="Name of transactions file")
+    parser.add_argument("period", nargs='?', default="Test period",
+            help="Time period including all transactions")
+    parser.add_argument("report_file", nargs='?',
+            default="TestPeriod_report.txt", help="Name of report file")
+    parser.add_argument("summary_file", nargs='?',
+            default="MyBudget_summary.csv", help="Name of summary file")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse the transactions file without using the cache")
+    parser.add_argument("--clear-cache", action='store_true',
+            help="Remove all entries from the cache before running")
+    parser.add_argument("--chunksize", type=int, default=None,
+            help="Stream the transactions file in chunks of this many rows")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write the report and summary, without plots")
+    parser.add_argument("--jobs", type=int, default=1,
+            help="No. of worker processes used to render plots")
+    parser.add_argument("--compact", action='store_true',
+            help="Use categorical categories and integer-cent amounts")
+    parser.add_argument("--profile", default=None,
+            help="JSON file to write per-stage time and memory to")
+    parser.add_argument("--formats", nargs='+', default=["text"],
+            choices=report_render.FORMATS,
+            help="Formats of the report; formats other than text are " +
+            "written next to the report file")
+    parser.add_argument("--depth", type=positive_int, default=None,
+            help="Roll \"A:B:C\" categories up to this depth in the report " +
+            "and plots")
+    parser.add_argument("--budget", action='store_true',
+            help="Report the variance of expenses from the budget targets " +
+            "in the \"Diff.\" column")
+    parser.add_argument("--index-file", default=None,
+            help="File of fingerprints of ingested transactions, to leave " +
+            "out transactions already ingested in another period; the " +
+            "sheet is then read without the cache")
+    parser.add_argument("--split", choices=list(SPLIT_FREQS), default=None,
+            help="Split a ledger of many periods by the Date column and " +
+            "report each period; period and report_file are ignored")
+    parser.add_argument("--report-dir", default=".",
+            help="Directory in which to write period reports and plots " +
+            "with --split")
+    args = parser.parse_args()
+    if args.index_file is not None and args.chunksize is not None:
+        parser.error("--chunksize cannot be combined with --index-file")
+    # endif #
+    if args.split is not None:
+        for option in ["compact", "budget", "index_file", "chunksize"]:
+            if getattr(args, option) not in (None, False):
+                parser.error("--{} cannot be combined with --split".format(
+                    option.replace("_", "-")))
+            # endif #
+        # endfor #
+    # endif #
+    if args.clear_cache:
+        tx_cache.clear_cache(args.cache_dir)
+    # endif #
+    if args.split is not None:
+        with profiling.profile(args.profile):
+            analyze_ledger(args.tx_file, args.split, args.report_dir,
+                    args.summary_file,
+                    None if args.no_cache else args.cache_dir,
+                    not args.no_plots, args.jobs, args.formats, args.depth)
+        # endwith #
+    else:
+        main(args.tx_file, args.period, args.report_file, args.summary_file,
+                None if args.no_cache else args.cache_dir, args.chunksize,
+                not args.no_plots, args.jobs, args.compact, args.profile,
+                args.formats, args.depth, args.budget, args.index_file)
     # endif #
 # endif #
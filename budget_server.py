@@ -0,0 +1,353 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To serve summaries, category-wise totals and net worth as JSON over
+    local HTTP
+License: GPLv3+
+"""
+
+import os
+import json
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import budget_analysis
+import collate_periods
+import report_render
+import tx_cache
+from batch_analysis import glob_periods
+
+KINDS = ("income", "expenses", "savings")
+
+class LRUCache:
+    """ Thread-safe cache of the most recently used responses """
+
+    def __init__(self, a_max_entries=128):
+        """ Constructor
+        Parameters:
+            a_max_entries (int): Max. no. of responses kept
+        """
+        self.max_entries = a_max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # futures of the responses being computed, by key
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+    # enddef __init__() #
+
+    def get(self, a_key, a_compute):
+        """ Function to get a cached response, computing it if needed
+        Parameters:
+            a_key (tuple): Key of response, incl. the signatures of the files
+                it is computed from, so that changed files are not served
+                from the cache
+            a_compute (function): Function computing the response
+        Returns:
+            response (bytes): Response
+        """
+        with self.lock:
+            if a_key in self.entries:
+                self.entries.move_to_end(a_key)
+                self.hits += 1
+                return self.entries[a_key]
+            # endif #
+            future = self.pending.get(a_key)
+            if future is None:
+                future = self.pending[a_key] = Future()
+                self.misses += 1
+                waiting = False
+            else:
+                # served by the request computing it
+                self.hits += 1
+                waiting = True
+            # endif #
+        # endwith #
+        if waiting:
+            return future.result()
+        # endif #
+        # computed outside the lock, so that slow requests do not hold up
+        # cached ones; concurrent misses of one key wait for one computation
+        try:
+            response = a_compute()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[a_key]
+            # endwith #
+            future.set_exception(e)
+            raise
+        # endtry #
+        with self.lock:
+            self.entries[a_key] = response
+            self.entries.move_to_end(a_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            # endwhile #
+            del self.pending[a_key]
+        # endwith #
+        future.set_result(response)
+        return response
+    # enddef get() #
+# endclass LRUCache #
+
+def to_json(a_data):
+    """ Function to convert data to JSON values
+    Parameters:
+        a_data: Dictionaries, lists and numbers to convert; NaN and infinite
+            amounts become None
+    Returns:
+        data: Data with Python ints, floats and strings only
+    """
+    if isinstance(a_data, dict):
+        a_data = dict((k, to_json(v) if isinstance(v, (dict, list)) else
+            report_render.to_json_value(v)) for k, v in a_data.items())
+    elif isinstance(a_data, list):
+        return [to_json(v) if isinstance(v, (dict, list)) else
+                report_render.to_json_value(v) for v in a_data]
+    # endif #
+    return a_data
+# enddef to_json() #
+
+def encode(a_data):
+    """ Function to encode a response
+    Parameters:
+        a_data: Data to encode, see to_json()
+    Returns:
+        response (bytes): UTF-8 JSON
+    """
+    return json.dumps(to_json(a_data)).encode()
+# enddef encode() #
+
+def frame_records(a_df):
+    """ Function to convert a table to JSON records
+    Parameters:
+        a_df (DataFrame): Table
+    Returns:
+        records (list(dict)): One dictionary per row
+    """
+    return a_df.to_dict(orient="records")
+# enddef frame_records() #
+
+class BudgetService:
+    """ Computes the responses of the endpoints from the summary file and the
+    transactions files
+    """
+
+    def __init__(self, a_summary_file, a_pattern=None, a_initial_net_worth=0.0,
+            a_cache_dir=None, a_max_entries=128):
+        """ Constructor
+        Parameters:
+            a_summary_file (str): Filename containing period summary for
+                different periods
+            a_pattern (str): Glob pattern of transactions files, named after
+                the period; category-wise totals are not served if None
+            a_initial_net_worth (float): Net worth at the beginning of all
+                periods
+            a_cache_dir (str): Directory of the parsed-transaction cache; the
+                cache is bypassed if None
+            a_max_entries (int): Max. no. of responses kept in memory
+        """
+        self.summary_file = a_summary_file
+        self.pattern = a_pattern
+        self.initial_net_worth = a_initial_net_worth
+        self.cache_dir = a_cache_dir
+        self.cache = LRUCache(a_max_entries)
+    # enddef __init__() #
+
+    def signature(self, a_file):
+        """ Function to get the modification time of an input file
+        Parameters:
+            a_file (str): Name of file
+        Returns:
+            signature (tuple): (size, modification time in ns)
+        """
+        stat = os.stat(a_file)
+        return (stat.st_size, stat.st_mtime_ns)
+    # enddef signature() #
+
+    def tx_files(self):
+        """ Function to find the transactions file of each period
+        Parameters:
+            None
+        Returns:
+            tx_files (dict): Transactions file per period
+        """
+        if self.pattern is None:
+            return {}
+        # endif #
+        summary_file = os.path.abspath(self.summary_file)
+        return dict((p, f) for p, f in glob_periods(self.pattern)
+                if os.path.abspath(f) != summary_file)
+    # enddef tx_files() #
+
+    def periods(self):
+        """ Endpoint /periods: summary and net worth of every period """
+        return self.cache.get(("periods", self.signature(self.summary_file)),
+                lambda: encode(frame_records(
+                    collate_periods.summarize_all_periods(
+                        self.initial_net_worth, self.summary_file))))
+    # enddef periods() #
+
+    def networth(self):
+        """ Endpoint /networth: net worth after every period """
+        return self.cache.get(("networth", self.signature(self.summary_file)),
+                lambda: encode(frame_records(
+                    collate_periods.summarize_all_periods(
+                        self.initial_net_worth, self.summary_file)[
+                            ["Time period", "Net worth [$]"]])))
+    # enddef networth() #
+
+    def ytd(self):
+        """ Endpoint /ytd: totals of all periods """
+        # requests are served by several threads at once, so stale running
+        # totals are recomputed without writing them back
+        return self.cache.get(("ytd", self.signature(self.summary_file)),
+                lambda: encode(collate_periods.summarize_ytd(
+                    self.initial_net_worth, self.summary_file,
+                    a_save_totals=False)))
+    # enddef ytd() #
+
+    def categories(self, a_period, a_kind="expenses"):
+        """ Endpoint /categories/<period>?kind=<kind>: total and contribution
+        of each category of a period
+        Parameters:
+            a_period (str): Time period
+            a_kind (str): One of "income", "expenses" or "savings"
+        Returns:
+            response (bytes): JSON list of one record per category, or None
+                if there is no such period
+        """
+        tx_file = self.tx_files().get(a_period)
+        if tx_file is None or a_kind not in KINDS:
+            return None
+        # endif #
+
+        def compute():
+            grouped = budget_analysis.analyze_tx_file(tx_file,
+                    self.cache_dir)[KINDS.index(a_kind)]
+            return encode(frame_records(grouped.reset_index()))
+        # enddef compute() #
+
+        return self.cache.get(("categories", a_period, a_kind,
+            self.signature(tx_file)), compute)
+    # enddef categories() #
+
+    def handle(self, a_path, a_query):
+        """ Function to compute the response to a request
+        Parameters:
+            a_path (str): Path of the request
+            a_query (dict): Parsed query string of the request
+        Returns:
+            response (bytes): JSON response, or None if there is no such
+                resource
+        """
+        parts = [p for p in a_path.split("/") if p]
+        if parts == ["periods"]:
+            return self.periods()
+        elif parts == ["networth"]:
+            return self.networth()
+        elif parts == ["ytd"]:
+            return self.ytd()
+        elif len(parts) == 2 and parts[0] == "categories":
+            return self.categories(parts[1],
+                    a_query.get("kind", ["expenses"])[0])
+        # endif #
+        return None
+    # enddef handle() #
+# endclass BudgetService #
+
+class BudgetRequestHandler(BaseHTTPRequestHandler):
+    """ Read-only handler of requests to a BudgetService """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            body = self.server.service.handle(url.path, parse_qs(url.query))
+        except Exception as e:
+            self.send_json(500, encode({"error": str(e)}))
+            return
+        # endtry #
+        if body is None:
+            self.send_json(404, encode({"error": "Not found: " + url.path}))
+        else:
+            self.send_json(200, body)
+        # endif #
+    # enddef do_GET() #
+
+    def send_json(self, a_status, a_body):
+        """ Function to send a JSON response
+        Parameters:
+            a_status (int): HTTP status code
+            a_body (bytes): Encoded JSON
+        Returns:
+            None
+        """
+        self.send_response(a_status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(a_body)))
+        self.end_headers()
+        self.wfile.write(a_body)
+    # enddef send_json() #
+
+    def log_message(self, a_format, *a_args):
+        # one line per request would slow down the server under load
+        pass
+    # enddef log_message() #
+# endclass BudgetRequestHandler #
+
+class BudgetHTTPServer(ThreadingHTTPServer):
+    """ Server handling each request in its own thread """
+    # connections beyond the default backlog of 5 would be refused and
+    # retried by clients after a second
+    request_queue_size = 64
+    daemon_threads = True
+# endclass BudgetHTTPServer #
+
+def make_server(a_service, a_host="127.0.0.1", a_port=8000):
+    """ Function to make a server handling each request in its own thread
+    Parameters:
+        a_service (BudgetService): Service computing the responses
+        a_host (str): Address to listen on
+        a_port (int): Port to listen on; any free port if 0
+    Returns:
+        server (BudgetHTTPServer): Server, see serve_forever()
+    """
+    server = BudgetHTTPServer((a_host, a_port), BudgetRequestHandler)
+    server.service = a_service
+    return server
+# enddef make_server() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("summary_file", help="Name of summary file")
+    parser.add_argument("--glob", default=None,
+            help="Glob pattern of transactions files, named after the period")
+    parser.add_argument("--initial-net-worth", type=float, default=0.0,
+            help="Net worth at the beginning of all periods")
+    parser.add_argument("--host", default="127.0.0.1",
+            help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000,
+            help="Port to listen on")
+    parser.add_argument("--max-entries", type=int, default=128,
+            help="Max. no. of responses kept in memory")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    args = parser.parse_args()
+    server = make_server(BudgetService(args.summary_file, args.glob,
+        args.initial_net_worth, None if args.no_cache else args.cache_dir,
+        args.max_entries), args.host, args.port)
+    print("Serving on http://{}:{}/".format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    # endtry #
+# endif #
@@ -0,0 +1,189 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To compare actual expenses with the budget targets of each category
+    and period
+License: GPLv3+
+"""
+
+import io
+import os
+import numpy as np
+import pandas as pd
+import tx_validate
+
+TARGETS_HEADER = "Time period\tCategory\tActual [$]\tBudget [$]\n"
+VARIANCE_COLS = ["Variance [$]", "Over budget [%]", "Cumulative overspend [$]"]
+
+def parse_budget_targets(a_raw_bytes, a_skiprows=3,
+        a_cols=['Category', 'Amount'], a_diff_col='Diff.',
+        a_currency_symbol='$', a_thousands=','):
+    """ Function to parse the budget targets of the expense categories of a
+    transactions file
+    Parameters:
+        a_raw_bytes (bytes): Contents of transactions CSV file
+        a_skiprows (int): No. of lines to skip at the start of the file
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+        a_diff_col (str): Column name of the expenses table containing the
+            budget minus the actual expenses of the category, e.g. "+$50";
+            it is repeated on every transaction of the category
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+    Returns:
+        targets (DataFrame): Actual and budgeted expenses per category
+    """
+    raw_df = pd.read_csv(io.BytesIO(a_raw_bytes), skiprows=a_skiprows,
+            usecols=list(a_cols) + [a_diff_col],
+            dtype={a_cols[1]: str, a_diff_col: str}, engine='c')
+    for col in [a_cols[1], a_diff_col]:
+        raw_df[col] = tx_validate.parse_amounts(raw_df[col],
+                a_currency_symbol, a_thousands)
+    # endfor #
+    raw_df = raw_df.dropna(subset=a_cols)
+    grouped = raw_df.groupby(a_cols[0], sort=True)
+    actual = grouped[a_cols[1]].sum()
+    targets = pd.DataFrame({'Actual [$]': actual,
+        'Budget [$]': actual + grouped[a_diff_col].first()})
+    targets.index.name = a_cols[0]
+    return targets
+# enddef parse_budget_targets() #
+
+def read_budget_targets(a_tx_file, a_skiprows=3, a_cols=['Category', 'Amount'],
+        a_diff_col='Diff.', a_currency_symbol='$', a_thousands=','):
+    """ Function to read the budget targets of a transactions file
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        See parse_budget_targets() for the other parameters
+    Returns:
+        targets (DataFrame): Actual and budgeted expenses per category
+    """
+    with open(a_tx_file, 'rb') as tf:
+        raw_bytes = tf.read()
+    # endwith #
+    return parse_budget_targets(raw_bytes, a_skiprows, a_cols, a_diff_col,
+            a_currency_symbol, a_thousands)
+# enddef read_budget_targets() #
+
+def targets_file(a_summary_file):
+    """ Function to get the name of the budget targets file of a summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        targets_file (str): Tab-separated file of targets of all periods; it
+            is not matched by globs of transactions files
+    """
+    return a_summary_file + ".budget.tsv"
+# enddef targets_file() #
+
+def append_targets(a_summary_file, a_period, a_targets, a_reset=False,
+        a_replace=True):
+    """ Function to store the budget targets of a period next to the summary
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_period (str): Time period
+        a_targets (DataFrame): Targets from parse_budget_targets()
+        a_reset (bool): Whether to start a new targets file
+        a_replace (bool): Whether to replace the targets of the period, in
+            its place, if it is already stored instead of appending them again
+    Returns:
+        None
+    """
+    t_file = targets_file(a_summary_file)
+    rows = a_targets.reset_index()
+    rows.insert(0, "Time period", a_period)
+    if a_replace and not a_reset and os.path.exists(t_file):
+        stored = read_targets(a_summary_file)
+        is_period = (stored["Time period"] == a_period).to_numpy()
+        if is_period.any():
+            # keep the period where it was, so that periods stay in order
+            first = np.flatnonzero(is_period)[0]
+            rows = pd.concat([stored.iloc[:first], rows,
+                stored.iloc[first:][~is_period[first:]]], ignore_index=True)
+            a_reset = True
+        # endif #
+    # endif #
+    if a_reset or not os.path.exists(t_file):
+        tmp_file = t_file + ".tmp"
+        with open(tmp_file, 'w') as tf:
+            tf.write(TARGETS_HEADER)
+            rows.to_csv(tf, sep='\t', header=False, index=False)
+        # endwith #
+        os.replace(tmp_file, t_file)
+    else:
+        with open(t_file, 'a') as tf:
+            rows.to_csv(tf, sep='\t', header=False, index=False)
+        # endwith #
+    # endif #
+# enddef append_targets() #
+
+def read_targets(a_summary_file):
+    """ Function to read the budget targets of all periods
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        targets (DataFrame): One row per period and category, in the order
+            they were stored
+    """
+    return pd.read_csv(targets_file(a_summary_file), sep='\t',
+            dtype={"Time period": str, "Category": str})
+# enddef read_targets() #
+
+def compute_variance(a_targets):
+    """ Function to compute the variance of every category and period at once
+    Parameters:
+        a_targets (DataFrame): One row per period and category with
+            "Time period", "Category", "Actual [$]" and "Budget [$]" columns,
+            periods in order; of rows stored again for a period and
+            category, only the last one counts
+    Returns:
+        variance (DataFrame): a_targets with the actual minus the budget,
+            the % over (> 0) or under (< 0) budget, NaN without a budget, and
+            the overspend of the category summed over periods so far
+    """
+    # a period stored again replaces its earlier rows, in the place where
+    # the period first appeared; otherwise the scatter below would keep one
+    # of the duplicates and the totals of variance_by_period() all of them
+    keys = ["Time period", "Category"]
+    first_ids = pd.factorize(a_targets["Time period"])[0]
+    latest = ~a_targets.duplicated(keys, keep="last").to_numpy()
+    a_targets = a_targets[latest].iloc[np.argsort(first_ids[latest],
+        kind="stable")]
+    # dense period x category grid over a shared category index, filled by
+    # one scatter instead of a join per category
+    period_ids, periods = pd.factorize(a_targets["Time period"])
+    category_ids, categories = pd.factorize(a_targets["Category"])
+    variance = np.zeros((len(periods), len(categories)))
+    variance[period_ids, category_ids] = (a_targets["Actual [$]"].to_numpy() -
+            a_targets["Budget [$]"].to_numpy())
+    overspend = np.cumsum(np.clip(variance, 0.0, None), axis=0)
+    budget = a_targets["Budget [$]"].to_numpy()
+    result = a_targets.reset_index(drop=True)
+    result["Variance [$]"] = variance[period_ids, category_ids]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result["Over budget [%]"] = np.where(budget != 0.0,
+                100.0 * result["Variance [$]"].to_numpy() / np.abs(budget),
+                np.nan)
+    # endwith #
+    result["Cumulative overspend [$]"] = overspend[period_ids, category_ids]
+    return result
+# enddef compute_variance() #
+
+def variance_by_period(a_variance):
+    """ Function to total the variance of all categories of each period
+    Parameters:
+        a_variance (DataFrame): Variance from compute_variance()
+    Returns:
+        totals (DataFrame): Actual, budget, variance and cumulative overspend
+            over all categories, per period in order
+    """
+    totals = a_variance.groupby("Time period", sort=False)[["Actual [$]",
+        "Budget [$]", "Variance [$]"]].sum()
+    totals["Cumulative overspend [$]"] = a_variance["Variance [$]"].clip(
+            lower=0.0).groupby(a_variance["Time period"], sort=False).sum(
+                    ).cumsum()
+    return totals.reset_index()
+# enddef variance_by_period() #
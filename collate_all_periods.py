@@ -5,176 +5,65 @@ Purpose: To tally monthly budget sheet
 License: GPLv3+
 """
 
-import os
-import sys
-import warnings
 import argparse
-import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from matplotlib import pyplot as plt
+import profiling
+import summary_store
+import report_render
+import tx_cache
+import budget_variance
+import async_pipeline
+from budget_analysis import (read_tx_file, compact_tx, categorize_tx,
+        write_reports, plot_period, positive_int)
 
-def read_tx_file(a_tx_file, a_skiprows=3, a_skipfooter=0,
-        a_cols=['Category', 'Amount'], a_currency_symbols='[\$,]'):
-    """ Function to read in transactions file (in CSV format)
+def read_tx_files(a_tx_files, a_jobs=1, a_cache_dir=None, a_compact=False,
+        a_categories=None, a_pipeline=False):
+    """ Function to read in and combine several transactions files
     Parameters:
-        a_tx_file (str): Name of transactions CSV file
-        a_skiprows (int): No. of lines to skip at the start of the file
-        a_skipfooter (int): No. of lines to skip at the bottom
-        a_cols (list of strings): Column names containing relevant
-            transaction information in the order (Category, Amount)
-        a_currency_symbols (str): regex to replace in strings when dealing with
-            amounts listed in a specific currency specification.
+        a_tx_files (list of strings): Names of transactions CSV files
+        a_jobs (int): No. of worker processes used to parse the files; files
+            are parsed serially if a_jobs <= 1
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_compact (bool): Whether to return compact tables (see compact_tx)
+            sharing a single category dictionary
+        a_categories (list of strings): Category dictionary of the compact
+            tables, extended in place; a new one is started if None
+        a_pipeline (bool): Whether to overlap reading the files with parsing
+            them, see async_pipeline.collate_tables()
     Returns:
-        income (DataFrame): Dataframe containing only income information
-        expenses (DataFrame): Dataframe containing only expense information
-        savings (DataFrame): Dataframe containing only savings information
+        income (DataFrame): Dataframe containing income from all files
+        expenses (DataFrame): Dataframe containing expenses from all files
+        savings (DataFrame): Dataframe containing savings from all files
     """
-    # Read in transactions file
-    raw_df = pd.read_csv(a_tx_file, skiprows=a_skiprows,
-            skipfooter=a_skipfooter)
-    # read expenses
-    expenses = raw_df[a_cols]
-    # drop extraneous rows, if required
-    expenses = expenses.dropna()
-    # read income
-    # duplicate column names are appended with ".1"
-    dup_cols = [c + ".1" for c in a_cols]
-    income = raw_df[dup_cols]
-    # rename the columns
-    income.columns = a_cols
-    # drop extraneous rows, if required
-    income = income.dropna()
-    # read savings
-    # duplicate column names are appended with ".2"
-    dup_cols = [c + ".2" for c in a_cols]
-    savings = raw_df[dup_cols].copy()
-    # rename the columns
-    savings.columns = a_cols
-    # drop extraneous rows, if required
-    savings = savings.dropna()
-    # replace currency format into float
-    expenses[a_cols[1]] = pd.to_numeric(
-            expenses[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    income = income.dropna()
-    income[a_cols[1]] = pd.to_numeric(
-            income[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    savings[a_cols[1]] = pd.to_numeric(
-            savings[a_cols[1]].replace(a_currency_symbols, '',regex=True))
-    # rename columns to include unit
-    expenses = expenses.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    income = income.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    savings = savings.rename(columns={a_cols[1]: a_cols[1]+" [$]"})
-    return income, expenses, savings
-# enddef read_tx_file() #
-
-def categorize_tx(a_tx, a_cols=['Category', 'Amount [$]']):
-    """ Function to categorize transactions in income or expenses
-    Parameters:
-        a_tx (DataFrame): Dataframe containing transactions
-        a_cols (list of strings): Column names containing relevant
-            transaction information in the order (Category, Amount)
-    Returns:
-        grouped_tx (DataFrame): Total of transactions per category
-    """
-    # group transactions and add them
-    grouped_tx =  a_tx.groupby(a_cols[0]).aggregate(np.sum)
-    grouped_tx['Contribution [%]'] = 100 * grouped_tx[a_cols[1]]/np.abs(np.sum(
-            a_tx[a_cols[1]]))
-    return grouped_tx
-# enddef categorize_tx() #
-
-def write_reports(a_report_file, a_period, a_grp_inc, a_grp_exp, a_grp_sav,
-        a_summary_file, a_amt_colname='Amount [$]'):
-    """ Function to create summary reports.
-    Parameters:
-        a_report_file (str): Filename of where to store reports for
-        a_period (str): Time period for which transactions are processed
-        a_grp_inc (Dataframe): Dataframe containing grouped income information
-        a_grp_exp (Dataframe): Dataframe containing grouped expense information
-        a_grp_sav (Dataframe): Dataframe containing grouped savings information
-        a_summary_file (str): Filename where summaries of previous runs
-            are stored
-        a_amt_colname (str): Column name containing raw amount values
-    Returns:
-        None
-    """
-    # compute total income, expenses, savings
-    tot_inc = np.sum(a_grp_inc[a_amt_colname])
-    tot_exp = np.sum(a_grp_exp[a_amt_colname])
-    tot_sav = np.sum(a_grp_sav[a_amt_colname])
-    # compute net savings (i.e., excess of income over expenses),
-    # net-savings-% (% of income)
-    net_sav = tot_inc - tot_exp
-    # unutilized savings
-    xtra_sav = net_sav - tot_sav
-    # %-savings
-    if tot_inc < 0:
-        warning_msg = "Total income for {:s} is negative (-${:.2f})!"
-        warning_msg = warning_msg.format(a_period, -tot_inc)
-        warnings.warn(warning_msg)
-        sav_pct = -np.inf
+    if a_cache_dir is None:
+        reader = read_tx_file
     else:
-        sav_pct = 100.0 * net_sav / tot_inc
+        reader = partial(tx_cache.read_tx_file_cached, a_cache_dir=a_cache_dir)
     # endif #
-    # net savings utilization ratio (total savings : net savings)
-    if net_sav < 0:
-        warning_msg = "Net savings for {:s} is negative (-${:.2f})!"
-        warning_msg = warning_msg.format(a_period, -net_sav)
-        warnings.warn(warning_msg)
-        sav_util = -np.inf
+    if a_pipeline:
+        tables = async_pipeline.read_tables(a_tx_files, a_jobs,
+                a_cache_dir=a_cache_dir)
+    elif a_jobs > 1 and len(a_tx_files) > 1:
+        with ProcessPoolExecutor(max_workers=a_jobs) as executor:
+            # map() yields results in the order of a_tx_files, irrespective
+            # of the order in which the workers finish
+            tables = list(executor.map(reader, a_tx_files))
+        # endwith #
     else:
-        sav_util = 100.0 * tot_sav / net_sav
+        tables = [reader(tx_file) for tx_file in a_tx_files]
     # endif #
-    # compute and plot grouped expenses and income
-    with open(a_report_file,'w') as rf:
-        rf.write("Budget Report for {}\n".format(a_period))
-        rf.write("Total income = $ {:.2f}\n".format(tot_inc))
-        rf.write("Total expenses = $ {:.2f}\n".format(tot_exp))
-        rf.write("Net savings = $ {:.2f}\n".format(net_sav))
-        rf.write("Utilized savings = $ {:.2f}\n".format(tot_sav))
-        rf.write("Unutilized savings = $ {:.2f}\n".format(xtra_sav))
-        rf.write("Net savings as a % of income = {:.2f}%\n".format(sav_pct))
-        rf.write("Net savings utilization ratio = {:.2f}%\n".format(sav_util))
-        rf.write("\nCategory-wise income:\n")
-        rf.write(a_grp_inc.to_string())
-        rf.write("\n\nCategory-wise expenses:\n")
-        rf.write(a_grp_exp.to_string())
-        rf.write("\n\nCategory-wise savings:\n")
-        rf.write(a_grp_sav.to_string())
-    # endwith #
-    with  open(a_summary_file,'w') as sf:
-        sf.write("Time period,Income [$],Expenses [$],"+
-                    "Utilized savings [$],"+
-                    "Unutilzed savings [$],pct-savings [%]," +
-                    "Savings utilization ratio [%]\n")
-        sf.write("{},{:.2f},{:.2f},{:.2f},{:.2f},{:.2f},{:.2f}\n".format(
-            a_period, tot_inc, tot_exp, tot_sav, xtra_sav, sav_pct, sav_util))
-    # endwith #
-# enddef write_reports() #
-
-def plot_tallied_tx(a_grouped_tx, a_title, a_plotfile, a_col='Contribution [%]'):
-    """
-    Function to plot tallied transactions
-    Paramaters:
-        a_grouped_tx(DataFrame): Total of transactions per category
-        a_plotfile (str): Filename to save pie plot in
-        a_title (str): Title of pie plot
-        a_col (str): Column name containing contribution of each category
-    Returns:
-        None
-    """
-    plt.close('all')
-    fig, ax = plt.subplots()
-    ax.bar(np.arange(a_grouped_tx.shape[0]), a_grouped_tx[a_col],
-            tick_label=a_grouped_tx.index.values)
-    ax.set_title(a_title)
-    ax.minorticks_on()
-    ax.grid(b=True, which='both', axis='both')
-    plt.xticks(rotation=90)
-    ax.set_ylabel('%')
-    plt.tight_layout()
-    plt.savefig(a_plotfile)
-# enddef plot_tallied_tx() #
+    # combine each kind of table with a single concatenation
+    income, expenses, savings = [pd.concat(t) for t in zip(*tables)]
+    if a_compact:
+        categories = [] if a_categories is None else a_categories
+        income, expenses, savings = [compact_tx(t, categories)
+                for t in (income, expenses, savings)]
+    # endif #
+    return income, expenses, savings
+# enddef read_tx_files() #
 
 def main(a_args):
     """ Main function.
@@ -183,33 +72,69 @@ def main(a_args):
         a_args.report_file (str): Filename of where to store reports for
         a_args.summary_file (str): Filename where summaries of previous runs
             are stored
-        a_args.tx_files (str): Name of transactions CSV file
+        a_args.tx_files (list of strings): Names of transactions CSV files
+        a_args.jobs (int): No. of worker processes used to parse tx_files
+            and render plots
+        a_args.cache_dir (str): Directory of the parsed-transaction cache
+        a_args.no_cache (bool): Whether to bypass the cache
+        a_args.no_plots (bool): Whether to skip plotting
+        a_args.compact (bool): Whether to use categorical categories and
+            integer cents amounts
+        a_args.pipeline (bool): Whether to overlap reading tx_files with
+            parsing them
+        a_args.profile (str): If given, time and memory of each stage are
+            written to this JSON file (see profiling.py)
+        a_args.formats (list of strings): Formats of the report, out of
+            report_render.FORMATS
+        a_args.depth (int): If given, categories in the report and plots are
+            rolled up to this depth of the "A:B:C" category hierarchy
+        a_args.budget (bool): Whether to report the variance of expenses from
+            the budget targets of all tx_files combined
     Returns:
         None
     """
-    inc = pd.DataFrame()
-    exp = pd.DataFrame()
-    sav = pd.DataFrame()
-    for tx_file in a_args.tx_files:
-        # read the transaction file
-        i, e, s = read_tx_file(tx_file)
-        inc = inc.append(i)
-        exp = exp.append(e)
-        sav = sav.append(s)
-    # endfor #
-    # categorize expenses and income
-    grp_inc = categorize_tx(inc)
-    grp_exp = categorize_tx(exp)
-    grp_sav = categorize_tx(sav)
-    # compute total expenses, income, savings, %-savings, and write reports
-    write_reports(a_args.report_file, a_args.period, grp_inc, grp_exp, grp_sav,
-            a_args.summary_file)
-    # plot category breakdown for this period and overall summary
-    plot_tallied_tx(grp_inc, "Income", "Plot_Income_" + a_args.period + ".png")
-    plot_tallied_tx(grp_exp, "Expenses",
-            "Plot_Expenses_" + a_args.period + ".png")
-    plot_tallied_tx(grp_sav,
-            "Savings", "Plot_Savings_" + a_args.period + ".png")
+    with profiling.profile(getattr(a_args, "profile", None)):
+        # read the transaction files
+        cache_dir = None if a_args.no_cache else a_args.cache_dir
+        with profiling.stage("read_tx_file"):
+            # the category dictionary is shared with earlier runs
+            categories = summary_store.read_categories(a_args.summary_file) \
+                    if a_args.compact else None
+            inc, exp, sav = read_tx_files(a_args.tx_files, a_args.jobs,
+                    cache_dir, a_args.compact, categories,
+                    getattr(a_args, "pipeline", False))
+        # endwith #
+        # categorize expenses and income
+        with profiling.stage("categorize_tx"):
+            grp_inc = categorize_tx(inc)
+            grp_exp = categorize_tx(exp)
+            grp_sav = categorize_tx(sav)
+        # endwith #
+        targets = None
+        if getattr(a_args, "budget", False):
+            # budgets of the files add up like their expenses
+            with profiling.stage("read_budget_targets"):
+                targets = pd.concat([budget_variance.read_budget_targets(f)
+                    for f in a_args.tx_files]).groupby(level=0).sum()
+            # endwith #
+        # endif #
+        # compute total expenses, income, savings, %-savings, and write reports
+        with profiling.stage("write_reports"):
+            write_reports(a_args.report_file, a_args.period, grp_inc, grp_exp,
+                    grp_sav, a_args.summary_file, a_reset_summary=True,
+                    a_formats=getattr(a_args, "formats", ("text",)),
+                    a_depth=getattr(a_args, "depth", None), a_targets=targets)
+        # endwith #
+        if a_args.compact:
+            summary_store.save_categories(a_args.summary_file, categories)
+        # endif #
+        if a_args.no_plots:
+            return
+        # endif #
+        # plot category breakdown for this period and overall summary
+        plot_period(a_args.period, grp_inc, grp_exp, grp_sav, a_args.jobs,
+                a_depth=getattr(a_args, "depth", None))
+    # endwith #
 # enddef main() #
 
 if __name__ == "__main__":
@@ -222,6 +147,37 @@ if __name__ == "__main__":
             default="TestPeriod_summary.csv")
     parser.add_argument("tx_files", nargs='+',
             help="Names of transaction files")
+    parser.add_argument("--jobs", type=int, default=1,
+            help="No. of worker processes used to parse transaction files " +
+            "and render plots")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    parser.add_argument("--clear-cache", action='store_true',
+            help="Remove all entries from the cache before running")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write the report and summary, without plots")
+    parser.add_argument("--compact", action='store_true',
+            help="Use categorical categories and integer-cent amounts")
+    parser.add_argument("--pipeline", action='store_true',
+            help="Overlap reading transaction files with parsing them")
+    parser.add_argument("--profile", default=None,
+            help="JSON file to write per-stage time and memory to")
+    parser.add_argument("--formats", nargs='+', default=["text"],
+            choices=report_render.FORMATS,
+            help="Formats of the report; formats other than text are " +
+            "written next to the report file")
+    parser.add_argument("--depth", type=positive_int, default=None,
+            help="Roll \"A:B:C\" categories up to this depth in the report " +
+            "and plots")
+    parser.add_argument("--budget", action='store_true',
+            help="Report the variance of expenses from the budget targets " +
+            "in the \"Diff.\" column")
     args = parser.parse_args()
+    if args.clear_cache:
+        tx_cache.clear_cache(args.cache_dir)
+    # endif #
     main(args)
 # endif #
@@ -5,35 +5,47 @@ Purpose: To summarize year-to-date budget from tallied monthly budget sheets
 License: GPLv3+
 """
 
-import sys
+import os
 import warnings
+import argparse
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+import profiling
+import summary_store
+import budget_variance
+import plot_render
+import report_render
 
-def summarize_all_periods(a_initial_net_worth, a_summary_file,
-        a_inc_colname="Income [$]", a_exp_colname="Expenses [$]",
-        a_sav_colname="Utilized savings [$]"):
-    """ Summarize YTD results from monthly summary file
+# no. of periods of the trailing windows of rolling_analytics()
+ROLLING_WINDOWS = (3, 12)
+# no. of periods in a year, for year-over-year changes
+YEAR_PERIODS = 12
+# percentiles of projected net worth, see project_net_worth(); the outer and
+# inner pairs are drawn as bands around the median
+PROJECTION_PERCENTILES = (5, 25, 50, 75, 95)
+
+def summarize_ytd(a_initial_net_worth, a_summary_file, a_save_totals=True):
+    """ Summarize YTD totals from the running totals of the summary file,
+    without rescanning the individual periods
     Parameters:
         a_initial_net_worth (float): Net worth at beginning of year
         a_summary_file (str): Filename containing period summary for
             different periods
-        a_inc_colname (str): Column name of income column
-        a_exp_colname (str): Column name of expenses column
-        a_sav_colname (str): Column name of savings column
+        a_save_totals (bool): Whether to store the running totals if they
+            had to be recomputed
     Returns:
-        summary_df (DataFrame): DataFrame of summary file with "Net worth [$]"
-            column appended
+        ytd (dict): Total income, expenses, utilized and unutilized savings,
+            %-savings, savings utilization ratio and final net worth
     """
-    # read summary file
-    summary_df = pd.read_csv(a_summary_file)
-    # compute total income, expenses and savings for all periods
-    total_income = summary_df[a_inc_colname].sum()
-    total_expenses = summary_df[a_exp_colname].sum()
-    total_savings = summary_df[a_sav_colname].sum()
-    net_savings = total_income - total_expenses
-    extra_savings = net_savings - total_savings
+    totals = summary_store.read_totals(a_summary_file, a_save_totals)
+    # numpy floats, so that zero income or net savings give inf or NaN ratios
+    # instead of raising ZeroDivisionError
+    total_income = np.float64(totals["income"]) / 100.0
+    total_expenses = np.float64(totals["expenses"]) / 100.0
+    total_savings = np.float64(totals["savings"]) / 100.0
+    net_savings = np.float64(totals["income"] - totals["expenses"]) / 100.0
+    extra_savings = np.float64(totals["income"] - totals["expenses"] -
+            totals["savings"]) / 100.0
     # if total income < 0, %-savings is undefined
     if total_income < 0:
         warning_msg = "Total income is negative (-${:.2f})!"
@@ -41,7 +53,9 @@ def summarize_all_periods(a_initial_net_worth, a_summary_file,
         warnings.warn(warning_msg)
         net_sav_pct = -np.inf
     else:
-        net_sav_pct = 100.0 * net_savings / total_income
+        with np.errstate(divide='ignore', invalid='ignore'):
+            net_sav_pct = 100.0 * net_savings / total_income
+        # endwith #
     # endif #
     # net savings utilization ratio
     if net_savings < 0:
@@ -50,84 +64,353 @@ def summarize_all_periods(a_initial_net_worth, a_summary_file,
         warnings.warn(warning_msg)
         sav_util = -np.inf
     else:
-        sav_util = 100.0 * total_savings / net_savings
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sav_util = 100.0 * total_savings / net_savings
+        # endwith #
+    # endif #
+    ytd = {"Income [$]": total_income, "Expenses [$]": total_expenses,
+            "Utilized savings [$]": total_savings,
+            "Unutilzed savings [$]": extra_savings,
+            "pct-savings [%]": net_sav_pct,
+            "Savings utilization ratio [%]": sav_util,
+            "Net worth [$]": a_initial_net_worth + net_savings}
+    return ytd
+# enddef summarize_ytd() #
+
+def rolling_analytics(a_summary_df, a_peak=-np.inf, a_max_drawdown=0.0,
+        a_windows=ROLLING_WINDOWS, a_year_periods=YEAR_PERIODS,
+        a_inc_colname="Income [$]", a_exp_colname="Expenses [$]",
+        a_networth_colname="Net worth [$]"):
+    """ Compute trailing averages, period-over-period changes and drawdown
+    of net worth in one vectorized pass
+    Parameters:
+        a_summary_df (DataFrame): Summary of consecutive periods, including
+            net worth
+        a_peak (float): Highest net worth before the first period
+        a_max_drawdown (float): Largest drop from a peak before the first
+            period (<= 0)
+        a_windows (tuple(int)): No. of periods of the trailing windows
+        a_year_periods (int): No. of periods in a year
+        a_inc_colname (str): Column name of income column
+        a_exp_colname (str): Column name of expenses column
+        a_networth_colname (str): Column name of net worth column
+    Returns:
+        analytics_df (DataFrame): Analytics of each period; trailing values
+            are NaN until a window is full
+    """
+    inc = a_summary_df[a_inc_colname]
+    exp = a_summary_df[a_exp_colname]
+    networth = a_summary_df[a_networth_colname]
+    analytics = {}
+    for window in a_windows:
+        inc_sum = inc.rolling(window).sum()
+        exp_sum = exp.rolling(window).sum()
+        analytics["Income {}-period avg [$]".format(window)] = inc_sum / window
+        analytics["Expenses {}-period avg [$]".format(window)] = (exp_sum /
+                window)
+        # like %-savings of a single period, undefined for negative income
+        with np.errstate(divide='ignore', invalid='ignore'):
+            analytics["pct-savings {}-period [%]".format(window)] = np.where(
+                inc_sum < 0, -np.inf, 100.0 * (inc_sum - exp_sum) / inc_sum)
+        # endwith #
+    # endfor #
+    for colname, col in [(a_inc_colname, inc), (a_exp_colname, exp),
+            (a_networth_colname, networth)]:
+        name = colname.replace(" [$]", "")
+        analytics[name + " PoP change [$]"] = col.diff()
+        analytics[name + " YoY change [$]"] = col.diff(a_year_periods)
+    # endfor #
+    # drop of net worth from its highest value so far
+    peak = np.maximum(networth.cummax(), a_peak)
+    analytics["Drawdown [$]"] = networth - peak
+    analytics["Max drawdown [$]"] = np.minimum(
+            analytics["Drawdown [$]"].cummin(), a_max_drawdown)
+    return pd.DataFrame(analytics, index=a_summary_df.index)
+# enddef rolling_analytics() #
+
+def append_summary_period(a_summary_df, a_period_row,
+        a_windows=ROLLING_WINDOWS, a_year_periods=YEAR_PERIODS,
+        a_inc_colname="Income [$]", a_exp_colname="Expenses [$]",
+        a_networth_colname="Net worth [$]"):
+    """ Append one new period to a summary with rolling analytics, computing
+    only the analytics of the new period
+    Parameters:
+        a_summary_df (DataFrame): Summary returned by
+            summarize_all_periods(..., a_rolling=True)
+        a_period_row (dict): Summary file columns of the new period
+        a_windows (tuple(int)): No. of periods of the trailing windows
+        a_year_periods (int): No. of periods in a year
+        a_inc_colname (str): Column name of income column
+        a_exp_colname (str): Column name of expenses column
+        a_networth_colname (str): Column name of net worth column
+    Returns:
+        summary_df (DataFrame): a_summary_df with the new period appended
+    """
+    last = a_summary_df.iloc[-1]
+    new_df = pd.DataFrame([a_period_row])
+    new_df[a_networth_colname] = (last[a_networth_colname] +
+            new_df[a_inc_colname] - new_df[a_exp_colname])
+    # only the longest window of earlier periods affects the new period
+    n_tail = max(max(a_windows), a_year_periods)
+    tail_df = pd.concat([a_summary_df.iloc[-n_tail:][new_df.columns], new_df],
+            ignore_index=True)
+    peak = last[a_networth_colname] - last["Drawdown [$]"]
+    analytics_df = rolling_analytics(tail_df, peak, last["Max drawdown [$]"],
+            a_windows, a_year_periods, a_inc_colname, a_exp_colname,
+            a_networth_colname)
+    new_df = pd.concat([new_df, analytics_df.iloc[[-1]].reset_index(
+        drop=True)], axis=1)
+    return pd.concat([a_summary_df, new_df], ignore_index=True)
+# enddef append_summary_period() #
+
+def summarize_all_periods(a_initial_net_worth, a_summary_file,
+        a_inc_colname="Income [$]", a_exp_colname="Expenses [$]",
+        a_compact=False, a_rolling=False):
+    """ Summarize YTD results from monthly summary file
+    Parameters:
+        a_initial_net_worth (float): Net worth at beginning of year
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_inc_colname (str): Column name of income column
+        a_exp_colname (str): Column name of expenses column
+        a_compact (bool): Whether to accumulate net worth exactly in integer
+            cents
+        a_rolling (bool): Whether to append the columns of
+            rolling_analytics()
+    Returns:
+        summary_df (DataFrame): DataFrame of summary file with "Net worth [$]"
+            column appended
+    """
+    # read summary file; the file is left untouched, so repeated runs give
+    # the same result
+    summary_df = summary_store.read_periods(a_summary_file)
+    if a_compact:
+        # amounts in the summary file have 2 decimals, so the cumulative
+        # sums are exact in cents
+        net_cents = (np.rint(100.0 * summary_df[a_inc_colname]) -
+                np.rint(100.0 * summary_df[a_exp_colname])).astype(np.int64)
+        summary_df["Net worth [$]"] = (summary_store.to_cents(
+            a_initial_net_worth) + net_cents.cumsum()) / 100.0
+    else:
+        # compute every month's net worth
+        summary_df["Net worth [$]"] = (a_initial_net_worth +
+                summary_df[a_inc_colname].cumsum() -
+                summary_df[a_exp_colname].cumsum())
+    # endif #
+    if a_rolling:
+        summary_df = pd.concat([summary_df, rolling_analytics(summary_df,
+            a_initial_net_worth, a_inc_colname=a_inc_colname,
+            a_exp_colname=a_exp_colname)], axis=1)
     # endif #
-    with open(a_summary_file,'a') as sf:
-        sf.write("\nTotal,{:.2f},{:.2f},{:.2f},{:.2f},{:.2f},{:.2f}\n".format(
-            total_income, total_expenses, total_savings, extra_savings,
-            net_sav_pct, sav_util))
-    # endwith #
-    # compute every month's net worth
-    summary_df["Net worth [$]"] = (a_initial_net_worth +
-            summary_df[a_inc_colname].cumsum() -
-            summary_df[a_exp_colname].cumsum())
     return summary_df
 # enddef summarize_all_periods() #
 
-def plot_summary_same_axes(a_summary_df, a_summary_plot, a_period_colname,
+def project_net_worth(a_summary_df, a_n_periods=12, a_n_paths=100000,
+        a_block_size=10000, a_method="normal", a_seed=None,
+        a_percentiles=PROJECTION_PERCENTILES, a_inc_colname="Income [$]",
+        a_exp_colname="Expenses [$]", a_networth_colname="Net worth [$]"):
+    """ Project net worth by simulating income and expenses of future periods
+    Parameters:
+        a_summary_df (DataFrame): DataFrame containing summary file + net worth
+        a_n_periods (int): No. of future periods to project
+        a_n_paths (int): No. of simulated paths; the net worth of all paths
+            is held in memory, as exact percentiles need all of them
+        a_block_size (int): No. of paths simulated at a time; this only bounds
+            the memory of the income and expense draws
+        a_method (str): "normal" to draw income and expenses from a normal
+            distribution with the mean and covariance of past periods, or
+            "bootstrap" to draw past periods with replacement
+        a_seed (int): Seed of the random number generator
+        a_percentiles (tuple(float)): Percentiles of net worth to return
+        a_inc_colname (str): Column name of income column
+        a_exp_colname (str): Column name of expenses column
+        a_networth_colname (str): Column name of net worth column
+    Returns:
+        projection_df (DataFrame): "Time period" ("+1", "+2", ...) and one
+            "Net worth p<percentile> [$]" column per percentile
+    """
+    history = a_summary_df[[a_inc_colname, a_exp_colname]].to_numpy(
+            dtype=np.float64)
+    if len(history) == 0:
+        raise ValueError("No periods to project net worth from")
+    # endif #
+    for name, value in [("paths", a_n_paths),
+            ("paths per block", a_block_size)]:
+        if value < 1:
+            raise ValueError("No. of {} must be >= 1, not {}".format(name,
+                value))
+        # endif #
+    # endfor #
+    if a_method not in ("normal", "bootstrap"):
+        raise ValueError("Unknown projection method: {}".format(a_method))
+    # endif #
+    rng = np.random.default_rng(a_seed)
+    mean = history.mean(axis=0)
+    cov = np.cov(history.T) if len(history) > 1 else np.zeros((2, 2))
+    # net worth after each future period of every path
+    paths = np.empty((a_n_paths, a_n_periods))
+    for start in range(0, a_n_paths, a_block_size):
+        block = paths[start:start + a_block_size]
+        if a_method == "normal":
+            draws = rng.multivariate_normal(mean, cov, size=block.shape)
+        else:
+            draws = history[rng.integers(len(history), size=block.shape)]
+        # endif #
+        np.cumsum(draws[..., 0] - draws[..., 1], axis=1, out=block)
+    # endfor #
+    paths += a_summary_df[a_networth_colname].iloc[-1]
+    # paths are partitioned in place instead of being copied
+    bands = np.percentile(paths, a_percentiles, axis=0, overwrite_input=True)
+    projection_df = pd.DataFrame({"Time period": ["+{}".format(k + 1)
+        for k in range(a_n_periods)]})
+    for percentile, band in zip(a_percentiles, bands):
+        projection_df["Net worth p{:g} [$]".format(percentile)] = band
+    # endfor #
+    return projection_df
+# enddef project_net_worth() #
+
+def draw_summary_same_axes(a_fig, a_summary_df, a_period_colname,
         a_plot_cols):
     """
-    Function to plot overall summary as lineplot with same axes
+    Function to draw overall summary as lineplot with same axes on a figure
     Parameters:
+        a_fig (Figure): Figure to draw on
         a_summary_df (DataFrame): DataFrame containing summary file + net worth
-        a_summary_plot (str): Filename where trendline summaries are to be
-            plotted
         a_period_colname (str): Column name containing name of period
         a_plot_cols (list(str)) : List of strings of column names containing
             quantities to be plotted
     Returns:
         None
     """
-    plt.close('all')
-    fig, ax = plt.subplots()
+    ax = a_fig.subplots()
     ax.plot(a_summary_df[a_period_colname],a_summary_df[a_plot_cols])
     ax.set_ylabel('$')
     ax.legend(a_plot_cols)
     ax.minorticks_on()
-    ax.grid(b=True, which='both', axis='both')
-    plt.xticks(rotation=90)
-    plt.tight_layout()
-    plt.savefig(a_summary_plot)
-# enddef plot_summary_same_axes() #
+    ax.grid(visible=True, which='both', axis='both')
+    ax.tick_params(axis='x', labelrotation=90)
+    a_fig.tight_layout()
+# enddef draw_summary_same_axes() #
 
-def plot_summary_diff_axes(a_summary_df, a_summary_plot, a_period_colname,
-        a_plot_cols):
+def draw_summary_diff_axes(a_fig, a_summary_df, a_period_colname,
+        a_plot_cols, a_projection_df=None):
     """
-    Function to plot overall summary as lineplot with different axes
+    Function to draw overall summary as lineplot with different axes on a
+    figure
     Parameters:
+        a_fig (Figure): Figure to draw on
         a_summary_df (DataFrame): DataFrame containing summary file + net worth
-        a_summary_plot (str): Filename where trendline summaries are to be
-            plotted
         a_period_colname (str): Column name containing name of period
         a_plot_cols (tuple(str)) : 2-tuple of strings of column names containing
             net-worth and %-savings in that order
+        a_projection_df (DataFrame): If given, percentiles of projected net
+            worth from project_net_worth() to draw after the last period
     Returns:
         None
     """
-    plt.close('all')
-    fig, ax1 = plt.subplots()
-    ax1.plot(a_summary_df[a_period_colname],a_summary_df[a_plot_cols[0]],
-            color='r')
+    ax1 = a_fig.subplots()
+    lines = ax1.plot(a_summary_df[a_period_colname],
+            a_summary_df[a_plot_cols[0]], color='r')
     ax1.set_ylabel('$')
-    ax1.legend([a_plot_cols[0]], loc='upper left')
+    legend = [a_plot_cols[0]]
+    if a_projection_df is not None:
+        # bands start at the last known net worth
+        periods = [a_summary_df[a_period_colname].iloc[-1]] + \
+                list(a_projection_df[a_period_colname])
+        bands = [np.r_[a_summary_df[a_plot_cols[0]].iloc[-1],
+            a_projection_df[c]] for c in a_projection_df.columns[1:]]
+        for k in range(len(bands) // 2):
+            ax1.fill_between(periods, bands[k], bands[-1 - k], color='r',
+                    alpha=0.15, linewidth=0)
+        # endfor #
+        lines += ax1.plot(periods, bands[len(bands) // 2], color='r',
+                linestyle='--')
+        legend.append("Projected " + a_projection_df.columns[
+            1 + len(bands) // 2])
+    # endif #
+    ax1.legend(lines, legend, loc='upper left')
     ax1.minorticks_on()
-    ax1.grid(b=True, which='both', axis='both', color='r', linestyle='-',
-            linewidth=0.2)
+    ax1.grid(visible=True, which='both', axis='both', color='r',
+            linestyle='-', linewidth=0.2)
+    ax1.tick_params(axis='x', labelrotation=90)
     ax2 = ax1.twinx()
     ax2.plot(a_summary_df[a_period_colname], a_summary_df[a_plot_cols[1]],
             color='b')
     ax2.set_ylabel('%')
     ax2.legend([a_plot_cols[1]], loc='lower right')
     ax2.minorticks_on()
-    ax2.grid(b=True, which='both', axis='both', color='b', linestyle='--',
-            linewidth=0.3)
-    plt.xticks(rotation=90)
-    plt.tight_layout()
-    plt.savefig(a_summary_plot)
+    ax2.grid(visible=True, which='both', axis='both', color='b',
+            linestyle='--', linewidth=0.3)
+    a_fig.tight_layout()
+# enddef draw_summary_diff_axes() #
+
+def summary_plot_job(a_draw_func, a_summary_df, a_summary_plot,
+        a_period_colname, a_plot_cols, a_projection_df=None):
+    """
+    Function to bundle a summary plot for plot_render.render_plots()
+    Parameters:
+        a_draw_func (function): Function drawing the plot on a figure
+        a_summary_df (DataFrame): DataFrame containing summary file + net worth
+        a_summary_plot (str): Filename where trendline summaries are to be
+            plotted
+        a_period_colname (str): Column name containing name of period
+        a_plot_cols (list(str)) : Column names of quantities to be plotted
+        a_projection_df (DataFrame): If given, projection passed on to
+            draw_summary_diff_axes()
+    Returns:
+        job (tuple): (draw function, plot file, arguments)
+    """
+    # only the plotted columns decide whether the plot has to be redrawn
+    plot_df = a_summary_df[[a_period_colname] + list(a_plot_cols)]
+    args = (plot_df, a_period_colname, a_plot_cols)
+    if a_projection_df is not None:
+        args += (a_projection_df,)
+    # endif #
+    return (a_draw_func, a_summary_plot, args)
+# enddef summary_plot_job() #
+
+def plot_summary_same_axes(a_summary_df, a_summary_plot, a_period_colname,
+        a_plot_cols):
+    """
+    Function to plot overall summary as lineplot with same axes
+    Parameters:
+        a_summary_df (DataFrame): DataFrame containing summary file + net worth
+        a_summary_plot (str): Filename where trendline summaries are to be
+            plotted
+        a_period_colname (str): Column name containing name of period
+        a_plot_cols (list(str)) : List of strings of column names containing
+            quantities to be plotted
+    Returns:
+        None
+    """
+    plot_render.render_plots([summary_plot_job(draw_summary_same_axes,
+        a_summary_df, a_summary_plot, a_period_colname, a_plot_cols)])
+# enddef plot_summary_same_axes() #
+
+def plot_summary_diff_axes(a_summary_df, a_summary_plot, a_period_colname,
+        a_plot_cols, a_projection_df=None):
+    """
+    Function to plot overall summary as lineplot with different axes
+    Parameters:
+        a_summary_df (DataFrame): DataFrame containing summary file + net worth
+        a_summary_plot (str): Filename where trendline summaries are to be
+            plotted
+        a_period_colname (str): Column name containing name of period
+        a_plot_cols (tuple(str)) : 2-tuple of strings of column names containing
+            net-worth and %-savings in that order
+        a_projection_df (DataFrame): If given, percentiles of projected net
+            worth from project_net_worth() to draw after the last period
+    Returns:
+        None
+    """
+    plot_render.render_plots([summary_plot_job(draw_summary_diff_axes,
+        a_summary_df, a_summary_plot, a_period_colname, a_plot_cols,
+        a_projection_df)])
 # enddef plot_summary_diff_axes() #
 
 def write_summary_report(a_initial_net_worth, a_summary_df, a_report_file,
-        a_period_colname, a_networth_colname):
+        a_period_colname, a_networth_colname, a_ytd=None, a_formats=("text",),
+        a_variance=None, a_projection_df=None):
     """ Write report of total net worth with time.
     Parameters:
         a_initial_net_worth (float): Initial net worth at the beginning of all
@@ -136,24 +419,60 @@ def write_summary_report(a_initial_net_worth, a_summary_df, a_report_file,
         a_report_file (str): Filename of report file to write
         a_period_colname (str): Column name containing name of period
         a_networth_colname (str): Column name containing net worth
+        a_ytd (dict): YTD totals from summarize_ytd() to add to the report
+        a_formats (tuple(str)): Formats of the report, out of
+            report_render.FORMATS
+        a_variance (DataFrame): Budget variance of all periods from
+            budget_variance.compute_variance() to add to the report
+        a_projection_df (DataFrame): Percentiles of projected net worth from
+            project_net_worth() to add to the report
     Returns:
         None
     """
     df = pd.DataFrame(data={a_period_colname:["Start"], a_networth_colname:
         [a_initial_net_worth]})
-    df = df.append(a_summary_df[[a_period_colname, a_networth_colname]])
+    df = pd.concat([df, a_summary_df[[a_period_colname, a_networth_colname]]])
     pct_change = 100.0 * (df[a_networth_colname].iloc[-1] /
             df[a_networth_colname].iloc[0] - 1.0)
-    with open(a_report_file,'w') as rf:
-        rf.write(df.to_string(index=False))
-        rf.write("\n\n%-change in net worth: {:.2f}%".format(pct_change))
-    # endwith #
+    blocks = [report_render.table_block(None, df),
+            report_render.lines_block(None, [("%-change in net worth",
+                pct_change, "%-change in net worth: {:.2f}%")])]
+    if a_ytd is not None:
+        blocks.append(report_render.lines_block("Year-to-date totals",
+            [(key, value, key + " = {:.2f}") for key, value in a_ytd.items()]))
+    # endif #
+    if "Max drawdown [$]" in a_summary_df.columns:
+        # analytics of the latest period, see rolling_analytics()
+        latest = a_summary_df.iloc[-1]
+        keys = a_summary_df.columns[a_summary_df.columns.get_loc(
+            a_networth_colname) + 1:]
+        blocks.append(report_render.lines_block("Rolling analytics for " +
+            str(latest[a_period_colname]),
+            [(key, latest[key], key + " = {:.2f}") for key in keys]))
+    # endif #
+    if a_variance is not None and not a_variance.empty:
+        blocks.append(report_render.table_block("Budget variance by period",
+            budget_variance.variance_by_period(a_variance)))
+        latest = a_variance[a_variance["Time period"] ==
+                a_variance["Time period"].iloc[-1]]
+        blocks.append(report_render.table_block("Budget variance for " +
+            str(latest["Time period"].iloc[0]), latest.drop(
+                columns="Time period")))
+    # endif #
+    if a_projection_df is not None:
+        blocks.append(report_render.table_block("Projected net worth",
+            a_projection_df))
+    # endif #
+    report_render.write_report(a_report_file, None, blocks, a_formats)
 # enddef write_summary_report() #
 
 def main(a_initial_net_worth, a_summary_file,
         a_inc_exp_plotfile="Plot_incexp_summary.png",
         a_networth_savingspct_plotfile="Plot_networth_savingspct.png",
-        a_summary_reportfile="Summary_report.txt"):
+        a_summary_reportfile="Summary_report.txt", a_plots=True, a_jobs=1,
+        a_compact=False, a_profile_file=None, a_rolling=False,
+        a_formats=("text",), a_budget=False, a_project=0, a_paths=100000,
+        a_seed=None):
     """ Main function
     Parameters:
         a_initial_net_worth (float): Initial net worth at the beginning of all
@@ -164,23 +483,108 @@ def main(a_initial_net_worth, a_summary_file,
             expenses with time period
         a_networth_savingspct_plotfile (str): Filename in which to store plot of
             net worth and savings percent with time period
+        a_summary_reportfile (str): Filename of report file to write
+        a_plots (bool): Whether to plot the summaries
+        a_jobs (int): No. of worker processes used to render plots
+        a_compact (bool): Whether to accumulate net worth in integer cents
+        a_profile_file (str): If given, time and memory of each stage are
+            written to this JSON file (see profiling.py)
+        a_rolling (bool): Whether to add trailing averages, changes and
+            drawdown of the latest period to the report
+        a_formats (tuple(str)): Formats of the summary report, out of
+            report_render.FORMATS
+        a_budget (bool): Whether to add the budget variance of the periods
+            that were reported with their budget targets
+        a_project (int): No. of future periods over which to project net
+            worth in the report and plot; none if 0
+        a_paths (int): No. of simulated paths of the projection
+        a_seed (int): Seed of the random number generator of the projection
         Returns:
             None
     """
     assert isinstance(a_initial_net_worth, (float, int)),\
         "Previous balance must be numeric."
-    summary_df = summarize_all_periods(a_initial_net_worth, a_summary_file)
-    plot_summary_same_axes(summary_df, a_inc_exp_plotfile, "Time period",
-            ["Income [$]", "Expenses [$]"])
-    plot_summary_diff_axes(summary_df, a_networth_savingspct_plotfile,
-            "Time period", ("Net worth [$]", "pct-savings [%]"))
-    write_summary_report(a_initial_net_worth, summary_df,
-    a_summary_reportfile, "Time period", "Net worth [$]")
+    with profiling.profile(a_profile_file):
+        with profiling.stage("summarize_all_periods"):
+            summary_df = summarize_all_periods(a_initial_net_worth,
+                    a_summary_file, a_compact=a_compact, a_rolling=a_rolling)
+            ytd = summarize_ytd(a_initial_net_worth, a_summary_file)
+        # endwith #
+        variance = None
+        if a_budget and os.path.exists(budget_variance.targets_file(
+                a_summary_file)):
+            with profiling.stage("compute_variance"):
+                variance = budget_variance.compute_variance(
+                        budget_variance.read_targets(a_summary_file))
+            # endwith #
+        # endif #
+        projection_df = None
+        if a_project > 0:
+            with profiling.stage("project_net_worth"):
+                projection_df = project_net_worth(summary_df, a_project,
+                        a_paths, a_seed=a_seed)
+            # endwith #
+        # endif #
+        if a_plots:
+            # both plots are skipped if their data did not change since last run
+            plot_render.render_plots([
+                summary_plot_job(draw_summary_same_axes, summary_df,
+                    a_inc_exp_plotfile, "Time period",
+                    ["Income [$]", "Expenses [$]"]),
+                summary_plot_job(draw_summary_diff_axes, summary_df,
+                    a_networth_savingspct_plotfile, "Time period",
+                    ("Net worth [$]", "pct-savings [%]"), projection_df)],
+                a_jobs)
+        # endif #
+        with profiling.stage("write_summary_report"):
+            write_summary_report(a_initial_net_worth, summary_df,
+                    a_summary_reportfile, "Time period", "Net worth [$]", ytd,
+                    a_formats, variance, projection_df)
+        # endwith #
+    # endwith #
 # enddef main() #
 
 if __name__ == "__main__":
-    passed_args = sys.argv[1:]
-    passed_args[0] = float(passed_args[0])
-    main(*passed_args)
-    # endif #
+    from budget_analysis import positive_int
+    parser = argparse.ArgumentParser()
+    parser.add_argument("initial_net_worth", type=float,
+            help="Net worth at the beginning of all periods")
+    parser.add_argument("summary_file", help="Name of summary file")
+    parser.add_argument("inc_exp_plotfile", nargs='?',
+            default="Plot_incexp_summary.png",
+            help="Name of income and expenses plot")
+    parser.add_argument("networth_savingspct_plotfile", nargs='?',
+            default="Plot_networth_savingspct.png",
+            help="Name of net worth and savings percent plot")
+    parser.add_argument("summary_reportfile", nargs='?',
+            default="Summary_report.txt", help="Name of summary report")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write the summary report, without plots")
+    parser.add_argument("--jobs", type=int, default=1,
+            help="No. of worker processes used to render plots")
+    parser.add_argument("--compact", action='store_true',
+            help="Accumulate net worth in integer cents")
+    parser.add_argument("--profile", default=None,
+            help="JSON file to write per-stage time and memory to")
+    parser.add_argument("--rolling", action='store_true',
+            help="Report trailing averages, changes and net worth drawdown")
+    parser.add_argument("--formats", nargs='+', default=["text"],
+            choices=report_render.FORMATS,
+            help="Formats of the report; formats other than text are " +
+            "written next to the report file")
+    parser.add_argument("--budget", action='store_true',
+            help="Report the budget variance of periods reported with " +
+            "their budget targets")
+    parser.add_argument("--project", type=int, default=0,
+            help="Project net worth over this many future periods")
+    parser.add_argument("--paths", type=positive_int, default=100000,
+            help="No. of simulated paths of the projection")
+    parser.add_argument("--seed", type=int, default=None,
+            help="Seed of the random number generator of the projection")
+    args = parser.parse_args()
+    main(args.initial_net_worth, args.summary_file, args.inc_exp_plotfile,
+            args.networth_savingspct_plotfile, args.summary_reportfile,
+            not args.no_plots, args.jobs, args.compact, args.profile,
+            args.rolling, args.formats, args.budget, args.project, args.paths,
+            args.seed)
 # endif #
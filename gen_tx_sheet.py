@@ -0,0 +1,200 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To generate synthetic monthly budget sheets for testing and
+    benchmarking
+License: GPLv3+
+"""
+
+import os
+import argparse
+import numpy as np
+
+HEADER_LINES = [
+    ",Change or add categories by updating the Expenses and Income tables " +
+    "in the Summary sheet.,,,,,,,,",
+    ",Expenses,,,,,,Income,,,,,Savings,,,",
+    ",,,,,,,,,,,,,,,",
+    ",Date,Amount,Description,Category,Diff.,,Date,Amount,Description," +
+    "Category,,Date,Amount,Description,Category"]
+# rows of the Expenses table carrying only a "#N/A" Diff. at the bottom
+N_FILLER_ROWS = 2
+BLOCK_ROWS = 100000
+
+def quote(a_field):
+    """ Function to quote a CSV field if it contains a comma
+    Parameters:
+        a_field (str): Field
+    Returns:
+        field (str): Field, quoted if needed
+    """
+    return '"' + a_field + '"' if "," in a_field else a_field
+# enddef quote() #
+
+def format_amounts(a_cents):
+    """ Function to format amounts the way the budget sheet exports them
+    Parameters:
+        a_cents (ndarray): Amounts in cents
+    Returns:
+        amounts (ndarray): Amounts such as "$100.00" or "\"$1,500.00\""
+    """
+    # amounts repeat a lot, so each distinct one is only formatted once
+    uniques, inverse = np.unique(a_cents, return_inverse=True)
+    return np.array([quote("${:,.2f}".format(c / 100.0)) for c in uniques],
+            dtype=object)[inverse]
+# enddef format_amounts() #
+
+def format_diff(a_cents):
+    """ Function to format a budget difference like the Diff. column
+    Parameters:
+        a_cents (int): Budget minus actual amount in cents
+    Returns:
+        diff (str): Difference such as "+$50" or "\"-$4,507\""
+    """
+    return quote("{}${:,.0f}".format("-" if a_cents < 0 else "+",
+        abs(a_cents) / 100.0))
+# enddef format_diff() #
+
+def category_names(a_prefix, a_n_categories):
+    """ Function to make up category names
+    Parameters:
+        a_prefix (str): Prefix of category names
+        a_n_categories (int): No. of categories
+    Returns:
+        names (list of strings): Category names
+    """
+    return ["{} {:03d}".format(a_prefix, k) for k in range(a_n_categories)]
+# enddef category_names() #
+
+def random_table(a_rng, a_n_rows, a_n_categories, a_max_cents):
+    """ Function to draw random transactions of one table
+    Parameters:
+        a_rng (Generator): NumPy random generator
+        a_n_rows (int): No. of transactions
+        a_n_categories (int): No. of categories
+        a_max_cents (int): Largest amount in cents
+    Returns:
+        days (ndarray): Day of month of each transaction
+        cents (ndarray): Amount in cents of each transaction
+        cat_ids (ndarray): Category index of each transaction
+    """
+    days = a_rng.integers(1, 29, a_n_rows)
+    cents = a_rng.integers(1, a_max_cents, a_n_rows)
+    # a few categories get most transactions, like in real budgets
+    weights = 1.0 / np.arange(1, a_n_categories + 1)
+    cat_ids = a_rng.choice(a_n_categories, a_n_rows, p=weights/weights.sum())
+    return days, cents, cat_ids
+# enddef random_table() #
+
+def write_tx_sheet(a_tx_file, a_n_rows, a_n_categories=20, a_year=2000,
+        a_month=1, a_seed=0):
+    """ Function to write a synthetic transactions sheet with the Expenses,
+    Income and Savings tables side by side
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file to write
+        a_n_rows (int): No. of expense transactions; the income and savings
+            tables get a tenth of that each
+        a_n_categories (int): No. of expense categories
+        a_year (int): Year of the transactions
+        a_month (int): Month of the transactions
+        a_seed (int): Seed of the random generator
+    Returns:
+        None
+    """
+    rng = np.random.default_rng([a_seed, a_year, a_month])
+    n_side = max(a_n_rows // 10, 1)
+    n_side_cats = max(a_n_categories // 4, 1)
+    exp = random_table(rng, a_n_rows, a_n_categories, 50000)
+    inc = random_table(rng, n_side, n_side_cats, 500000)
+    sav = random_table(rng, n_side, n_side_cats, 200000)
+    exp_names, inc_names, sav_names = [np.array(category_names(prefix, n),
+        dtype=object) for prefix, n in [("Expense", a_n_categories),
+            ("Income", n_side_cats), ("Savings", n_side_cats)]]
+    # the Diff. column repeats (budget - total) of the row's category
+    exp_totals = np.bincount(exp[2], weights=exp[1],
+            minlength=a_n_categories).astype(np.int64)
+    budgets = np.rint(exp_totals * rng.uniform(0.8, 1.2, a_n_categories)
+            / 100.0).astype(np.int64) * 100
+    diffs = np.array([format_diff(d) for d in budgets - exp_totals],
+            dtype=object)
+    dates = np.array(["{}/{}/{}".format(a_month, d, a_year)
+        for d in range(32)], dtype=object)
+    # distinct values and codes of the date, amount and category fields of
+    # each table; fields are only looked up a block at a time
+    fields = []
+    for table, names in [(exp, exp_names), (inc, inc_names),
+            (sav, sav_names)]:
+        amounts, amount_ids = np.unique(table[1], return_inverse=True)
+        fields.append([(dates, table[0]), (format_amounts(amounts),
+            amount_ids), (names, table[2])])
+    # endfor #
+    with open(a_tx_file, 'w', newline='') as tf:
+        tf.write("\r\n".join(HEADER_LINES) + "\r\n")
+        for start in range(0, a_n_rows, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, a_n_rows)
+            # lines are joined a column at a time over the whole block
+            date, amount, name = [v[ids[start:stop]] for v, ids in fields[0]]
+            lines = "," + date + "," + amount + ",," + name + "," + \
+                    diffs[exp[2][start:stop]]
+            for table_fields in fields[1:]:
+                # only the first n_side rows of income and savings are filled
+                date, amount, name = [v[ids[start:stop]] for v, ids in
+                        table_fields]
+                side = date + "," + amount + ",," + name
+                lines[:len(side)] += ",," + side
+                lines[len(side):] += ",,,,,"
+            # endfor #
+            tf.write("\r\n".join(lines) + "\r\n")
+        # endfor #
+        tf.write(",,,,,#N/A,,,,\r\n" * N_FILLER_ROWS)
+    # endwith #
+# enddef write_tx_sheet() #
+
+def write_tx_sheets(a_out_dir, a_n_rows, a_n_periods=1, a_n_categories=20,
+        a_start_year=2000, a_seed=0):
+    """ Function to write one synthetic sheet per month and a manifest
+    Parameters:
+        a_out_dir (str): Directory in which to write the sheets
+        a_n_rows (int): No. of expense transactions per sheet
+        a_n_periods (int): No. of monthly sheets
+        a_n_categories (int): No. of expense categories
+        a_start_year (int): Year of the first sheet
+        a_seed (int): Seed of the random generator
+    Returns:
+        periods (list(tuple(str))): (period, tx_file) pairs, also written to
+            "manifest.csv" in a_out_dir
+    """
+    os.makedirs(a_out_dir, exist_ok=True)
+    periods = []
+    for k in range(a_n_periods):
+        year, month = a_start_year + k // 12, k % 12 + 1
+        period = "{}-{:02d}".format(year, month)
+        tx_file = os.path.join(a_out_dir, period + ".csv")
+        write_tx_sheet(tx_file, a_n_rows, a_n_categories, year, month, a_seed)
+        periods.append((period, tx_file))
+    # endfor #
+    with open(os.path.join(a_out_dir, "manifest.csv"), 'w') as mf:
+        for period, tx_file in periods:
+            mf.write("{},{}\n".format(period, os.path.basename(tx_file)))
+        # endfor #
+    # endwith #
+    return periods
+# enddef write_tx_sheets() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_dir", help="Directory in which to write sheets")
+    parser.add_argument("--rows", type=int, default=1000,
+            help="No. of expense transactions per sheet")
+    parser.add_argument("--periods", type=int, default=1,
+            help="No. of monthly sheets")
+    parser.add_argument("--categories", type=int, default=20,
+            help="No. of expense categories")
+    parser.add_argument("--start-year", type=int, default=2000,
+            help="Year of the first sheet")
+    parser.add_argument("--seed", type=int, default=0,
+            help="Seed of the random generator")
+    args = parser.parse_args()
+    write_tx_sheets(args.out_dir, args.rows, args.periods, args.categories,
+            args.start_year, args.seed)
+# endif #
@@ -0,0 +1,234 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To process the budget sheets of many households concurrently within
+    a memory budget
+License: GPLv3+
+"""
+
+import os
+import csv
+import time
+import argparse
+import warnings
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+        wait, FIRST_COMPLETED)
+import budget_analysis
+import collate_periods
+import tx_cache
+from batch_analysis import glob_periods, process_period
+
+# peak memory of parsing and categorizing a sheet, per byte of the sheet
+MEMORY_PER_BYTE = 5
+
+def read_households(a_households_file):
+    """ Function to read a manifest of households
+    Parameters:
+        a_households_file (str): CSV file with lines "household,sheets glob,
+            initial net worth[,output dir]"; relative paths are taken relative
+            to the manifest, and the output dir defaults to the directory of
+            the sheets. Blank lines and lines starting with "#" are ignored.
+    Returns:
+        households (list(dict)): Per household in manifest order, its "name",
+            "periods" as (period, tx_file) pairs, "initial_net_worth",
+            "output_dir" and "summary_file"
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(a_households_file))
+    households = []
+    with open(a_households_file, newline='') as hf:
+        for row in csv.reader(hf):
+            if not row or row[0].strip().startswith("#"):
+                continue
+            # endif #
+            row = [r.strip() for r in row]
+            pattern = os.path.join(manifest_dir, row[1])
+            if len(row) > 3 and row[3]:
+                output_dir = os.path.join(manifest_dir, row[3])
+            else:
+                output_dir = os.path.dirname(pattern)
+            # endif #
+            summary_file = os.path.join(output_dir, "MyBudget_summary.csv")
+            # the summary may be written next to the sheets
+            periods = [(p, f) for p, f in glob_periods(pattern)
+                    if os.path.abspath(f) != summary_file]
+            households.append({"name": row[0], "periods": periods,
+                "initial_net_worth": float(row[2]), "output_dir": output_dir,
+                "summary_file": summary_file})
+        # endfor #
+    # endwith #
+    return households
+# enddef read_households() #
+
+def estimate_memory(a_tx_file):
+    """ Function to estimate the peak memory of processing a sheet
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+    Returns:
+        n_bytes (int): Estimated peak memory [bytes]
+    """
+    return MEMORY_PER_BYTE * os.path.getsize(a_tx_file)
+# enddef estimate_memory() #
+
+def collate_household(a_household, a_plots=True):
+    """ Function to summarize all periods of a household in its output dir
+    Parameters:
+        a_household (dict): Household, see read_households()
+        a_plots (bool): Whether to plot the summaries
+    Returns:
+        None
+    """
+    output_dir = a_household["output_dir"]
+    collate_periods.main(a_household["initial_net_worth"],
+            a_household["summary_file"],
+            os.path.join(output_dir, "Plot_incexp_summary.png"),
+            os.path.join(output_dir, "Plot_networth_savingspct.png"),
+            os.path.join(output_dir, "Summary_report.txt"), a_plots)
+# enddef collate_household() #
+
+def schedule(a_households, a_jobs=2, a_memory_budget=1024, a_household_jobs=1,
+        a_cache_dir=None, a_plots=True):
+    """ Function to process the sheets of many households in a worker pool,
+    then summarize each household as soon as its sheets are done
+    Parameters:
+        a_households (list(dict)): Households, see read_households()
+        a_jobs (int): No. of worker processes; a single worker thread is
+            used if a_jobs <= 1
+        a_memory_budget (float): Sheets are only started while the estimated
+            memory of running sheets stays within this many MB; one sheet is
+            always let through so that large sheets still run
+        a_household_jobs (int): Max. no. of sheets of one household being
+            processed at the same time
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_plots (bool): Whether to plot
+    Returns:
+        stats (dict): "households" done, "failed" household names, "periods"
+            processed, "elapsed [s]" and "households/min"
+    """
+    start = time.time()
+    budget = a_memory_budget * 1024 * 1024
+    if a_jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=a_jobs)
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+    # endif #
+    todo = [list(h["periods"]) for h in a_households]
+    # results that arrived before those of earlier periods, per household
+    results = [{} for _ in a_households]
+    n_written = [0] * len(a_households)
+    n_running = [0] * len(a_households)
+    running = {}
+    memory = 0
+    failed = set()
+    stats = {"households": 0, "periods": 0}
+    for k, household in enumerate(a_households):
+        os.makedirs(household["output_dir"], exist_ok=True)
+        if not household["periods"]:
+            warnings.warn("Skipping household {}: no sheets found".format(
+                household["name"]))
+            failed.add(k)
+        # endif #
+    # endfor #
+    try:
+        while running or any(todo):
+            # households take turns, so that one with many sheets does not
+            # hold up the others
+            for k, household in enumerate(a_households):
+                while todo[k] and n_running[k] < a_household_jobs and \
+                        len(running) < max(a_jobs, 1):
+                    need = estimate_memory(todo[k][0][1])
+                    if running and memory + need > budget:
+                        break
+                    # endif #
+                    period_file = todo[k].pop(0)
+                    running[executor.submit(process_period, period_file,
+                        a_cache_dir, None, a_plots, household["output_dir"])] \
+                                = (k, period_file[0], need)
+                    n_running[k] += 1
+                    memory += need
+                # endwhile #
+            # endfor #
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                k, period, need = running.pop(future)
+                household = a_households[k]
+                n_running[k] -= 1
+                memory -= need
+                try:
+                    result = future.result()
+                    if period is None:
+                        stats["households"] += 1
+                        continue
+                    # endif #
+                    stats["periods"] += 1
+                    if k in failed:
+                        continue
+                    # endif #
+                    results[k][period] = result
+                    # the summary of each household is written in period
+                    # order, starting afresh with its first period
+                    periods = household["periods"]
+                    while n_written[k] < len(periods) and \
+                            periods[n_written[k]][0] in results[k]:
+                        next_period = periods[n_written[k]][0]
+                        budget_analysis.write_reports(
+                                os.path.join(household["output_dir"],
+                                    next_period + "_report.txt"),
+                                next_period, *results[k].pop(next_period),
+                                household["summary_file"],
+                                a_reset_summary=(n_written[k] == 0))
+                        n_written[k] += 1
+                    # endwhile #
+                    if n_written[k] == len(periods):
+                        running[executor.submit(collate_household, household,
+                            a_plots)] = (k, None, 0)
+                        n_running[k] += 1
+                    # endif #
+                except Exception as e:
+                    # one household must not stop the others
+                    warnings.warn("Skipping household {}: {}".format(
+                        household["name"], e))
+                    failed.add(k)
+                    todo[k] = []
+                # endtry #
+            # endfor #
+        # endwhile #
+    finally:
+        executor.shutdown()
+    # endtry #
+    stats["failed"] = [a_households[k]["name"] for k in sorted(failed)]
+    stats["elapsed [s]"] = time.time() - start
+    stats["households/min"] = 60.0 * stats["households"] / \
+            max(stats["elapsed [s]"], 1e-9)
+    return stats
+# enddef schedule() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("households_file",
+            help="CSV file with lines \"household,sheets glob,initial net " +
+            "worth[,output dir]\"")
+    parser.add_argument("--jobs", type=int, default=2,
+            help="No. of worker processes")
+    parser.add_argument("--memory-budget", type=float, default=1024,
+            help="Estimated memory [MB] of sheets processed at the same time")
+    parser.add_argument("--household-jobs", type=int, default=1,
+            help="Max. no. of sheets of one household processed at a time")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write reports and summaries, without plots")
+    args = parser.parse_args()
+    stats = schedule(read_households(args.households_file), args.jobs,
+            args.memory_budget, args.household_jobs,
+            None if args.no_cache else args.cache_dir, not args.no_plots)
+    print("{} households ({} periods) in {:.1f} s: {:.1f} households/min"
+            .format(stats["households"], stats["periods"],
+                stats["elapsed [s]"], stats["households/min"]))
+    if stats["failed"]:
+        print("Failed: " + ", ".join(stats["failed"]))
+    # endif #
+# endif #
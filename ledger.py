@@ -0,0 +1,252 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To query income, expenses and savings of many periods repeatedly
+    without grouping the transactions again for every query
+License: GPLv3+
+"""
+
+import numpy as np
+import pandas as pd
+from budget_analysis import read_tx_file, categorize_tx
+
+KINDS = ("income", "expenses", "savings")
+
+class Ledger:
+    """ Parsed transactions of several periods with memoized aggregates.
+    Aggregates are computed on first use and kept until transactions they
+    depend on are appended, so that repeated queries are dictionary lookups.
+    """
+
+    def __init__(self, a_initial_net_worth=0.0, a_cols=['Category',
+            'Amount [$]']):
+        """ Constructor
+        Parameters:
+            a_initial_net_worth (float): Net worth at the beginning of all
+                periods
+            a_cols (list of strings): Column names containing relevant
+                transaction information in the order (Category, Amount)
+        """
+        self.initial_net_worth = a_initial_net_worth
+        self.cols = list(a_cols)
+        self._periods = []
+        # transactions per (kind, period)
+        self._tables = {}
+        # memoized aggregates, see invalidate()
+        self._grouped = {}
+        self._category_totals = {}
+        self._period_totals = {}
+        self._net_worth = []
+        self._frames = {}
+    # enddef __init__() #
+
+    @classmethod
+    def from_tx_files(cls, a_periods, a_initial_net_worth=0.0,
+            a_cache_dir=None):
+        """ Function to make a ledger of transactions files
+        Parameters:
+            a_periods (list(tuple(str))): (period, tx_file) pairs, in order
+            a_initial_net_worth (float): Net worth at the beginning of all
+                periods
+            a_cache_dir (str): Directory of the parsed-transaction cache; the
+                cache is bypassed if None
+        Returns:
+            ledger (Ledger): Ledger of all periods
+        """
+        ledger = cls(a_initial_net_worth)
+        for period, tx_file in a_periods:
+            if a_cache_dir is None:
+                tables = read_tx_file(tx_file)
+            else:
+                from tx_cache import read_tx_file_cached
+                tables = read_tx_file_cached(tx_file, a_cache_dir)
+            # endif #
+            ledger.append_tables(period, tables)
+        # endfor #
+        return ledger
+    # enddef from_tx_files() #
+
+    @property
+    def periods(self):
+        """ Time periods of the ledger, in the order they were first added """
+        return list(self._periods)
+    # enddef periods() #
+
+    def append(self, a_period, a_kind, a_tx):
+        """ Function to append transactions to a period
+        Parameters:
+            a_period (str): Time period; new periods are added after the
+                others
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_tx (DataFrame): Transactions with Category and Amount columns,
+                as read by read_tx_file
+        Returns:
+            None
+        """
+        if a_kind not in KINDS:
+            raise ValueError("Unknown kind of transactions: {}".format(a_kind))
+        # endif #
+        if a_period not in self._periods:
+            self._periods.append(a_period)
+        # endif #
+        tx = a_tx[self.cols]
+        key = (a_kind, a_period)
+        if key in self._tables:
+            tx = pd.concat([self._tables[key], tx])
+        # endif #
+        self._tables[key] = tx
+        self.invalidate(a_period, a_kind, a_tx[self.cols[0]].unique())
+    # enddef append() #
+
+    def append_tables(self, a_period, a_tables):
+        """ Function to append the tables of a transactions file to a period
+        Parameters:
+            a_period (str): Time period
+            a_tables (tuple(DataFrame)): Income, expenses and savings tables
+                as returned by read_tx_file
+        Returns:
+            None
+        """
+        for kind, tx in zip(KINDS, a_tables):
+            self.append(a_period, kind, tx)
+        # endfor #
+    # enddef append_tables() #
+
+    def invalidate(self, a_period, a_kind, a_categories):
+        """ Function to drop the aggregates that depend on transactions of
+        some categories of a period; all others are kept
+        Parameters:
+            a_period (str): Time period
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_categories (iterable of strings): Categories of the transactions
+        Returns:
+            None
+        """
+        for period in (a_period, None):
+            self._grouped.pop((a_kind, period), None)
+            for category in a_categories:
+                self._category_totals.pop((a_kind, category, period), None)
+            # endfor #
+        # endfor #
+        self._period_totals.pop(a_period, None)
+        # net worth of earlier periods is unchanged
+        del self._net_worth[self._periods.index(a_period):]
+        self._frames.clear()
+    # enddef invalidate() #
+
+    def tables(self, a_kind, a_period):
+        """ Function to get the transactions of a period
+        Parameters:
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_period (str): Time period
+        Returns:
+            tx (DataFrame): Transactions, empty if there are none
+        """
+        if (a_kind, a_period) not in self._tables:
+            return pd.DataFrame({self.cols[0]: pd.Series(dtype=object),
+                self.cols[1]: pd.Series(dtype=np.float64)})
+        # endif #
+        return self._tables[(a_kind, a_period)]
+    # enddef tables() #
+
+    def grouped(self, a_kind, a_period=None):
+        """ Function to get transactions totalled per category, like
+        categorize_tx
+        Parameters:
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_period (str): Time period; all periods if None
+        Returns:
+            grouped_tx (DataFrame): Total and contribution of each category
+        """
+        key = (a_kind, a_period)
+        if key not in self._grouped:
+            if a_period is not None:
+                self._grouped[key] = categorize_tx(self.tables(a_kind,
+                    a_period), self.cols)
+            else:
+                # add up the per-period totals instead of grouping all
+                # transactions again
+                amounts = pd.concat([self.grouped(a_kind, p)[self.cols[1]]
+                    for p in self._periods] or [pd.Series(dtype=np.float64)])
+                grouped_tx = amounts.groupby(level=0).sum().to_frame()
+                grouped_tx['Contribution [%]'] = 100 * grouped_tx[
+                        self.cols[1]] / np.abs(grouped_tx[self.cols[1]].sum())
+                self._grouped[key] = grouped_tx
+            # endif #
+        # endif #
+        return self._grouped[key]
+    # enddef grouped() #
+
+    def category_total(self, a_kind, a_category, a_period=None):
+        """ Function to get the total of one category
+        Parameters:
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_category (str): Category
+            a_period (str): Time period; all periods if None
+        Returns:
+            total (float): Total amount, 0 if the category has no transactions
+        """
+        key = (a_kind, a_category, a_period)
+        if key not in self._category_totals:
+            amounts = self.grouped(a_kind, a_period)[self.cols[1]]
+            self._category_totals[key] = float(amounts.get(a_category, 0.0))
+        # endif #
+        return self._category_totals[key]
+    # enddef category_total() #
+
+    def contributions(self, a_kind, a_period=None):
+        """ Function to get the contribution of each category
+        Parameters:
+            a_kind (str): One of "income", "expenses" or "savings"
+            a_period (str): Time period; all periods if None
+        Returns:
+            contributions (Series): Contribution [%] per category
+        """
+        return self.grouped(a_kind, a_period)['Contribution [%]']
+    # enddef contributions() #
+
+    def period_total(self, a_period):
+        """ Function to get the totals of a period
+        Parameters:
+            a_period (str): Time period
+        Returns:
+            totals (tuple(float)): Total income, expenses and savings
+        """
+        if a_period not in self._period_totals:
+            self._period_totals[a_period] = tuple(float(np.sum(self.tables(
+                kind, a_period)[self.cols[1]])) for kind in KINDS)
+        # endif #
+        return self._period_totals[a_period]
+    # enddef period_total() #
+
+    @property
+    def period_totals(self):
+        """ Income, expenses and savings [$] per period, in order """
+        if "period_totals" not in self._frames:
+            self._frames["period_totals"] = pd.DataFrame(
+                    [self.period_total(p) for p in self._periods],
+                    index=pd.Index(self._periods, name="Time period"),
+                    columns=[k.capitalize() + " [$]" for k in KINDS])
+        # endif #
+        return self._frames["period_totals"]
+    # enddef period_totals() #
+
+    @property
+    def net_worth(self):
+        """ Net worth [$] after each period, in order """
+        if "net_worth" not in self._frames:
+            # only periods after the earliest changed one are added up again
+            net_worth = self._net_worth[-1] if self._net_worth else \
+                    self.initial_net_worth
+            for period in self._periods[len(self._net_worth):]:
+                inc, exp, _ = self.period_total(period)
+                net_worth += inc - exp
+                self._net_worth.append(net_worth)
+            # endfor #
+            self._frames["net_worth"] = pd.Series(self._net_worth,
+                    index=pd.Index(self._periods, name="Time period"),
+                    name="Net worth [$]")
+        # endif #
+        return self._frames["net_worth"]
+    # enddef net_worth() #
+# endclass Ledger #
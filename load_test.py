@@ -0,0 +1,98 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To measure the latency of a budget server under concurrent requests
+License: GPLv3+
+"""
+
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+
+def fetch(a_url):
+    """ Function to request a URL and time it
+    Parameters:
+        a_url (str): URL to request
+    Returns:
+        latency (float): Time until the whole response was read [s]
+        status (int): HTTP status code, or 0 if no response was received
+    """
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(a_url) as response:
+            response.read()
+            status = response.status
+        # endwith #
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        # refused or reset connections and timeouts; URLError is an OSError
+        status = 0
+    # endtry #
+    return time.perf_counter() - start, status
+# enddef fetch() #
+
+def run_load(a_urls, a_requests=1000, a_concurrency=8):
+    """ Function to request URLs from several threads at once
+    Parameters:
+        a_urls (list of strings): URLs to request, in turn
+        a_requests (int): Total no. of requests
+        a_concurrency (int): No. of requests in flight at the same time
+    Returns:
+        stats (dict): "requests", "errors", "requests/s" and "p50 [ms]",
+            "p99 [ms]" and "max [ms]" latencies
+    """
+    latencies = np.zeros(a_requests)
+    statuses = np.zeros(a_requests, dtype=int)
+    counter = iter(range(a_requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                k = next(counter, None)
+            # endwith #
+            if k is None:
+                return
+            # endif #
+            latencies[k], statuses[k] = fetch(a_urls[k % len(a_urls)])
+        # endwhile #
+    # enddef worker() #
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(a_concurrency)]
+    for thread in threads:
+        thread.start()
+    # endfor #
+    for thread in threads:
+        thread.join()
+    # endfor #
+    elapsed = time.perf_counter() - start
+    p50, p99 = 1000.0 * np.percentile(latencies, [50, 99])
+    return {"requests": a_requests, "errors": int(np.sum(statuses != 200)),
+            "requests/s": a_requests / elapsed, "p50 [ms]": p50,
+            "p99 [ms]": p99, "max [ms]": 1000.0 * latencies.max()}
+# enddef run_load() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000",
+            help="Base URL of the budget server")
+    parser.add_argument("--paths", nargs='+',
+            default=["/periods", "/networth", "/ytd"],
+            help="Paths to request, in turn")
+    parser.add_argument("--requests", type=int, default=1000,
+            help="Total no. of requests")
+    parser.add_argument("--concurrency", type=int, default=8,
+            help="No. of requests in flight at the same time")
+    args = parser.parse_args()
+    stats = run_load([args.url.rstrip("/") + p for p in args.paths],
+            args.requests, args.concurrency)
+    print("{} requests, {} errors, {:.0f} requests/s".format(
+        stats["requests"], stats["errors"], stats["requests/s"]))
+    print("p50 = {:.2f} ms, p99 = {:.2f} ms, max = {:.2f} ms".format(
+        stats["p50 [ms]"], stats["p99 [ms]"], stats["max [ms]"]))
+# endif #
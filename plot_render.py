@@ -0,0 +1,142 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To render plots off-screen, in parallel, and only when their data
+    has changed
+License: GPLv3+
+"""
+
+import os
+import struct
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import profiling
+
+# PNG text chunk in which the hash of the plotted data is stored
+HASH_KEY = "MyBudget-hash"
+
+def plot_hash(a_draw_func, a_args):
+    """ Function to hash a plot's drawing function and its inputs
+    Parameters:
+        a_draw_func (function): Function drawing the plot on a figure
+        a_args (tuple): Arguments passed on to a_draw_func after the figure
+    Returns:
+        hash (str): Hex digest identifying the rendered plot
+    """
+    digest = hashlib.sha256()
+    digest.update("{}.{}".format(a_draw_func.__module__,
+        a_draw_func.__qualname__).encode())
+    for arg in a_args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            digest.update(repr((arg.shape, list(getattr(arg, 'columns', [])),
+                arg.index.names)).encode())
+            digest.update(pd.util.hash_pandas_object(arg).to_numpy().tobytes())
+        else:
+            digest.update(repr(arg).encode())
+        # endif #
+    # endfor #
+    return digest.hexdigest()
+# enddef plot_hash() #
+
+def read_png_hash(a_plotfile):
+    """ Function to read the hash stored in a PNG file by render_plot()
+    Parameters:
+        a_plotfile (str): Filename of PNG file
+    Returns:
+        hash (str): Stored hash, or None if the file has none
+    """
+    try:
+        with open(a_plotfile, 'rb') as pf:
+            if pf.read(8) != b'\x89PNG\r\n\x1a\n':
+                return None
+            # endif #
+            # text chunks precede the image data, so stop at IDAT
+            while True:
+                header = pf.read(8)
+                if len(header) < 8:
+                    return None
+                # endif #
+                length, chunk_type = struct.unpack('>I4s', header)
+                if chunk_type in (b'IDAT', b'IEND'):
+                    return None
+                # endif #
+                if chunk_type == b'tEXt':
+                    key, _, value = pf.read(length).partition(b'\x00')
+                    if key.decode('latin-1') == HASH_KEY:
+                        return value.decode('latin-1')
+                    # endif #
+                    pf.seek(4, 1)
+                else:
+                    pf.seek(length + 4, 1)
+                # endif #
+            # endwhile #
+        # endwith #
+    except FileNotFoundError:
+        return None
+    # endtry #
+# enddef read_png_hash() #
+
+def draw_and_save(a_job):
+    """ Function to draw a plot on an Agg figure and save it with its hash
+    Parameters:
+        a_job (tuple): (draw function, plot file, arguments, hash)
+    Returns:
+        plotfile (str): Filename of saved plot
+    """
+    # the object-oriented API keeps no global state, unlike pyplot
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    draw_func, plotfile, args, hash_value = a_job
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    draw_func(fig, *args)
+    fig.savefig(plotfile, metadata={HASH_KEY: hash_value})
+    return plotfile
+# enddef draw_and_save() #
+
+def render_plots(a_plots, a_jobs=1):
+    """ Function to render plots whose inputs changed since the last render
+    Parameters:
+        a_plots (list(tuple)): (draw function, plot file, arguments) per plot;
+            the draw function is called as draw_func(figure, *arguments)
+        a_jobs (int): No. of worker processes; plots are rendered serially
+            if a_jobs <= 1
+    Returns:
+        rendered (list(str)): Filenames of plots that were (re-)rendered
+    """
+    stale = []
+    for draw_func, plotfile, args in a_plots:
+        hash_value = plot_hash(draw_func, args)
+        if read_png_hash(plotfile) != hash_value:
+            stale.append((draw_func, plotfile, args, hash_value))
+        # endif #
+    # endfor #
+    if a_jobs > 1 and len(stale) > 1:
+        # workers cannot report their own stages, so time the pool as a whole
+        with profiling.stage("render_plots"):
+            with ProcessPoolExecutor(max_workers=a_jobs) as executor:
+                return list(executor.map(draw_and_save, stale))
+            # endwith #
+        # endwith #
+    # endif #
+    rendered = []
+    for job in stale:
+        with profiling.stage("plot " + os.path.basename(job[1])):
+            rendered.append(draw_and_save(job))
+        # endwith #
+    # endfor #
+    return rendered
+# enddef render_plots() #
+
+def render_plot(a_draw_func, a_plotfile, *a_args):
+    """ Function to render a single plot if its inputs changed
+    Parameters:
+        a_draw_func (function): Function drawing the plot on a figure
+        a_plotfile (str): Filename to save plot in
+        a_args: Arguments passed on to a_draw_func after the figure
+    Returns:
+        rendered (bool): Whether the plot was (re-)rendered
+    """
+    return len(render_plots([(a_draw_func, a_plotfile, a_args)])) > 0
+# enddef render_plot() #
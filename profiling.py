@@ -0,0 +1,191 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To record time and memory spent in each stage of the budget
+    pipeline
+License: GPLv3+
+"""
+
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# stages may run in several threads at once, e.g. in async_pipeline; the
+# lock guards the records, the hooks and tracemalloc's peak
+_lock = threading.Lock()
+# records of finished stages; None while profiling is disabled
+_records = None
+# hooks called at the start and end of every stage, see add_hook()
+_hooks = []
+# per thread, highest traced memory seen so far by each enclosing stage
+_local = threading.local()
+
+def enclosing_peaks():
+    """ Function to get the peaks of the stages entered by this thread
+    Parameters:
+        None
+    Returns:
+        peaks (list(int)): Highest traced memory [B] per enclosing stage,
+            innermost last
+    """
+    if not hasattr(_local, "peaks"):
+        _local.peaks = []
+    # endif #
+    return _local.peaks
+# enddef enclosing_peaks() #
+
+def add_hook(a_hook):
+    """ Function to attach a callback to every pipeline stage
+    Parameters:
+        a_hook (function): Called as a_hook(event, stage, record) with event
+            "start" or "end"; record is the dict written to the profile
+            (filled in at "end" only, and empty if profiling is disabled)
+    Returns:
+        None
+    """
+    with _lock:
+        _hooks.append(a_hook)
+    # endwith #
+# enddef add_hook() #
+
+def remove_hook(a_hook):
+    """ Function to detach a callback added by add_hook()
+    Parameters:
+        a_hook (function): Callback to remove
+    Returns:
+        None
+    """
+    with _lock:
+        _hooks.remove(a_hook)
+    # endwith #
+# enddef remove_hook() #
+
+def enable():
+    """ Function to start recording stages, including traced memory
+    Parameters:
+        None
+    Returns:
+        None
+    """
+    global _records
+    with _lock:
+        _records = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # endif #
+    # endwith #
+# enddef enable() #
+
+def disable():
+    """ Function to stop recording stages
+    Parameters:
+        None
+    Returns:
+        records (list(dict)): Records of the stages run while enabled
+    """
+    global _records
+    with _lock:
+        records, _records = _records, None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        # endif #
+    # endwith #
+    return records or []
+# enddef disable() #
+
+@contextmanager
+def stage(a_name):
+    """ Context manager to wrap one pipeline stage
+    Parameters:
+        a_name (str): Name of stage, e.g. "read_tx_file"
+    Returns:
+        record (dict): Record of the stage, filled in when the stage ends
+    """
+    record = {}
+    with _lock:
+        # hooks may add or remove hooks, so they are called on a copy
+        hooks = list(_hooks)
+        profiling = _records is not None
+        if profiling:
+            # a nested stage resets the peak, so save it for the enclosing
+            # one; stages of other threads share tracemalloc's peak
+            peaks = enclosing_peaks()
+            if peaks:
+                peaks[-1] = max(peaks[-1],
+                        tracemalloc.get_traced_memory()[1])
+            # endif #
+            tracemalloc.reset_peak()
+            peaks.append(0)
+        # endif #
+    # endwith #
+    for hook in hooks:
+        hook("start", a_name, record)
+    # endfor #
+    if profiling:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+    # endif #
+    try:
+        yield record
+    finally:
+        if profiling:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+        # endif #
+        with _lock:
+            if profiling:
+                peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if peaks:
+                    peaks[-1] = max(peaks[-1], peak)
+                # endif #
+                record.update({"stage": a_name, "wall time [s]": wall_time,
+                    "cpu time [s]": cpu_time,
+                    "peak traced memory [MB]": peak / 1e6})
+                # profiling may have been disabled by another thread
+                if _records is not None:
+                    _records.append(record)
+                # endif #
+            # endif #
+            hooks = list(_hooks)
+        # endwith #
+        for hook in hooks:
+            hook("end", a_name, record)
+        # endfor #
+    # endtry #
+# enddef stage() #
+
+def write_profile(a_profile_file, a_records):
+    """ Function to write stage records as JSON
+    Parameters:
+        a_profile_file (str): Name of JSON file to write
+        a_records (list(dict)): Records returned by disable()
+    Returns:
+        None
+    """
+    with open(a_profile_file, 'w') as pf:
+        json.dump({"stages": a_records}, pf, indent=2)
+    # endwith #
+# enddef write_profile() #
+
+@contextmanager
+def profile(a_profile_file):
+    """ Context manager to profile a run and write the records on exit
+    Parameters:
+        a_profile_file (str): Name of JSON file to write; nothing is recorded
+            if None
+    Returns:
+        None
+    """
+    if a_profile_file is None:
+        yield
+        return
+    # endif #
+    enable()
+    try:
+        yield
+    finally:
+        write_profile(a_profile_file, disable())
+    # endtry #
+# enddef profile() #
@@ -0,0 +1,315 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To render budget reports as text, CSV, JSON and HTML from one set
+    of computed and formatted values
+License: GPLv3+
+"""
+
+import io
+import os
+import csv
+import html
+import json
+import math
+import tempfile
+import numpy as np
+
+FORMATS = ("text", "csv", "json", "html")
+# extension of each format other than text; text goes to the report file
+EXTENSIONS = {"csv": ".csv", "json": ".json", "html": ".html"}
+
+def format_value(a_value, a_template="{:.2f}"):
+    """ Function to format one value of a report
+    Parameters:
+        a_value: Value to format
+        a_template (str): Format string used for numbers
+    Returns:
+        text (str): Formatted value
+    """
+    if isinstance(a_value, (float, np.floating)):
+        return a_template.format(a_value)
+    # endif #
+    return str(a_value)
+# enddef format_value() #
+
+def to_json_value(a_value):
+    """ Function to convert a value of a report to a JSON value
+    Parameters:
+        a_value: Value to convert
+    Returns:
+        value: Python int, float, str or None; NaN and infinite amounts,
+            e.g. %-savings of a period without income, become None
+    """
+    if isinstance(a_value, (float, np.floating)):
+        return float(a_value) if math.isfinite(a_value) else None
+    # endif #
+    if isinstance(a_value, np.integer):
+        return int(a_value)
+    # endif #
+    return a_value
+# enddef to_json_value() #
+
+def lines_block(a_title, a_lines):
+    """ Function to make a report block of single values
+    Parameters:
+        a_title (str): Title of block, or None
+        a_lines (list(tuple)): (key, value, text template) per line, e.g.
+            ("Total income", 1500.0, "Total income = $ {:.2f}")
+    Returns:
+        block (dict): Block with every line formatted once
+    """
+    return {"kind": "lines", "title": a_title,
+            "keys": [k for k, _, _ in a_lines],
+            "values": [v for _, v, _ in a_lines],
+            "texts": [t.format(v) for _, v, t in a_lines],
+            "cells": [format_value(v) for _, v, _ in a_lines]}
+# enddef lines_block() #
+
+def table_block(a_title, a_df, a_template="{:.2f}"):
+    """ Function to make a report block of a table
+    Parameters:
+        a_title (str): Title of block, or None
+        a_df (DataFrame): Table; the index is not rendered, so reset it
+            first if it holds e.g. the categories
+        a_template (str): Format string used for numbers
+    Returns:
+        block (dict): Block with every cell formatted once
+    """
+    cell_cols = []
+    value_cols = []
+    numeric = []
+    for colname in a_df.columns:
+        col = a_df[colname].to_numpy()
+        # numbers are right-aligned in text, everything else left-aligned
+        numeric.append(col.dtype.kind in "iuf")
+        values = col.tolist()
+        if col.dtype.kind == "f":
+            cell_cols.append([a_template.format(v) for v in values])
+            if not np.isfinite(col).all():
+                values = [v if math.isfinite(v) else None for v in values]
+            # endif #
+        else:
+            cell_cols.append([str(v) for v in values])
+        # endif #
+        value_cols.append(values)
+    # endfor #
+    return {"kind": "table", "title": a_title,
+            "columns": [str(c) for c in a_df.columns],
+            "rows": [list(r) for r in zip(*value_cols)],
+            "cells": [list(r) for r in zip(*cell_cols)], "numeric": numeric}
+# enddef table_block() #
+
+def render_text(a_heading, a_blocks, a_out):
+    """ Function to render a report as plain text
+    Parameters:
+        a_heading (str): Heading of report, or None
+        a_blocks (list(dict)): Blocks made by lines_block() and table_block()
+        a_out (file): Buffer to write to
+    Returns:
+        None
+    """
+    parts = []
+    for block in a_blocks:
+        text = "" if block["title"] is None else block["title"] + ":\n"
+        if block["kind"] == "lines":
+            text += "".join(t + "\n" for t in block["texts"])
+        else:
+            widths = [max([len(c)] + [len(r[k]) for r in block["cells"]])
+                    for k, c in enumerate(block["columns"])]
+            for row in [block["columns"]] + block["cells"]:
+                text += "  ".join(v.rjust(w) if n else v.ljust(w) for v, w, n
+                        in zip(row, widths, block["numeric"])).rstrip() + "\n"
+            # endfor #
+        # endif #
+        parts.append(text)
+    # endfor #
+    if a_heading is not None:
+        a_out.write(a_heading + "\n")
+    # endif #
+    a_out.write("\n".join(parts))
+# enddef render_text() #
+
+def render_csv(a_heading, a_blocks, a_out):
+    """ Function to render a report as CSV, one section per block
+    Parameters:
+        a_heading (str): Heading of report, or None
+        a_blocks (list(dict)): Blocks made by lines_block() and table_block()
+        a_out (file): Buffer to write to
+    Returns:
+        None
+    """
+    writer = csv.writer(a_out, lineterminator="\n")
+    if a_heading is not None:
+        writer.writerow([a_heading])
+    # endif #
+    for block in a_blocks:
+        if block["title"] is not None:
+            writer.writerow([block["title"]])
+        # endif #
+        if block["kind"] == "lines":
+            writer.writerows(zip(block["keys"], block["cells"]))
+        else:
+            writer.writerow(block["columns"])
+            writer.writerows(block["cells"])
+        # endif #
+        writer.writerow([])
+    # endfor #
+# enddef render_csv() #
+
+def render_json(a_heading, a_blocks, a_out):
+    """ Function to render a report as JSON
+    Parameters:
+        a_heading (str): Heading of report, or None
+        a_blocks (list(dict)): Blocks made by lines_block() and table_block()
+        a_out (file): Buffer to write to
+    Returns:
+        None
+    """
+    sections = []
+    for block in a_blocks:
+        if block["kind"] == "lines":
+            sections.append({"title": block["title"], "values": dict(zip(
+                block["keys"], [to_json_value(v) for v in block["values"]]))})
+        else:
+            sections.append({"title": block["title"],
+                "columns": block["columns"],
+                "rows": block["rows"]})
+        # endif #
+    # endfor #
+    # without indentation, the C encoder is used and the whole document is
+    # written at once
+    a_out.write(json.dumps({"title": a_heading, "sections": sections}))
+# enddef render_json() #
+
+def render_html(a_heading, a_blocks, a_out):
+    """ Function to render a report as an HTML page
+    Parameters:
+        a_heading (str): Heading of report, or None
+        a_blocks (list(dict)): Blocks made by lines_block() and table_block()
+        a_out (file): Buffer to write to
+    Returns:
+        None
+    """
+    esc = html.escape
+    parts = ["<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"]
+    if a_heading is not None:
+        parts.append("<title>{0}</title></head><body>\n<h1>{0}</h1>".format(
+            esc(a_heading)))
+    else:
+        parts.append("</head><body>")
+    # endif #
+    for block in a_blocks:
+        if block["title"] is not None:
+            parts.append("<h2>{}</h2>".format(esc(block["title"])))
+        # endif #
+        parts.append("<table>")
+        if block["kind"] == "lines":
+            for key, cell in zip(block["keys"], block["cells"]):
+                parts.append("<tr><th>{}</th><td>{}</td></tr>".format(
+                    esc(key), esc(cell)))
+            # endfor #
+        else:
+            parts.append("<tr>" + "".join("<th>{}</th>".format(esc(c))
+                for c in block["columns"]) + "</tr>")
+            for row in block["cells"]:
+                parts.append("<tr>" + "".join("<td>{}</td>".format(esc(v))
+                    for v in row) + "</tr>")
+            # endfor #
+        # endif #
+        parts.append("</table>")
+    # endfor #
+    parts.append("</body></html>\n")
+    a_out.write("\n".join(parts))
+# enddef render_html() #
+
+RENDERERS = {"text": render_text, "csv": render_csv, "json": render_json,
+        "html": render_html}
+
+def default_file_mode():
+    """ Function to get the permissions of files created with open()
+    Parameters:
+        None
+    Returns:
+        mode (int): Permission bits left by the umask of the process
+    """
+    # the umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+# enddef default_file_mode() #
+
+# read once, as the umask is briefly changed while reading it
+FILE_MODE = default_file_mode()
+
+def atomic_write(a_file, a_contents):
+    """ Function to replace a file in one step, so that readers never see a
+    partially written file
+    Parameters:
+        a_file (str): Name of file to write
+        a_contents (str): Contents of file
+    Returns:
+        None
+    """
+    # unique per call, as threads of one process may write the same file
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(a_file) or ".",
+            prefix=os.path.basename(a_file) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            f.write(a_contents)
+        # endwith #
+        # mkstemp() creates private files, reports are as readable as others
+        os.chmod(tmp_file, FILE_MODE)
+        os.replace(tmp_file, a_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    # endtry #
+# enddef atomic_write() #
+
+def report_files(a_report_file, a_formats=("text",)):
+    """ Function to get the file name of each format of a report
+    Parameters:
+        a_report_file (str): Name of the text report; other formats replace
+            its extension with theirs
+        a_formats (tuple(str)): Formats, out of FORMATS
+    Returns:
+        files (dict): File name per format; a ValueError is raised if two
+            formats would be written to the same file, e.g. for a text
+            report named "report.csv" that is also written as CSV
+    """
+    for fmt in a_formats:
+        if fmt not in FORMATS:
+            raise ValueError("Unknown report format: {}".format(fmt))
+        # endif #
+    # endfor #
+    stem = os.path.splitext(a_report_file)[0]
+    files = dict((f, a_report_file if f == "text" else stem + EXTENSIONS[f])
+            for f in a_formats)
+    if len(set(files.values())) < len(files):
+        raise ValueError("Report file {} would be overwritten by ".format(
+            a_report_file) + "another format; use another extension, " +
+            "such as .txt")
+    # endif #
+    return files
+# enddef report_files() #
+
+def write_report(a_report_file, a_heading, a_blocks, a_formats=("text",)):
+    """ Function to write a report in one or more formats
+    Parameters:
+        a_report_file (str): Name of the text report, see report_files()
+        a_heading (str): Heading of report, or None
+        a_blocks (list(dict)): Blocks made by lines_block() and table_block();
+            values are formatted once, however many formats are written
+        a_formats (tuple(str)): Formats, out of FORMATS
+    Returns:
+        files (dict): File name per format written
+    """
+    files = report_files(a_report_file, a_formats)
+    for fmt, report_file in files.items():
+        out = io.StringIO()
+        RENDERERS[fmt](a_heading, a_blocks, out)
+        atomic_write(report_file, out.getvalue())
+    # endfor #
+    return files
+# enddef write_report() #
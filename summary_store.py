@@ -0,0 +1,276 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To keep per-period summaries together with running totals
+License: GPLv3+
+"""
+
+import os
+import json
+import pandas as pd
+
+SUMMARY_HEADER = ("Time period,Income [$],Expenses [$],Utilized savings [$]," +
+        "Unutilzed savings [$],pct-savings [%]," +
+        "Savings utilization ratio [%]\n")
+TOTAL_KEYS = ("income", "expenses", "savings")
+
+def totals_file(a_summary_file):
+    """ Function to get the name of the running-totals file of a summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        totals_file (str): Filename containing the running totals
+    """
+    return a_summary_file + ".totals.json"
+# enddef totals_file() #
+
+def categories_file(a_summary_file):
+    """ Function to get the name of the category dictionary file of a summary
+    file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        categories_file (str): Filename containing the category dictionary
+            shared by compact transactions of all periods
+    """
+    return a_summary_file + ".categories.json"
+# enddef categories_file() #
+
+def read_categories(a_summary_file):
+    """ Function to read the category dictionary shared by all periods
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        categories (list of strings): Categories in the order of their codes,
+            empty if none were stored yet
+    """
+    try:
+        with open(categories_file(a_summary_file)) as cf:
+            return json.load(cf)
+        # endwith #
+    except (FileNotFoundError, ValueError):
+        return []
+    # endtry #
+# enddef read_categories() #
+
+def save_categories(a_summary_file, a_categories):
+    """ Function to store the category dictionary next to the summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_categories (list of strings): Categories, see read_categories();
+            categories are only ever appended, so codes stay stable
+    Returns:
+        None
+    """
+    tmp_file = categories_file(a_summary_file) + ".tmp"
+    with open(tmp_file, 'w') as cf:
+        json.dump(list(a_categories), cf)
+    # endwith #
+    os.replace(tmp_file, categories_file(a_summary_file))
+# enddef save_categories() #
+
+def to_cents(a_amount):
+    """ Function to convert an amount in $ to integer cents
+    Parameters:
+        a_amount (float): Amount in $
+    Returns:
+        cents (int): Amount in cents
+    """
+    return int(round(100.0 * a_amount))
+# enddef to_cents() #
+
+def file_signature(a_file):
+    """ Function to get the size and modification time of a file
+    Parameters:
+        a_file (str): Name of file
+    Returns:
+        signature (list): [size in bytes, modification time in ns]
+    """
+    stat = os.stat(a_file)
+    return [stat.st_size, stat.st_mtime_ns]
+# enddef file_signature() #
+
+def save_totals(a_summary_file, a_totals):
+    """ Function to store running totals next to the summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_totals (dict): Running totals, see read_totals()
+    Returns:
+        None
+    """
+    a_totals["signature"] = file_signature(a_summary_file)
+    tmp_file = totals_file(a_summary_file) + ".tmp"
+    with open(tmp_file, 'w') as tf:
+        json.dump(a_totals, tf)
+    # endwith #
+    os.replace(tmp_file, totals_file(a_summary_file))
+# enddef save_totals() #
+
+def read_periods(a_summary_file):
+    """ Function to read the per-period rows of a summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+    Returns:
+        summary_df (DataFrame): One row per period; "Total" lines appended
+            by older versions are skipped
+    """
+    summary_df = pd.read_csv(a_summary_file, skip_blank_lines=True)
+    period_col = summary_df.columns[0]
+    summary_df = summary_df[summary_df[period_col].astype(str) != "Total"]
+    return summary_df.reset_index(drop=True)
+# enddef read_periods() #
+
+def rebuild_totals(a_summary_file, a_save=True):
+    """ Function to recompute running totals by scanning the summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_save (bool): Whether to store the recomputed totals next to the
+            summary file
+    Returns:
+        totals (dict): Running totals, see read_totals()
+    """
+    summary_df = read_periods(a_summary_file)
+    totals = {"n_periods": int(summary_df.shape[0])}
+    for key, col in zip(TOTAL_KEYS, summary_df.columns[1:4]):
+        totals[key] = int(summary_df[col].map(to_cents).sum())
+    # endfor #
+    if a_save:
+        save_totals(a_summary_file, totals)
+    # endif #
+    return totals
+# enddef rebuild_totals() #
+
+def read_totals(a_summary_file, a_save=True):
+    """ Function to read running totals of all periods in a summary file
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_save (bool): Whether to store the totals if they had to be
+            recomputed; readers that may run concurrently pass False
+    Returns:
+        totals (dict): "n_periods" and the total "income", "expenses" and
+            "savings" in cents over all periods; the net worth after the
+            last period is the initial net worth + income - expenses
+    """
+    try:
+        with open(totals_file(a_summary_file)) as tf:
+            totals = json.load(tf)
+        # endwith #
+    except (FileNotFoundError, ValueError):
+        return rebuild_totals(a_summary_file, a_save)
+    # endtry #
+    # the summary file was modified behind our back
+    if totals.get("signature") != file_signature(a_summary_file):
+        return rebuild_totals(a_summary_file, a_save)
+    # endif #
+    return totals
+# enddef read_totals() #
+
+def append_period(a_summary_file, a_period, a_tot_inc, a_tot_exp, a_tot_sav,
+        a_xtra_sav, a_sav_pct, a_sav_util, a_reset=False):
+    """ Function to append one period to the summary file and update the
+    running totals without rescanning earlier periods
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_period (str): Time period
+        a_tot_inc (float): Total income of the period
+        a_tot_exp (float): Total expenses of the period
+        a_tot_sav (float): Utilized savings of the period
+        a_xtra_sav (float): Unutilized savings of the period
+        a_sav_pct (float): Net savings as a % of income
+        a_sav_util (float): Net savings utilization ratio
+        a_reset (bool): Whether to start a new summary file
+    Returns:
+        totals (dict): Updated running totals, see read_totals()
+    """
+    if a_reset or not os.path.exists(a_summary_file):
+        with open(a_summary_file,'w') as sf:
+            sf.write(SUMMARY_HEADER)
+        # endwith #
+        totals = dict({"n_periods": 0}, **dict.fromkeys(TOTAL_KEYS, 0))
+    else:
+        totals = read_totals(a_summary_file)
+    # endif #
+    values = ["{:.2f}".format(v) for v in (a_tot_inc, a_tot_exp, a_tot_sav,
+        a_xtra_sav, a_sav_pct, a_sav_util)]
+    with open(a_summary_file,'a') as sf:
+        sf.write(",".join([str(a_period)] + values) + "\n")
+    # endwith #
+    # accumulate the amounts as written to the file, so that the totals
+    # match a rescan of the file exactly
+    totals["n_periods"] += 1
+    for key, value in zip(TOTAL_KEYS, values):
+        totals[key] += to_cents(float(value))
+    # endfor #
+    save_totals(a_summary_file, totals)
+    return totals
+# enddef append_period() #
+
+def replace_period(a_summary_file, a_period, a_tot_inc, a_tot_exp, a_tot_sav,
+        a_xtra_sav, a_sav_pct, a_sav_util, a_sorted=False):
+    """ Function to replace the row of a period in the summary file, or to
+    add it if the period is new, and update the running totals
+    Parameters:
+        a_summary_file (str): Filename containing period summary for
+            different periods
+        a_period (str): Time period
+        a_tot_inc (float): Total income of the period
+        a_tot_exp (float): Total expenses of the period
+        a_tot_sav (float): Utilized savings of the period
+        a_xtra_sav (float): Unutilized savings of the period
+        a_sav_pct (float): Net savings as a % of income
+        a_sav_util (float): Net savings utilization ratio
+        a_sorted (bool): Whether a new period is inserted before the first
+            period whose name sorts after it, like glob_periods() orders
+            sheets, instead of being appended
+    Returns:
+        totals (dict): Updated running totals, see read_totals()
+    """
+    prefix = str(a_period) + ","
+    lines = []
+    if os.path.exists(a_summary_file):
+        with open(a_summary_file) as sf:
+            lines = sf.readlines()
+        # endwith #
+    # endif #
+    rows = [k for k, line in enumerate(lines) if line.startswith(prefix)]
+    later = []
+    if not rows and a_sorted:
+        later = [k for k, line in enumerate(lines[1:], 1) if line.strip() and
+                line.split(",", 1)[0] > str(a_period)]
+    # endif #
+    if not rows and not later:
+        return append_period(a_summary_file, a_period, a_tot_inc, a_tot_exp,
+                a_tot_sav, a_xtra_sav, a_sav_pct, a_sav_util)
+    # endif #
+    totals = read_totals(a_summary_file)
+    values = ["{:.2f}".format(v) for v in (a_tot_inc, a_tot_exp, a_tot_sav,
+        a_xtra_sav, a_sav_pct, a_sav_util)]
+    new_line = ",".join([str(a_period)] + values) + "\n"
+    if rows:
+        old_values = lines[rows[0]].rstrip("\n").split(",")[1:]
+        lines[rows[0]] = new_line
+    else:
+        old_values = ["0"] * len(TOTAL_KEYS)
+        lines.insert(later[0], new_line)
+        totals["n_periods"] += 1
+    # endif #
+    for key, old, new in zip(TOTAL_KEYS, old_values, values):
+        totals[key] += to_cents(float(new)) - to_cents(float(old))
+    # endfor #
+    tmp_file = a_summary_file + ".tmp"
+    with open(tmp_file, 'w') as sf:
+        sf.writelines(lines)
+    # endwith #
+    os.replace(tmp_file, a_summary_file)
+    save_totals(a_summary_file, totals)
+    return totals
+# enddef replace_period() #
@@ -0,0 +1,113 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import async_pipeline
+import batch_analysis
+import collate_all_periods
+
+class Test_run_pipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.periods = []
+        with open("Transactions.csv") as tf:
+            contents = tf.read()
+        # endwith #
+        for k, name in enumerate(["2000-12", "2001-01", "2001-02", "2001-03"]):
+            tx_file = os.path.join(self.tmp_dir, name + ".csv")
+            # a different paycheck in every period
+            with open(tx_file, 'w') as tf:
+                tf.write(contents.replace('"$1,500.00"',
+                    '"${:,.2f}"'.format(1500.0 + 250.0 * k)))
+            # endwith #
+            self.periods.append((name, tx_file))
+        # endfor #
+        for run in ["serial", "pipeline"]:
+            os.mkdir(os.path.join(self.tmp_dir, run))
+        # endfor #
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def read_outputs(self, a_run):
+        run_dir = os.path.join(self.tmp_dir, a_run)
+        outputs = {}
+        for name in sorted(os.listdir(run_dir)):
+            if name.endswith(".png"):
+                continue
+            # endif #
+            with open(os.path.join(run_dir, name)) as f:
+                outputs[name] = f.read()
+            # endwith #
+            if name.endswith(".totals.json"):
+                # the signature holds the modification time of the summary
+                outputs[name] = json.loads(outputs[name])
+                del outputs[name]["signature"]
+            # endif #
+        # endfor #
+        return outputs
+    # enddef read_outputs() #
+
+    def test_same_as_serial(self):
+        serial_dir = os.path.join(self.tmp_dir, "serial")
+        pipeline_dir = os.path.join(self.tmp_dir, "pipeline")
+        batch_analysis.main(self.periods,
+                os.path.join(serial_dir, "summary.csv"), serial_dir,
+                a_plots=False)
+        # a queue of one keeps every stage waiting on the next one
+        async_pipeline.main(self.periods,
+                os.path.join(pipeline_dir, "summary.csv"), pipeline_dir,
+                a_jobs=1, a_queue_size=1, a_plots=False)
+        serial = self.read_outputs("serial")
+        self.assertIn("2001-02_report.txt", serial)
+        self.assertIn("summary.csv", serial)
+        self.assertEqual(self.read_outputs("pipeline"), serial)
+    # enddef test_same_as_serial() #
+
+    def test_process_pool(self):
+        serial_dir = os.path.join(self.tmp_dir, "serial")
+        pipeline_dir = os.path.join(self.tmp_dir, "pipeline")
+        batch_analysis.main(self.periods,
+                os.path.join(serial_dir, "summary.csv"), serial_dir,
+                a_plots=False)
+        async_pipeline.main(self.periods,
+                os.path.join(pipeline_dir, "summary.csv"), pipeline_dir,
+                a_jobs=2, a_queue_size=1)
+        serial = self.read_outputs("serial")
+        self.assertIn("2000-12,4000.00,", serial["summary.csv"])
+        self.assertIn("2001-03,4750.00,", serial["summary.csv"])
+        # reports and summary rows come out in period order
+        self.assertEqual(self.read_outputs("pipeline"), serial)
+        # plots are written next to the reports
+        self.assertTrue(os.path.exists(os.path.join(pipeline_dir,
+            "Plot_Income_2001-03.png")))
+    # enddef test_process_pool() #
+
+    def test_collate_tables(self):
+        tx_files = [tx_file for _, tx_file in self.periods]
+        serial = collate_all_periods.read_tx_files(tx_files)
+        cache_dir = os.path.join(self.tmp_dir, "cache")
+        for jobs, queue_size, cache in [(1, 1, None), (2, 1, None),
+                (2, 4, cache_dir)]:
+            # tables of each file come out in the order of the files
+            tables = async_pipeline.read_tables(tx_files, jobs, queue_size,
+                    cache)
+            self.assertEqual([t[0]['Amount [$]'].iloc[0] for t in tables],
+                    [1500.0, 1750.0, 2000.0, 2250.0])
+            pipelined = collate_all_periods.read_tx_files(tx_files, jobs,
+                    cache, a_pipeline=True)
+            for s, p in zip(serial, pipelined):
+                pd.testing.assert_frame_equal(s, p)
+            # endfor #
+        # endfor #
+    # enddef test_collate_tables() #
+# endclass Test_run_pipeline #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
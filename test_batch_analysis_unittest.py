@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+import batch_analysis
+import summary_store
+
+class Test_read_manifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manifest_file = os.path.join(self.tmp_dir, "manifest.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_read_manifest(self):
+        with open(self.manifest_file, 'w') as mf:
+            mf.write("# period,file\n2000-12, Dec.csv\n\n2001-01,/tmp/Jan.csv\n")
+        # endwith #
+        periods = batch_analysis.read_manifest(self.manifest_file)
+        # manifest order is kept and relative paths follow the manifest
+        self.assertEqual(periods,
+                [("2000-12", os.path.join(self.tmp_dir, "Dec.csv")),
+                ("2001-01", "/tmp/Jan.csv")])
+    # enddef test_read_manifest() #
+
+    def test_glob_periods(self):
+        for name in ["2001-01.csv", "2000-12.csv"]:
+            shutil.copy("Transactions.csv", os.path.join(self.tmp_dir, name))
+        # endfor #
+        periods = batch_analysis.glob_periods(
+                os.path.join(self.tmp_dir, "*.csv"))
+        self.assertEqual([p for p, _ in periods], ["2000-12", "2001-01"])
+    # enddef test_glob_periods() #
+# endclass Test_read_manifest #
+
+class Test_main(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "summary.csv")
+        with open("Transactions.csv") as tf:
+            contents = tf.read()
+        # endwith #
+        # not in sorted order, with a different paycheck in every period
+        self.paychecks = [("2001-03", 1750.0), ("2000-12", 1500.0),
+                ("2001-02", 3000.0), ("2001-01", 1250.0)]
+        self.periods = []
+        for name, paycheck in self.paychecks:
+            tx_file = os.path.join(self.tmp_dir, name + ".csv")
+            with open(tx_file, 'w') as tf:
+                tf.write(contents.replace('"$1,500.00"',
+                    '"${:,.2f}"'.format(paycheck)))
+            # endwith #
+            self.periods.append((name, tx_file))
+        # endfor #
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_parallel_main(self):
+        batch_analysis.main(self.periods, self.summary_file, self.tmp_dir,
+                a_jobs=2)
+        summary_df = summary_store.read_periods(self.summary_file)
+        # rows are in manifest order, with the bonus of $2,500 on top of the
+        # paycheck of their own period
+        self.assertEqual(summary_df["Time period"].tolist(),
+                [p for p, _ in self.paychecks])
+        self.assertEqual(summary_df["Income [$]"].tolist(),
+                [c + 2500.0 for _, c in self.paychecks])
+        self.assertEqual(summary_df["Expenses [$]"].tolist(), [5460.0] * 4)
+        for name, _ in self.paychecks:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+                name + "_report.txt")))
+            # plots are written next to the reports, not to the working dir
+            plot_file = "Plot_Income_" + name + ".png"
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+                plot_file)))
+            self.assertFalse(os.path.exists(plot_file))
+        # endfor #
+    # enddef test_parallel_main() #
+# endclass Test_main #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
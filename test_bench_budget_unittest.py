@@ -0,0 +1,59 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import warnings
+import bench_budget
+
+class Test_bench_budget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_main(self):
+        output = os.path.join(self.tmp_dir, "results.json")
+        with warnings.catch_warnings():
+            # random sheets may overspend
+            warnings.simplefilter('ignore')
+            regressions = bench_budget.main([50], a_n_periods=2,
+                    a_n_categories=5, a_repeats=1, a_data_dir=self.tmp_dir,
+                    a_output=output)
+        # endwith #
+        self.assertEqual(regressions, [])
+        with open(output) as of:
+            results = json.load(of)
+        # endwith #
+        stages = results["rows=50 periods=2 categories=5"]
+        self.assertEqual(list(stages), bench_budget.STAGES)
+        for result in stages.values():
+            self.assertGreaterEqual(result["time [s]"], 0.0)
+            self.assertGreater(result["peak memory [MB]"], 0.0)
+        # endfor #
+        # generated sheets are kept for the next run
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+            "rows50_periods2_cats5", "manifest.csv")))
+    # enddef test_main() #
+
+    def test_compare(self):
+        baseline = {"size": {"read_tx_file": {"time [s]": 1.0,
+            "peak memory [MB]": 10.0}}}
+        results = {"size": {"read_tx_file": {"time [s]": 1.1,
+            "peak memory [MB]": 13.0}, "collate": {"time [s]": 5.0,
+                "peak memory [MB]": 1.0}}}
+        regressions = bench_budget.compare(results, baseline, 0.2)
+        # only memory grew by more than 20%; stages missing from the
+        # baseline are not compared
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("peak memory [MB]", regressions[0])
+    # enddef test_compare() #
+# endclass Test_bench_budget #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import budget_analysis
+import binary_ledger
+
+class Test_binary_ledger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ledger = os.path.join(self.tmp_dir, "ledger")
+        binary_ledger.export_tx_files(self.ledger,
+                [("Jan", "Transactions.csv"), ("Feb", "Transactions.csv")])
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_open_ledger(self):
+        records, meta = binary_ledger.open_ledger(self.ledger)
+        self.assertIsInstance(records, np.memmap)
+        self.assertEqual(meta["periods"], ["Jan", "Feb"])
+        self.assertEqual(meta["offsets"], [0, 7, 14])
+        self.assertEqual(os.path.getsize(self.ledger + ".bin"),
+                14 * binary_ledger.LEDGER_DTYPE.itemsize)
+        self.assertEqual(records['date'][0], np.datetime64('2000-12-01'))
+        self.assertEqual(records['cents'][:7].sum(), 1446000)
+        # periods cannot be appended twice
+        with self.assertRaises(ValueError):
+            binary_ledger.export_tx_files(self.ledger,
+                    [("Feb", "Transactions.csv")])
+        # endwith #
+    # enddef test_open_ledger() #
+
+    def test_period_totals(self):
+        records, meta = binary_ledger.open_ledger(self.ledger)
+        totals_df = binary_ledger.period_totals(records, meta, 100.0)
+        self.assertEqual(totals_df.index.tolist(), ["Jan", "Feb"])
+        self.assertEqual(totals_df["Income [$]"].tolist(), [4000.0, 4000.0])
+        self.assertEqual(totals_df["Savings [$]"].tolist(), [5000.0, 5000.0])
+        self.assertEqual(totals_df["Net worth [$]"].tolist(),
+                [-1360.0, -2820.0])
+    # enddef test_period_totals() #
+
+    def test_category_totals(self):
+        records, meta = binary_ledger.open_ledger(self.ledger)
+        tables = budget_analysis.read_tx_file("Transactions.csv")
+        for kind, table in zip(binary_ledger.KINDS, tables):
+            pd.testing.assert_frame_equal(binary_ledger.category_totals(
+                records, meta, kind, ["Feb"]),
+                budget_analysis.categorize_tx(table))
+        # endfor #
+        grouped = binary_ledger.category_totals(records, meta, "expenses")
+        self.assertEqual(grouped['Amount [$]'].tolist(), [10014.0, 6.0, 900.0])
+    # enddef test_category_totals() #
+# endclass Test_binary_ledger #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
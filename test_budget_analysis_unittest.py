@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
+import warnings
 import unittest
+import numpy as np
 import pandas as pd
 import budget_analysis
+import summary_store
 
 class Test_read_tx_file(unittest.TestCase):
 
@@ -45,6 +51,124 @@ class Test_read_tx_file(unittest.TestCase):
         self.assertEqual(inc['Amount'].tolist(),
                 [1500.0], "Amounts names should be [1500.0]")
     # enddef test_nonempty_file_read_tx_file() #
+
+    def test_skipfooter_read_tx_file(self):
+        # skipping the trailing "#N/A" filler rows should not change anything
+        inc, exp, sav = budget_analysis.read_tx_file("Transactions.csv")
+        inc_f, exp_f, sav_f = budget_analysis.read_tx_file("Transactions.csv",
+                a_skipfooter=2)
+        self.assertTrue(inc.equals(inc_f))
+        self.assertTrue(exp.equals(exp_f))
+        self.assertTrue(sav.equals(sav_f))
+        # amounts such as "$1,500.00" should be parsed into floats
+        self.assertEqual(inc['Amount [$]'].tolist(), [1500.0, 2500.0])
+        self.assertEqual(sav['Amount [$]'].tolist(), [5000.0])
+    # enddef test_skipfooter_read_tx_file() #
+
+    def test_currency_symbol_in_text(self):
+        # only amounts lose the "$"; a quoted multi-line description and
+        # blank lines must not shift the footer
+        tmp_dir = tempfile.mkdtemp()
+        tx_file = os.path.join(tmp_dir, "tx.csv")
+        with open(tx_file, 'w') as tf:
+            tf.write("\n\n\n"
+                    "Category,Amount,Category,Amount,Category,Amount\n"
+                    "Fun $,\"$1,000.50\",Pay $,$20.00,,\n"
+                    "Food,$5.00,,,,\n\n"
+                    "\"Rent\nand $ more\",$7.00,,,,\n\n"
+                    "Total,see $ sheet,,,,\n\n")
+        # endwith #
+        try:
+            inc, exp, sav = budget_analysis.read_tx_file(tx_file,
+                    a_skipfooter=1)
+            self.assertEqual(exp['Category'].tolist(),
+                    ['Fun $', 'Food', 'Rent\nand $ more'])
+            self.assertEqual(exp['Amount [$]'].tolist(), [1000.5, 5.0, 7.0])
+            self.assertEqual(inc['Category'].tolist(), ['Pay $'])
+            self.assertEqual(len(sav), 0)
+            chunked = budget_analysis.categorize_tx_file_chunked(tx_file,
+                    a_chunksize=1, a_skipfooter=1)
+            pd.testing.assert_frame_equal(chunked[1],
+                    budget_analysis.categorize_tx(exp))
+            # the footer is no amount
+            with self.assertRaises(ValueError):
+                budget_analysis.read_tx_file(tx_file)
+            # endwith #
+        finally:
+            shutil.rmtree(tmp_dir)
+        # endtry #
+    # enddef test_currency_symbol_in_text() #
+
+    def test_marked_amounts(self):
+        # amounts are parsed by the C parser, categories keep their "$" and
+        # negative amounts fall back to parsing text
+        tmp_dir = tempfile.mkdtemp()
+        tx_file = os.path.join(tmp_dir, "tx.csv")
+        try:
+            for neg, amounts in [("", [1000.5, 5.0]), ("-", [-1000.5, 5.0])]:
+                with open(tx_file, 'w') as tf:
+                    tf.write("\n\n\n"
+                            "Category,Amount,Category,Amount,Category,Amount\n"
+                            "$5 gift,\"" + neg + "$1,000.50\",,,Fun $,$3.00\n"
+                            "Food,$5.00,,,,\n")
+                # endwith #
+                inc, exp, sav = budget_analysis.read_tx_file(tx_file)
+                self.assertEqual(exp['Category'].tolist(), ['$5 gift', 'Food'])
+                self.assertEqual(exp['Amount [$]'].tolist(), amounts)
+                self.assertEqual(sav['Category'].tolist(), ['Fun $'])
+                self.assertEqual(len(inc), 0)
+            # endfor #
+        finally:
+            shutil.rmtree(tmp_dir)
+        # endtry #
+    # enddef test_marked_amounts() #
+
+    def test_amount_mark_in_text(self):
+        # text holding the mark itself is parsed as text, and text that
+        # pandas reads as missing is dropped on either path
+        tmp_dir = tempfile.mkdtemp()
+        tx_file = os.path.join(tmp_dir, "tx.csv")
+        try:
+            for mark in ["", "\v"]:
+                with open(tx_file, 'w') as tf:
+                    tf.write("\n\n\n"
+                            "Category,Amount,Category,Amount,Category,Amount\n"
+                            "Tab" + mark + " $,$1.00,NA,$2.00,,\n"
+                            "$ Food,$5.00,Pay,$3.00,,\n")
+                # endwith #
+                inc, exp, sav = budget_analysis.read_tx_file(tx_file)
+                self.assertEqual(exp['Category'].tolist(),
+                        ['Tab' + mark + ' $', '$ Food'])
+                self.assertEqual(exp['Amount [$]'].tolist(), [1.0, 5.0])
+                self.assertEqual(inc['Category'].tolist(), ['Pay'])
+                self.assertEqual(inc['Amount [$]'].tolist(), [3.0])
+                self.assertEqual(len(sav), 0)
+            # endfor #
+        finally:
+            shutil.rmtree(tmp_dir)
+        # endtry #
+    # enddef test_amount_mark_in_text() #
+
+    def test_no_mixed_type_categories(self):
+        # an income table that ends early must not make pandas guess the
+        # type of its categories per chunk of rows
+        tmp_dir = tempfile.mkdtemp()
+        tx_file = os.path.join(tmp_dir, "tx.csv")
+        with open(tx_file, 'w') as tf:
+            tf.write("\n\n\nCategory,Amount,Category,Amount,Category,Amount\n"
+                    "Food,$1.00,Pay,$2.00,,\n" + "Food,$1.00,,,,\n" * 150000)
+        # endwith #
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', pd.errors.DtypeWarning)
+                inc, exp, sav = budget_analysis.read_tx_file(tx_file)
+            # endwith #
+            self.assertEqual(inc['Category'].tolist(), ['Pay'])
+            self.assertEqual(len(exp), 150001)
+        finally:
+            shutil.rmtree(tmp_dir)
+        # endtry #
+    # enddef test_no_mixed_type_categories() #
 # endclass Test_read_tx_file #
 
 class Test_categorize_tx(unittest.TestCase):
@@ -78,8 +202,160 @@ class Test_categorize_tx(unittest.TestCase):
                 [91.7032967032967, 0.054945054945054944, 8.241758241758241],
                 "Amounts names should be [91.703297,0.054945,8.241758]")
     # enddef test_nonempty_tx_categorize_tx() #
+
+    def test_chunked_categorize_tx_file(self):
+        grouped = [budget_analysis.categorize_tx(t)
+                for t in budget_analysis.read_tx_file("Transactions.csv")]
+        # chunks smaller than each table should give the same totals
+        chunked = budget_analysis.categorize_tx_file_chunked(
+                "Transactions.csv", a_chunksize=2)
+        for g, c in zip(grouped, chunked):
+            pd.testing.assert_frame_equal(g, c)
+        # endfor #
+    # enddef test_chunked_categorize_tx_file() #
+
+    def test_compact_categorize_tx(self):
+        categories = []
+        inc, exp, _ = budget_analysis.read_tx_file("Transactions.csv")
+        compact_exp = budget_analysis.compact_tx(exp, categories)
+        compact_inc = budget_analysis.compact_tx(inc, categories)
+        # one category dictionary is shared by both tables
+        self.assertEqual(categories, ['Gifts', 'Transportation', 'Utilities',
+            'Bonus', 'Paycheck'])
+        self.assertEqual(compact_inc['Category'].cat.categories.tolist(),
+                categories)
+        self.assertEqual(compact_exp['Amount [cents]'].tolist(),
+                [10000, 500700, 35000, 300])
+        grouped_exp = budget_analysis.categorize_tx(compact_exp)
+        self.assertEqual(grouped_exp.index.tolist(),
+                ['Gifts',  'Transportation', 'Utilities'])
+        self.assertEqual(grouped_exp['Amount [cents]'].tolist(),
+                [500700, 300, 45000])
+        pd.testing.assert_frame_equal(budget_analysis.to_dollars(grouped_exp),
+                budget_analysis.categorize_tx(exp), check_index_type=False)
+    # enddef test_compact_categorize_tx() #
+
+    def test_rollup_categories(self):
+        tx = pd.DataFrame({'Category': ['Utilities:Electric:Peak',
+            'Utilities:Electric:OffPeak', 'Utilities', 'Utilities:Water',
+            'Food:Dining'], 'Amount [$]': [10.0, 5.0, 1.0, 4.0, 30.0]})
+        grouped = budget_analysis.categorize_tx(tx)
+        rolled = budget_analysis.rollup_categories(grouped)
+        self.assertEqual(rolled.index.tolist(), ['Food', 'Food:Dining',
+            'Utilities', 'Utilities:Electric', 'Utilities:Electric:OffPeak',
+            'Utilities:Electric:Peak', 'Utilities:Water'])
+        self.assertEqual(rolled['Amount [$]'].tolist(),
+                [30.0, 30.0, 20.0, 15.0, 5.0, 10.0, 4.0])
+        self.assertEqual(rolled['Depth'].tolist(), [1, 2, 1, 2, 3, 3, 2])
+        # "Utilities" itself is shallower than depth 2, so it stays
+        rolled = budget_analysis.rollup_categories(grouped, 2)
+        self.assertEqual(rolled.index.tolist(), ['Food:Dining', 'Utilities',
+            'Utilities:Electric', 'Utilities:Water'])
+        self.assertEqual(rolled['Contribution [%]'].tolist(),
+                [60.0, 2.0, 30.0, 8.0])
+        # compact transactions keep integer cents
+        compact = budget_analysis.categorize_tx(
+                budget_analysis.compact_tx(tx, []))
+        rolled = budget_analysis.rollup_categories(compact, 1)
+        self.assertEqual(rolled['Amount [cents]'].tolist(), [3000, 2000])
+        for depth in [0, -1]:
+            with self.assertRaises(ValueError):
+                budget_analysis.rollup_categories(grouped, depth)
+            # endwith #
+        # endfor #
+    # enddef test_rollup_categories() #
+
+    def test_split_tx_by_period(self):
+        inc, exp, sav = budget_analysis.read_tx_file("Transactions.csv",
+                a_date_col='Date')
+        # move the bonus and the gift into January
+        inc.loc[1, 'Date'] = exp.loc[1, 'Date'] = "1/5/2001"
+        dates = budget_analysis.parse_dates(exp['Date'])
+        self.assertEqual(dates.dt.month.tolist(), [12, 1, 12, 12])
+        periods = budget_analysis.split_tx_by_period((inc, exp, sav))
+        self.assertEqual(list(periods), ['2000-12', '2001-01'])
+        self.assertEqual(periods['2001-01'][1]['Amount [$]'].tolist(),
+                [5007.0])
+        pd.testing.assert_frame_equal(periods['2000-12'][1],
+                budget_analysis.categorize_tx(exp.drop(index=1)[['Category',
+                    'Amount [$]']]))
+        # there were no savings in January
+        self.assertEqual(periods['2001-01'][2].shape, (0, 2))
+        periods = budget_analysis.split_tx_by_period((inc, exp, sav), 'year')
+        self.assertEqual(list(periods), ['2000', '2001'])
+    # enddef test_split_tx_by_period() #
 # endclass Test_categorize_tx #
 
+class Test_write_reports(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+        self.report_file = os.path.join(self.tmp_dir, "P1_report.txt")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_compact_no_income(self):
+        inc, exp, sav = budget_analysis.read_tx_file("Transactions.csv")
+        for compact in [False, True]:
+            tables = (inc.iloc[:0], exp.iloc[:0], sav)
+            if compact:
+                categories = []
+                tables = [budget_analysis.compact_tx(t, categories)
+                        for t in tables]
+            # endif #
+            grouped = [budget_analysis.categorize_tx(t) for t in tables]
+            budget_analysis.write_reports(self.report_file, "P1", *grouped,
+                    self.summary_file, a_reset_summary=True)
+            summary_df = summary_store.read_periods(self.summary_file)
+            self.assertEqual(summary_df["Income [$]"].tolist(), [0.0])
+            self.assertTrue(np.isnan(summary_df["pct-savings [%]"][0]))
+            self.assertEqual(summary_df["Savings utilization ratio [%]"][0],
+                    np.inf)
+        # endfor #
+    # enddef test_compact_no_income() #
+
+    def test_shared_categories(self):
+        budget_analysis.main("Transactions.csv", "P1", self.report_file,
+                self.summary_file, a_plots=False, a_compact=True)
+        categories = summary_store.read_categories(self.summary_file)
+        self.assertEqual(sorted(categories), ['Bonus', 'Gifts', 'Paycheck',
+            'Transportation', 'Utilities', 'savings a/c'])
+        # a second period keeps the codes of the first
+        budget_analysis.main("Transactions.csv", "P2", self.report_file,
+                self.summary_file, a_plots=False, a_compact=True)
+        self.assertEqual(summary_store.read_categories(self.summary_file),
+                categories)
+    # enddef test_shared_categories() #
+
+    def test_analyze_ledger(self):
+        periods = budget_analysis.analyze_ledger("Transactions.csv",
+                a_report_dir=self.tmp_dir, a_summary_file=self.summary_file)
+        self.assertEqual(periods, ['2000-12'])
+        # reports and plots of each period go to the report dir
+        for name in ["2000-12_report.txt", "Plot_Expenses_2000-12.png"]:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, name)))
+        # endfor #
+    # enddef test_analyze_ledger() #
+
+    def test_analyze_ledger_sorted(self):
+        grouped = [budget_analysis.categorize_tx(t) for t in
+                budget_analysis.read_tx_file("Transactions.csv")]
+        budget_analysis.write_reports(self.report_file, "2001-01", *grouped,
+                self.summary_file)
+        # an earlier period of the ledger goes before the existing one
+        budget_analysis.analyze_ledger("Transactions.csv",
+                a_report_dir=self.tmp_dir, a_summary_file=self.summary_file,
+                a_plots=False)
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(summary_df.iloc[:, 0].tolist(),
+                ['2000-12', '2001-01'])
+    # enddef test_analyze_ledger_sorted() #
+# endclass Test_write_reports #
+
 class Test_main(unittest.TestCase):
 
     def test_empty_file_main(self):
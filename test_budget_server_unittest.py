@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+import budget_analysis
+import budget_server
+import load_test
+import summary_store
+
+class Test_LRUCache(unittest.TestCase):
+
+    def test_get(self):
+        cache = budget_server.LRUCache(2)
+        self.assertEqual(cache.get("a", lambda: b"1"), b"1")
+        self.assertEqual(cache.get("b", lambda: b"2"), b"2")
+        # "a" was used more recently than "b", so "b" is evicted
+        self.assertEqual(cache.get("a", lambda: b"x"), b"1")
+        cache.get("c", lambda: b"3")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+    # enddef test_get() #
+
+    def test_concurrent_misses(self):
+        cache = budget_server.LRUCache(2)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return b"1"
+        # enddef compute() #
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            cache.get("a", compute))) for _ in range(8)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        # endfor #
+        release.set()
+        for thread in threads:
+            thread.join()
+        # endfor #
+        # one computation serves all concurrent misses
+        self.assertEqual((len(calls), results), (1, [b"1"] * 8))
+        self.assertEqual((cache.hits, cache.misses), (7, 1))
+        # a failed computation is not cached
+        with self.assertRaises(ZeroDivisionError):
+            cache.get("b", lambda: 1 / 0)
+        # endwith #
+        self.assertEqual(cache.get("b", lambda: b"2"), b"2")
+    # enddef test_concurrent_misses() #
+# endclass Test_LRUCache #
+
+class Test_budget_server(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+        for period in ["2000-12", "2001-01"]:
+            tx_file = os.path.join(self.tmp_dir, period + ".csv")
+            shutil.copy("Transactions.csv", tx_file)
+            budget_analysis.main(tx_file, period, os.path.join(self.tmp_dir,
+                period + "_report.txt"), self.summary_file, a_plots=False)
+        # endfor #
+        self.service = budget_server.BudgetService(self.summary_file,
+                os.path.join(self.tmp_dir, "*.csv"), 100.0)
+        self.server = budget_server.make_server(self.service, a_port=0)
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+    # enddef setUp() #
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def get(self, a_path):
+        with urllib.request.urlopen(self.url + a_path) as response:
+            return json.loads(response.read())
+        # endwith #
+    # enddef get() #
+
+    def test_endpoints(self):
+        periods = self.get("/periods")
+        self.assertEqual([p["Time period"] for p in periods],
+                ["2000-12", "2001-01"])
+        self.assertEqual(self.get("/networth")[-1]["Net worth [$]"], -2820.0)
+        ytd = self.get("/ytd")
+        self.assertEqual(ytd["Income [$]"], 8000.0)
+        # -inf savings utilization is not valid JSON
+        self.assertIsNone(ytd["Savings utilization ratio [%]"])
+        categories = self.get("/categories/2001-01?kind=income")
+        self.assertEqual([c["Category"] for c in categories],
+                ["Bonus", "Paycheck"])
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self.get("/categories/1999-01")
+        # endwith #
+        self.assertEqual(cm.exception.code, 404)
+    # enddef test_endpoints() #
+
+    def test_changed_file(self):
+        self.assertEqual(len(self.get("/periods")), 2)
+        self.get("/periods")
+        self.assertEqual(self.service.cache.hits, 1)
+        budget_analysis.main(os.path.join(self.tmp_dir, "2001-01.csv"),
+                "2001-02", os.path.join(self.tmp_dir, "2001-02_report.txt"),
+                self.summary_file, a_plots=False)
+        self.assertEqual(len(self.get("/periods")), 3)
+    # enddef test_changed_file() #
+
+    def test_concurrent_cold_requests(self):
+        kinds = budget_server.KINDS * 6
+        for burst in range(5):
+            # cold in-memory and on-disk caches; requests for different kinds
+            # of one period parse the same file at once
+            self.service.cache_dir = os.path.join(self.tmp_dir,
+                    "cache{}".format(burst))
+            self.service.cache = budget_server.LRUCache()
+            statuses = []
+
+            def fetch(a_kind):
+                try:
+                    with urllib.request.urlopen(self.url +
+                            "/categories/2001-01?kind=" + a_kind) as response:
+                        statuses.append(response.status)
+                    # endwith #
+                except urllib.error.HTTPError as e:
+                    statuses.append(e.code)
+                # endtry #
+            # enddef fetch() #
+
+            threads = [threading.Thread(target=fetch, args=(kind,))
+                    for kind in kinds]
+            for thread in threads:
+                thread.start()
+            # endfor #
+            for thread in threads:
+                thread.join()
+            # endfor #
+            self.assertEqual(statuses, [200] * len(kinds))
+            self.assertEqual(self.service.cache.misses, len(budget_server.KINDS))
+            self.assertEqual(len(os.listdir(self.service.cache_dir)), 1)
+        # endfor #
+    # enddef test_concurrent_cold_requests() #
+
+    def test_stale_totals(self):
+        # a period appended behind the back of the running totals
+        totals_file = summary_store.totals_file(self.summary_file)
+        with open(totals_file) as tf:
+            totals = tf.read()
+        # endwith #
+        with open(self.summary_file, 'a') as sf:
+            sf.write("2001-02,1000.00,0.00,0.00,1000.00,100.00,0.00\n")
+        # endwith #
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.get("/ytd")["Income [$]"])) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        # endfor #
+        for thread in threads:
+            thread.join()
+        # endfor #
+        self.assertEqual(results, [9000.0] * 8)
+        # the server only reads
+        with open(totals_file) as tf:
+            self.assertEqual(tf.read(), totals)
+        # endwith #
+    # enddef test_stale_totals() #
+
+    def test_load_test_errors(self):
+        stats = load_test.run_load([self.url + "/ytd", self.url + "/nothing"],
+                a_requests=4, a_concurrency=2)
+        self.assertEqual(stats["errors"], 2)
+        # requests that get no response are errors, not lost threads
+        self.server.shutdown()
+        self.server.server_close()
+        latency, status = load_test.fetch(self.url + "/ytd")
+        self.assertEqual(status, 0)
+        self.server = budget_server.make_server(self.service, a_port=0)
+        self.thread.join()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+    # enddef test_load_test_errors() #
+# endclass Test_budget_server #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
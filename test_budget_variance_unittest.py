@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import budget_analysis
+import budget_variance
+import collate_periods
+
+class Test_budget_variance(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_read_budget_targets(self):
+        targets = budget_variance.read_budget_targets("Transactions.csv")
+        # budget = actual + "Diff.", e.g. $450 of utilities and +$50
+        self.assertEqual(list(targets.index),
+                ["Gifts", "Transportation", "Utilities"])
+        self.assertEqual(list(targets["Actual [$]"]), [5007.0, 3.0, 450.0])
+        self.assertEqual(list(targets["Budget [$]"]), [500.0, 0.0, 500.0])
+    # enddef test_read_budget_targets() #
+
+    def test_compute_variance(self):
+        targets = pd.DataFrame({"Time period": ["P1", "P1", "P2", "P2"],
+            "Category": ["Rent", "Food", "Food", "Rent"],
+            "Actual [$]": [1000.0, 450.0, 700.0, 1200.0],
+            "Budget [$]": [1100.0, 400.0, 400.0, 0.0]})
+        variance = budget_variance.compute_variance(targets)
+        np.testing.assert_allclose(variance["Variance [$]"],
+                [-100.0, 50.0, 300.0, 1200.0])
+        np.testing.assert_allclose(variance["Over budget [%]"],
+                [-100.0 / 11.0, 12.5, 75.0, np.nan])
+        # only overspending adds up, per category
+        np.testing.assert_allclose(variance["Cumulative overspend [$]"],
+                [0.0, 50.0, 350.0, 1200.0])
+        totals = budget_variance.variance_by_period(variance)
+        np.testing.assert_allclose(totals["Cumulative overspend [$]"],
+                [50.0, 1550.0])
+    # enddef test_compute_variance() #
+
+    def test_duplicate_targets(self):
+        targets = pd.DataFrame({"Time period": ["P1", "P2", "P1"],
+            "Category": ["Food", "Food", "Food"],
+            "Actual [$]": [450.0, 700.0, 500.0],
+            "Budget [$]": [400.0, 400.0, 400.0]})
+        # P1 was stored again after P2, with new actuals
+        variance = budget_variance.compute_variance(targets)
+        self.assertEqual(list(variance["Time period"]), ["P1", "P2"])
+        np.testing.assert_allclose(variance["Cumulative overspend [$]"],
+                [100.0, 400.0])
+        totals = budget_variance.variance_by_period(variance)
+        np.testing.assert_allclose(totals["Cumulative overspend [$]"],
+                [100.0, 400.0])
+        # storing a period again replaces its rows in place
+        for period, rows in [("P1", targets.iloc[:1]),
+                ("P2", targets.iloc[1:2]), ("P1", targets.iloc[2:])]:
+            budget_variance.append_targets(self.summary_file, period,
+                    rows.drop(columns="Time period").set_index("Category"))
+        # endfor #
+        stored = budget_variance.read_targets(self.summary_file)
+        self.assertEqual(list(stored["Time period"]), ["P1", "P2"])
+        self.assertEqual(list(stored["Actual [$]"]), [500.0, 700.0])
+    # enddef test_duplicate_targets() #
+
+    def test_variance_reports(self):
+        for period in ["2000-12", "2001-01"]:
+            budget_analysis.main("Transactions.csv", period,
+                    os.path.join(self.tmp_dir, period + "_report.txt"),
+                    self.summary_file, a_plots=False, a_budget=True)
+        # endfor #
+        with open(os.path.join(self.tmp_dir, "2001-01_report.txt")) as rf:
+            self.assertIn("Budget variance of expenses", rf.read())
+        # endwith #
+        report_file = os.path.join(self.tmp_dir, "Summary_report.txt")
+        collate_periods.main(0.0, self.summary_file,
+                a_summary_reportfile=report_file, a_plots=False,
+                a_budget=True)
+        with open(report_file) as rf:
+            report = rf.read()
+        # endwith #
+        self.assertIn("Budget variance for 2001-01", report)
+        self.assertIn("9020.00", report)
+    # enddef test_variance_reports() #
+# endclass Test_budget_variance #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+import collate_all_periods
+
+class Test_read_tx_files(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_empty_file_read_tx_files(self):
+        with self.assertRaises(FileNotFoundError):
+            collate_all_periods.read_tx_files(["non_existent_file"])
+        # endwith #
+    # enddef test_empty_file_read_tx_files() #
+
+    def test_parallel_read_tx_files(self):
+        with open("Transactions.csv") as tf:
+            contents = tf.read()
+        # endwith #
+        # a different paycheck in every file
+        paychecks = [1750.0, 1500.0, 3000.0]
+        tx_files = []
+        for k, paycheck in enumerate(paychecks):
+            tx_file = os.path.join(self.tmp_dir, "P{}.csv".format(k))
+            with open(tx_file, 'w') as tf:
+                tf.write(contents.replace('"$1,500.00"',
+                    '"${:,.2f}"'.format(paycheck)))
+            # endwith #
+            tx_files.append(tx_file)
+        # endfor #
+        serial = collate_all_periods.read_tx_files(tx_files)
+        parallel = collate_all_periods.read_tx_files(tx_files, a_jobs=2)
+        # parallel parsing should give exactly the serial result
+        for s, p in zip(serial, parallel):
+            self.assertTrue(s.equals(p))
+        # endfor #
+        inc, exp, sav = serial
+        # check shapes of the combined dfs
+        self.assertEqual(inc.shape, (6,2), "Should be 6.")
+        self.assertEqual(exp.shape, (12,2), "Should be 12.")
+        self.assertEqual(sav.shape, (3,2), "Should be 3.")
+        # the tables of each file follow each other in the order of tx_files
+        self.assertEqual(inc['Amount [$]'].tolist(),
+                [1750.0, 2500.0, 1500.0, 2500.0, 3000.0, 2500.0])
+    # enddef test_parallel_read_tx_files() #
+# endclass Test_read_tx_files #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
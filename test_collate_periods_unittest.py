@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import collate_periods
+import summary_store
+
+class Test_rolling_analytics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+        rng = np.random.default_rng(0)
+        for k in range(30):
+            inc, exp = rng.integers(1000, 5000, 2).tolist()
+            summary_store.append_period(self.summary_file, "P{:02d}".format(k),
+                    float(inc), float(exp), 0.0, float(inc - exp), 0.0, 0.0,
+                    a_reset=(k == 0))
+        # endfor #
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_rolling_summarize_all_periods(self):
+        summary_df = collate_periods.summarize_all_periods(100.0,
+                self.summary_file, a_rolling=True)
+        inc = summary_df["Income [$]"]
+        exp = summary_df["Expenses [$]"]
+        networth = summary_df["Net worth [$]"]
+        self.assertTrue(np.isnan(summary_df["Income 3-period avg [$]"][1]))
+        self.assertAlmostEqual(summary_df["Income 3-period avg [$]"][2],
+                inc[:3].mean())
+        self.assertAlmostEqual(summary_df["pct-savings 12-period [%]"][20],
+                100.0 * (inc[9:21].sum() - exp[9:21].sum()) / inc[9:21].sum())
+        self.assertAlmostEqual(summary_df["Expenses YoY change [$]"][25],
+                exp[25] - exp[13])
+        self.assertAlmostEqual(summary_df["Net worth PoP change [$]"][5],
+                inc[5] - exp[5])
+        # largest drop of net worth from any earlier peak, incl. the start
+        peaks = np.maximum.accumulate(np.r_[100.0, networth])[1:]
+        self.assertAlmostEqual(summary_df["Max drawdown [$]"].iloc[-1],
+                min((networth - peaks).min(), 0.0))
+    # enddef test_rolling_summarize_all_periods() #
+
+    def test_append_summary_period(self):
+        full_df = collate_periods.summarize_all_periods(100.0,
+                self.summary_file, a_rolling=True)
+        summary_df = full_df.iloc[:-1]
+        new_row = summary_store.read_periods(self.summary_file).iloc[-1]
+        summary_df = collate_periods.append_summary_period(summary_df,
+                new_row.to_dict())
+        pd.testing.assert_frame_equal(summary_df, full_df)
+    # enddef test_append_summary_period() #
+# endclass Test_rolling_analytics #
+
+class Test_summarize_ytd(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_break_even(self):
+        summary_store.append_period(self.summary_file, "P1", 2000.0, 2000.0,
+                500.0, -500.0, 0.0, 0.0, a_reset=True)
+        ytd = collate_periods.summarize_ytd(100.0, self.summary_file)
+        self.assertEqual(ytd["pct-savings [%]"], 0.0)
+        self.assertEqual(ytd["Savings utilization ratio [%]"], np.inf)
+        self.assertEqual(ytd["Net worth [$]"], 100.0)
+    # enddef test_break_even() #
+
+    def test_zero_income(self):
+        summary_store.append_period(self.summary_file, "P1", 0.0, 0.0, 0.0,
+                0.0, 0.0, 0.0, a_reset=True)
+        ytd = collate_periods.summarize_ytd(100.0, self.summary_file)
+        self.assertTrue(np.isnan(ytd["pct-savings [%]"]))
+        self.assertTrue(np.isnan(ytd["Savings utilization ratio [%]"]))
+    # enddef test_zero_income() #
+# endclass Test_summarize_ytd #
+
+class Test_project_net_worth(unittest.TestCase):
+
+    def setUp(self):
+        self.summary_df = pd.DataFrame({"Time period": ["P1", "P2", "P3"],
+            "Income [$]": [3000.0, 3000.0, 3000.0],
+            "Expenses [$]": [2000.0, 2000.0, 2000.0],
+            "Net worth [$]": [1000.0, 2000.0, 3000.0]})
+    # enddef setUp() #
+
+    def test_constant_history(self):
+        for method in ["normal", "bootstrap"]:
+            projection_df = collate_periods.project_net_worth(self.summary_df,
+                    a_n_periods=4, a_n_paths=1000, a_block_size=300,
+                    a_method=method)
+            self.assertEqual(list(projection_df["Time period"]),
+                    ["+1", "+2", "+3", "+4"])
+            for col in projection_df.columns[1:]:
+                np.testing.assert_allclose(projection_df[col],
+                        [4000.0, 5000.0, 6000.0, 7000.0])
+            # endfor #
+        # endfor #
+    # enddef test_constant_history() #
+
+    def test_bands(self):
+        rng = np.random.default_rng(0)
+        self.summary_df = pd.DataFrame({"Time period": range(24),
+            "Income [$]": rng.normal(3000.0, 300.0, 24),
+            "Expenses [$]": rng.normal(2500.0, 400.0, 24)})
+        self.summary_df["Net worth [$]"] = (self.summary_df["Income [$]"] -
+                self.summary_df["Expenses [$]"]).cumsum()
+        projection_df = collate_periods.project_net_worth(self.summary_df,
+                a_n_periods=12, a_n_paths=20000, a_block_size=3000, a_seed=1)
+        bands = projection_df.iloc[:, 1:].to_numpy()
+        # percentiles are ordered and widen with time
+        self.assertTrue((np.diff(bands, axis=1) > 0).all())
+        self.assertTrue((np.diff(bands[:, -1] - bands[:, 0]) > 0).all())
+        drift = (self.summary_df["Income [$]"] -
+                self.summary_df["Expenses [$]"]).mean()
+        self.assertAlmostEqual(projection_df["Net worth p50 [$]"].iloc[-1],
+                self.summary_df["Net worth [$]"].iloc[-1] + 12 * drift,
+                delta=50.0)
+        with self.assertRaises(ValueError):
+            collate_periods.project_net_worth(self.summary_df, a_method="x")
+        # endwith #
+        for kwargs in [{"a_n_paths": 0}, {"a_block_size": -1}]:
+            with self.assertRaisesRegex(ValueError, "must be >= 1"):
+                collate_periods.project_net_worth(self.summary_df, **kwargs)
+            # endwith #
+        # endfor #
+    # enddef test_bands() #
+# endclass Test_project_net_worth #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
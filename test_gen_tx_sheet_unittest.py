@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import batch_analysis
+import budget_analysis
+import budget_variance
+import gen_tx_sheet
+
+class Test_write_tx_sheet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.tx_file = os.path.join(self.tmp_dir, "2001-03.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_read_tx_file(self):
+        # blocks smaller than the sheet, ending inside the income table
+        gen_tx_sheet.BLOCK_ROWS, block_rows = 7, gen_tx_sheet.BLOCK_ROWS
+        try:
+            gen_tx_sheet.write_tx_sheet(self.tx_file, 95, 8, 2001, 3, 1)
+        finally:
+            gen_tx_sheet.BLOCK_ROWS = block_rows
+        # endtry #
+        inc, exp, sav = budget_analysis.read_tx_file(self.tx_file)
+        self.assertEqual((len(exp), len(inc), len(sav)), (95, 9, 9))
+        # the same draws as the generator
+        rng = np.random.default_rng([1, 2001, 3])
+        for table, n_rows, n_cats, max_cents in [(exp, 95, 8, 50000),
+                (inc, 9, 2, 500000), (sav, 9, 2, 200000)]:
+            _, cents, _ = gen_tx_sheet.random_table(rng, n_rows, n_cats,
+                    max_cents)
+            self.assertEqual(int(np.rint(100.0 * table['Amount [$]']).sum()),
+                    int(cents.sum()))
+        # endfor #
+        self.assertEqual(exp['Category'].nunique(), 8)
+        targets = budget_variance.read_budget_targets(self.tx_file)
+        self.assertAlmostEqual(targets['Actual [$]'].sum(),
+                exp['Amount [$]'].sum())
+        # budgets are within 20% of the actual expenses
+        self.assertTrue((abs(targets['Budget [$]'] / targets['Actual [$]'] -
+            1.0) < 0.21).all())
+    # enddef test_read_tx_file() #
+
+    def test_write_tx_sheets(self):
+        periods = gen_tx_sheet.write_tx_sheets(self.tmp_dir, 20, 14)
+        self.assertEqual(periods[12][0], "2001-01")
+        self.assertEqual(batch_analysis.read_manifest(os.path.join(
+            self.tmp_dir, "manifest.csv")), periods)
+        inc, _, _ = budget_analysis.read_tx_file(periods[-1][1])
+        self.assertEqual(len(inc), 2)
+    # enddef test_write_tx_sheets() #
+# endclass Test_write_tx_sheet #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+import household_scheduler
+import summary_store
+
+class Test_schedule(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.households_file = os.path.join(self.tmp_dir, "households.csv")
+        for name in ["smith", "jones"]:
+            os.mkdir(os.path.join(self.tmp_dir, name))
+            for period in ["2000-12", "2001-01", "2001-02"]:
+                shutil.copy("Transactions.csv",
+                        os.path.join(self.tmp_dir, name, period + ".csv"))
+            # endfor #
+        # endfor #
+        with open(self.households_file, 'w') as hf:
+            hf.write("# household,sheets,initial net worth\n" +
+                    "smith,smith/*.csv,1000\njones,jones/*.csv,-50.5,out\n")
+        # endwith #
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_read_households(self):
+        smith, jones = household_scheduler.read_households(
+                self.households_file)
+        self.assertEqual([p for p, _ in smith["periods"]],
+                ["2000-12", "2001-01", "2001-02"])
+        self.assertEqual(smith["summary_file"], os.path.join(self.tmp_dir,
+            "smith", "MyBudget_summary.csv"))
+        self.assertEqual(jones["output_dir"], os.path.join(self.tmp_dir,
+            "out"))
+        self.assertEqual(jones["initial_net_worth"], -50.5)
+    # enddef test_read_households() #
+
+    def test_schedule(self):
+        households = household_scheduler.read_households(self.households_file)
+        # a budget smaller than one sheet still lets sheets run one at a time
+        stats = household_scheduler.schedule(households, a_jobs=1,
+                a_memory_budget=0.001, a_household_jobs=2, a_plots=False)
+        self.assertEqual(stats["households"], 2)
+        self.assertEqual(stats["periods"], 6)
+        self.assertEqual(stats["failed"], [])
+        for household in households:
+            # each household has its own summary, in period order
+            self.assertEqual(list(summary_store.read_periods(
+                household["summary_file"])["Time period"]),
+                ["2000-12", "2001-01", "2001-02"])
+            self.assertTrue(os.path.exists(os.path.join(
+                household["output_dir"], "Summary_report.txt")))
+        # endfor #
+    # enddef test_schedule() #
+
+    def test_failed_household(self):
+        households = household_scheduler.read_households(self.households_file)
+        with open(households[0]["periods"][1][1], 'w') as tf:
+            tf.write("not a budget sheet\n")
+        # endwith #
+        with self.assertWarns(UserWarning):
+            stats = household_scheduler.schedule(households, a_jobs=1,
+                    a_plots=False)
+        # endwith #
+        self.assertEqual(stats["failed"], ["smith"])
+        self.assertEqual(stats["households"], 1)
+    # enddef test_failed_household() #
+
+    def test_failed_report(self):
+        households = household_scheduler.read_households(self.households_file)
+        # the report of smith's second period cannot be written
+        os.mkdir(os.path.join(households[0]["output_dir"],
+            "2001-01_report.txt"))
+        with self.assertWarns(UserWarning):
+            stats = household_scheduler.schedule(households, a_jobs=1,
+                    a_plots=False)
+        # endwith #
+        self.assertEqual(stats["failed"], ["smith"])
+        self.assertEqual(stats["households"], 1)
+    # enddef test_failed_report() #
+
+    def test_no_sheets(self):
+        with open(self.households_file, 'a') as hf:
+            hf.write("brown,brown/*.csv,0\n")
+        # endwith #
+        households = household_scheduler.read_households(self.households_file)
+        with self.assertWarns(UserWarning):
+            stats = household_scheduler.schedule(households, a_jobs=1,
+                    a_plots=False)
+        # endwith #
+        self.assertEqual(stats["failed"], ["brown"])
+        self.assertEqual(stats["households"], 2)
+    # enddef test_no_sheets() #
+
+    def test_rerun(self):
+        households = household_scheduler.read_households(self.households_file)
+        for _ in range(2):
+            household_scheduler.schedule(households, a_jobs=1, a_plots=False)
+        # endfor #
+        # the second run replaces the summary of the first
+        summary_df = summary_store.read_periods(households[0]["summary_file"])
+        self.assertEqual(list(summary_df["Time period"]),
+                ["2000-12", "2001-01", "2001-02"])
+        self.assertEqual(summary_store.read_totals(households[0][
+            "summary_file"])["n_periods"], 3)
+    # enddef test_rerun() #
+# endclass Test_schedule #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,62 @@
+import unittest
+import pandas as pd
+import budget_analysis
+from ledger import Ledger
+
+class Test_Ledger(unittest.TestCase):
+
+    def setUp(self):
+        self.tables = budget_analysis.read_tx_file("Transactions.csv")
+        self.ledger = Ledger.from_tx_files([("2000-12", "Transactions.csv"),
+            ("2001-01", "Transactions.csv")], 100.0)
+    # enddef setUp() #
+
+    def test_aggregates(self):
+        pd.testing.assert_frame_equal(self.ledger.grouped("expenses",
+            "2000-12"), budget_analysis.categorize_tx(self.tables[1]))
+        self.assertEqual(self.ledger.category_total("expenses", "Utilities"),
+                900.0)
+        self.assertEqual(self.ledger.category_total("expenses", "Rent"), 0.0)
+        self.assertAlmostEqual(self.ledger.contributions("income")["Bonus"],
+                62.5)
+        self.assertEqual(list(self.ledger.period_totals["Expenses [$]"]),
+                [5460.0, 5460.0])
+        self.assertEqual(list(self.ledger.net_worth), [-1360.0, -2820.0])
+    # enddef test_aggregates() #
+
+    def test_memoized(self):
+        grouped = self.ledger.grouped("income")
+        period_totals = self.ledger.period_totals
+        self.assertIs(self.ledger.grouped("income"), grouped)
+        self.assertIs(self.ledger.period_totals, period_totals)
+    # enddef test_memoized() #
+
+    def test_append(self):
+        inc_dec = self.ledger.grouped("income", "2000-12")
+        exp_jan = self.ledger.grouped("expenses", "2001-01")
+        self.ledger.category_total("expenses", "Gifts")
+        self.ledger.category_total("expenses", "Utilities")
+        self.ledger.net_worth
+        self.ledger.append("2001-01", "expenses", pd.DataFrame(
+            {"Category": ["Utilities"], "Amount [$]": [50.0]}))
+        # aggregates of other periods, kinds and categories are kept
+        self.assertIs(self.ledger.grouped("income", "2000-12"), inc_dec)
+        self.assertIn(("expenses", "Gifts", None),
+                self.ledger._category_totals)
+        self.assertNotIn(("expenses", "Utilities", None),
+                self.ledger._category_totals)
+        self.assertEqual(self.ledger._net_worth, [-1360.0])
+        self.assertIsNot(self.ledger.grouped("expenses", "2001-01"), exp_jan)
+        self.assertEqual(self.ledger.category_total("expenses", "Utilities"),
+                950.0)
+        self.assertEqual(list(self.ledger.net_worth), [-1360.0, -2870.0])
+        self.ledger.append_tables("2001-02", self.tables)
+        self.assertEqual(self.ledger.periods, ["2000-12", "2001-01",
+            "2001-02"])
+        self.assertEqual(self.ledger.net_worth.iloc[-1], -4330.0)
+    # enddef test_append() #
+# endclass Test_Ledger #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+import budget_analysis
+import plot_render
+
+class Test_render_plots(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.plotfile = os.path.join(self.tmp_dir, "Plot_Expenses.png")
+        _, exp, _ = budget_analysis.read_tx_file("Transactions.csv")
+        self.grouped_exp = budget_analysis.categorize_tx(exp)
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_skip_unchanged_render_plots(self):
+        plots = [(budget_analysis.draw_tallied_tx, self.plotfile,
+            (self.grouped_exp, "Expenses"))]
+        self.assertEqual(plot_render.render_plots(plots), [self.plotfile])
+        self.assertIsNotNone(plot_render.read_png_hash(self.plotfile))
+        # same data and parameters: nothing to render
+        self.assertEqual(plot_render.render_plots(plots), [])
+        # changed title: the plot is rendered again
+        plots = [(budget_analysis.draw_tallied_tx, self.plotfile,
+            (self.grouped_exp, "All expenses"))]
+        self.assertEqual(plot_render.render_plots(plots), [self.plotfile])
+    # enddef test_skip_unchanged_render_plots() #
+
+    def test_changed_data_render_plot(self):
+        self.assertTrue(plot_render.render_plot(
+            budget_analysis.draw_tallied_tx, self.plotfile, self.grouped_exp,
+            "Expenses"))
+        self.grouped_exp.iloc[0, 0] += 1.0
+        self.assertTrue(plot_render.render_plot(
+            budget_analysis.draw_tallied_tx, self.plotfile, self.grouped_exp,
+            "Expenses"))
+    # enddef test_changed_data_render_plot() #
+# endclass Test_render_plots #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
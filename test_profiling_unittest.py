@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+import budget_analysis
+
+class Test_profiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.events = []
+        self.hook = lambda event, stage, record: self.events.append(
+                (event, stage))
+        profiling.add_hook(self.hook)
+    # enddef setUp() #
+
+    def tearDown(self):
+        profiling.remove_hook(self.hook)
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_hooks_without_profile(self):
+        # hooks are called even when no profile is being recorded
+        with profiling.stage("outer") as record:
+            with profiling.stage("inner"):
+                pass
+            # endwith #
+        # endwith #
+        self.assertEqual(record, {})
+        self.assertEqual(self.events, [("start", "outer"), ("start", "inner"),
+            ("end", "inner"), ("end", "outer")])
+    # enddef test_hooks_without_profile() #
+
+    def test_nested_peak_stage(self):
+        profiling.enable()
+        with profiling.stage("outer"):
+            with profiling.stage("inner"):
+                block = bytearray(10**7)
+                del block
+            # endwith #
+        # endwith #
+        inner, outer = profiling.disable()
+        self.assertEqual([inner["stage"], outer["stage"]], ["inner", "outer"])
+        # the enclosing stage keeps the peak of the nested one
+        self.assertGreaterEqual(inner["peak traced memory [MB]"], 10.0)
+        self.assertGreaterEqual(outer["peak traced memory [MB]"],
+                inner["peak traced memory [MB]"])
+    # enddef test_nested_peak_stage() #
+
+    def test_concurrent_stages(self):
+        profiling.enable()
+
+        def run(a_k):
+            with profiling.stage("outer {}".format(a_k)):
+                for _ in range(20):
+                    with profiling.stage("inner {}".format(a_k)):
+                        pass
+                    # endwith #
+                # endfor #
+            # endwith #
+        # enddef run() #
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(run, range(8)))
+        # endwith #
+        records = profiling.disable()
+        # every thread nests its own stages, and no record is lost
+        self.assertEqual(len(records), 8 * 21)
+        self.assertEqual(sorted(r["stage"] for r in records
+            if r["stage"].startswith("outer")),
+            ["outer {}".format(k) for k in range(8)])
+        self.assertEqual(self.events.count(("end", "inner 3")), 20)
+    # enddef test_concurrent_stages() #
+
+    def test_profile_main(self):
+        profile_file = os.path.join(self.tmp_dir, "profile.json")
+        budget_analysis.main("Transactions.csv", "Test period",
+                os.path.join(self.tmp_dir, "report.txt"),
+                os.path.join(self.tmp_dir, "summary.csv"), a_plots=False,
+                a_profile_file=profile_file)
+        with open(profile_file) as pf:
+            stages = json.load(pf)["stages"]
+        # endwith #
+        self.assertEqual([s["stage"] for s in stages],
+                ["read_tx_file", "categorize_tx", "write_reports"])
+        for s in stages:
+            self.assertGreaterEqual(s["wall time [s]"], 0.0)
+            self.assertGreaterEqual(s["cpu time [s]"], 0.0)
+        # endfor #
+        self.assertIn(("end", "write_reports"), self.events)
+    # enddef test_profile_main() #
+# endclass Test_profiling #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,100 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import report_render
+
+class Test_write_report(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.report_file = os.path.join(self.tmp_dir, "Jan_report.txt")
+        grouped = pd.DataFrame({"Amount [$]": [5007.0, 3.0],
+            "Contribution [%]": [99.94, 0.06]},
+            index=pd.Index(["Gifts", "Transportation"], name="Category"))
+        self.blocks = [report_render.lines_block(None,
+            [("Total income [$]", 1500.0, "Total income = $ {:.2f}"),
+            ("Net savings [% of income]", -np.inf, "Net savings = {:.2f}%")]),
+            report_render.table_block("Category-wise expenses",
+                grouped.reset_index())]
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_all_formats_write_report(self):
+        files = report_render.write_report(self.report_file, "Report for Jan",
+                self.blocks, report_render.FORMATS)
+        self.assertEqual(files["text"], self.report_file)
+        self.assertEqual(files["json"],
+                os.path.join(self.tmp_dir, "Jan_report.json"))
+        with open(files["text"]) as rf:
+            self.assertEqual(rf.read().splitlines(), ["Report for Jan",
+                "Total income = $ 1500.00", "Net savings = -inf%", "",
+                "Category-wise expenses:",
+                "Category        Amount [$]  Contribution [%]",
+                "Gifts              5007.00             99.94",
+                "Transportation        3.00              0.06"])
+        # endwith #
+        with open(files["json"]) as rf:
+            report = json.load(rf)
+        # endwith #
+        self.assertEqual(report["sections"][0]["values"],
+                {"Total income [$]": 1500.0, "Net savings [% of income]": None})
+        self.assertEqual(report["sections"][1]["rows"][1],
+                ["Transportation", 3.0, 0.06])
+        with open(files["csv"]) as rf:
+            self.assertIn("Gifts,5007.00,99.94\n", rf.read())
+        # endwith #
+        with open(files["html"]) as rf:
+            self.assertIn("<td>Transportation</td>", rf.read())
+        # endwith #
+        # no temporary files are left behind
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 4)
+    # enddef test_all_formats_write_report() #
+
+    def test_unknown_format_write_report(self):
+        with self.assertRaises(ValueError):
+            report_render.write_report(self.report_file, None, self.blocks,
+                    ("pdf",))
+        # endwith #
+    # enddef test_unknown_format_write_report() #
+
+    def test_colliding_files_write_report(self):
+        report_file = os.path.join(self.tmp_dir, "Report.csv")
+        # the text report would be overwritten by the CSV report
+        with self.assertRaisesRegex(ValueError, "overwritten"):
+            report_render.write_report(report_file, None, self.blocks,
+                    ("text", "csv"))
+        # endwith #
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+        files = report_render.write_report(report_file, None, self.blocks,
+                ("text", "json"))
+        self.assertEqual(files["json"], os.path.join(self.tmp_dir,
+            "Report.json"))
+    # enddef test_colliding_files_write_report() #
+
+    def test_concurrent_atomic_write(self):
+        contents = ["report {}\n".format(k) for k in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda c: report_render.atomic_write(
+                self.report_file, c), contents))
+        # endwith #
+        with open(self.report_file) as rf:
+            self.assertIn(rf.read(), contents)
+        # endwith #
+        self.assertEqual(os.listdir(self.tmp_dir), ["Jan_report.txt"])
+        # as readable as files created with open()
+        self.assertEqual(os.stat(self.report_file).st_mode & 0o777,
+                report_render.FILE_MODE)
+    # enddef test_concurrent_atomic_write() #
+# endclass Test_write_report #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
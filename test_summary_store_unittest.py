@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+import summary_store
+
+class Test_summary_store(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_append_period(self):
+        summary_store.append_period(self.summary_file, "Jan", 4000.0, 3000.0,
+                500.0, 500.0, 25.0, 50.0)
+        totals = summary_store.append_period(self.summary_file, "Feb", 0.1,
+                0.2, 0.0, -0.1, -100.0, -100.0)
+        self.assertEqual(totals["n_periods"], 2)
+        self.assertEqual(totals["income"], 400010)
+        self.assertEqual(totals["expenses"], 300020)
+        self.assertEqual(totals["savings"], 50000)
+        # running totals should match a rescan of the summary file
+        rebuilt = summary_store.rebuild_totals(self.summary_file)
+        for key in ("n_periods",) + summary_store.TOTAL_KEYS:
+            self.assertEqual(totals[key], rebuilt[key])
+        # endfor #
+    # enddef test_append_period() #
+
+    def test_legacy_total_line_read_periods(self):
+        summary_store.append_period(self.summary_file, "Jan", 4000.0, 3000.0,
+                500.0, 500.0, 25.0, 50.0)
+        # older versions appended a "Total" line to the summary file
+        with open(self.summary_file, 'a') as sf:
+            sf.write("\nTotal,4000.00,3000.00,500.00,500.00,25.00,50.00\n")
+        # endwith #
+        self.assertEqual(
+                summary_store.read_periods(self.summary_file).shape[0], 1)
+        totals = summary_store.read_totals(self.summary_file)
+        self.assertEqual(totals["n_periods"], 1)
+        self.assertEqual(totals["income"], 400000)
+    # enddef test_legacy_total_line_read_periods() #
+
+    def test_replace_period(self):
+        for period in ["Jan", "Feb"]:
+            summary_store.replace_period(self.summary_file, period, 4000.0,
+                    3000.0, 500.0, 500.0, 25.0, 50.0)
+        # endfor #
+        totals = summary_store.replace_period(self.summary_file, "Jan", 100.0,
+                0.0, 0.0, 100.0, 100.0, 0.0)
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(summary_df["Time period"].tolist(), ["Jan", "Feb"])
+        self.assertEqual(summary_df["Income [$]"].tolist(), [100.0, 4000.0])
+        rebuilt = summary_store.rebuild_totals(self.summary_file)
+        for key in ("n_periods",) + summary_store.TOTAL_KEYS:
+            self.assertEqual(totals[key], rebuilt[key])
+        # endfor #
+    # enddef test_replace_period() #
+
+    def test_sorted_replace_period(self):
+        for period in ["2000-03", "2000-01"]:
+            summary_store.replace_period(self.summary_file, period, 4000.0,
+                    3000.0, 500.0, 500.0, 25.0, 50.0, a_sorted=True)
+        # endfor #
+        totals = summary_store.replace_period(self.summary_file, "2000-02",
+                100.0, 0.0, 0.0, 100.0, 100.0, 0.0, a_sorted=True)
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(summary_df["Time period"].tolist(),
+                ["2000-01", "2000-02", "2000-03"])
+        rebuilt = summary_store.rebuild_totals(self.summary_file)
+        for key in ("n_periods",) + summary_store.TOTAL_KEYS:
+            self.assertEqual(totals[key], rebuilt[key])
+        # endfor #
+    # enddef test_sorted_replace_period() #
+# endclass Test_summary_store #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import budget_analysis
+import tx_cache
+
+class Test_read_tx_file_cached(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.tx_file = os.path.join(self.tmp_dir, "Transactions.csv")
+        shutil.copy("Transactions.csv", self.tx_file)
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_cache_hit_read_tx_file_cached(self):
+        parsed = budget_analysis.read_tx_file(self.tx_file)
+        miss = tx_cache.read_tx_file_cached(self.tx_file, self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        hit = tx_cache.read_tx_file_cached(self.tx_file, self.cache_dir)
+        # both the parsed and the cached tables should match read_tx_file
+        for p, m, h in zip(parsed, miss, hit):
+            self.assertTrue(p.equals(m))
+            self.assertTrue(p.equals(h))
+        # endfor #
+    # enddef test_cache_hit_read_tx_file_cached() #
+
+    def test_modified_file_read_tx_file_cached(self):
+        tx_cache.read_tx_file_cached(self.tx_file, self.cache_dir)
+        with open(self.tx_file, 'a') as tf:
+            tf.write(",1/1/2001,$1.00,,Fees,,,,,,,,,,,\n")
+        # endwith #
+        _, exp, _ = tx_cache.read_tx_file_cached(self.tx_file, self.cache_dir)
+        # the modified file gets a new cache entry
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertEqual(exp['Category'].tolist()[-1], 'Fees')
+    # enddef test_modified_file_read_tx_file_cached() #
+
+    def test_missing_dates_read_tx_file_cached(self):
+        with open("Transactions.csv") as tf:
+            contents = tf.read()
+        # endwith #
+        with open(self.tx_file, 'w') as tf:
+            tf.write(contents.replace("12/8/2000", "", 1))
+        # endwith #
+        parsed = budget_analysis.read_tx_file(self.tx_file, a_date_col='Date')
+        for _ in range(2):
+            cached = tx_cache.read_tx_file_cached(self.tx_file,
+                    self.cache_dir, a_date_col='Date')
+            # a missing date stays missing, not the string "nan"
+            for p, c in zip(parsed, cached):
+                self.assertTrue(p.equals(c))
+            # endfor #
+            self.assertTrue(cached[1]['Date'].isna()[0])
+        # endfor #
+    # enddef test_missing_dates_read_tx_file_cached() #
+
+    def test_cache_key(self):
+        key = tx_cache.cache_key(self.tx_file)
+        self.assertEqual(tx_cache.cache_key(self.tx_file, {}), key)
+        self.assertNotEqual(tx_cache.cache_key(self.tx_file,
+            {"a_date_col": "Date"}), key)
+        # entries of another parser or layout version are not reused
+        tx_cache.CACHE_VERSION, version = tx_cache.CACHE_VERSION + 1, \
+                tx_cache.CACHE_VERSION
+        try:
+            self.assertNotEqual(tx_cache.cache_key(self.tx_file), key)
+        finally:
+            tx_cache.CACHE_VERSION = version
+        # endtry #
+    # enddef test_cache_key() #
+
+    def test_clear_cache(self):
+        tx_cache.read_tx_file_cached(self.tx_file, self.cache_dir)
+        tx_cache.clear_cache(self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+    # enddef test_clear_cache() #
+
+    def test_concurrent_misses(self):
+        parsed = budget_analysis.read_tx_file(self.tx_file)
+        for _ in range(10):
+            tx_cache.clear_cache(self.cache_dir)
+            # threads of one process miss the same entry at once
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: tx_cache.
+                    read_tx_file_cached(self.tx_file, self.cache_dir),
+                    range(8)))
+            # endwith #
+            for tables in results:
+                for p, t in zip(parsed, tables):
+                    self.assertTrue(p.equals(t))
+                # endfor #
+            # endfor #
+            # one entry and no temporary files are left behind
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        # endfor #
+    # enddef test_concurrent_misses() #
+# endclass Test_read_tx_file_cached #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+import budget_analysis
+import tx_store
+
+class Test_tx_store(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = tx_store.connect(":memory:")
+        self.tables = budget_analysis.read_tx_file("Transactions.csv")
+        for period in ["Jan", "Feb"]:
+            tx_store.ingest_tables(self.conn, period, self.tables)
+        # endfor #
+    # enddef setUp() #
+
+    def tearDown(self):
+        self.conn.close()
+    # enddef tearDown() #
+
+    def test_reingest_period(self):
+        # ingesting a period again replaces its transactions
+        self.assertEqual(tx_store.ingest_tables(self.conn, "Jan", self.tables),
+                7)
+        self.assertEqual(tx_store.list_periods(self.conn), ["Jan", "Feb"])
+        n_rows = self.conn.execute("SELECT COUNT(*) FROM expenses").fetchone()
+        self.assertEqual(n_rows[0], 8)
+    # enddef test_reingest_period() #
+
+    def test_categorize_periods(self):
+        for kind, table in zip(tx_store.KINDS, self.tables):
+            grouped = tx_store.categorize_periods(self.conn, kind, ["Feb"])
+            pd.testing.assert_frame_equal(grouped,
+                    budget_analysis.categorize_tx(table))
+        # endfor #
+        grouped = tx_store.categorize_periods(self.conn, "expenses")
+        self.assertEqual(grouped['Amount [$]'].tolist(),
+                [10014.0, 6.0, 900.0])
+        with self.assertRaises(ValueError):
+            tx_store.categorize_periods(self.conn, "gifts")
+        # endwith #
+    # enddef test_categorize_periods() #
+
+    def test_summarize_periods(self):
+        summary_df = tx_store.summarize_periods(self.conn, 100.0)
+        self.assertEqual(summary_df["Time period"].tolist(), ["Jan", "Feb"])
+        self.assertEqual(summary_df["Income [$]"].tolist(), [4000.0, 4000.0])
+        self.assertEqual(summary_df["Expenses [$]"].tolist(),
+                [5460.0, 5460.0])
+        self.assertEqual(summary_df["Net worth [$]"].tolist(),
+                [-1360.0, -2820.0])
+        self.assertTrue(np.all(np.isneginf(
+            summary_df["Savings utilization ratio [%]"])))
+    # enddef test_summarize_periods() #
+# endclass Test_tx_store #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
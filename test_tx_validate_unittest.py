@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import budget_analysis
+import summary_store
+import tx_validate
+
+class Test_tx_validate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index_file = os.path.join(self.tmp_dir, "fingerprints.npz")
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_same_as_read_tx_file(self):
+        tables, malformed, duplicates = tx_validate.validate_tx_file(
+                "Transactions.csv", "2000-12")
+        for table, expected in zip(tables,
+                budget_analysis.read_tx_file("Transactions.csv")):
+            pd.testing.assert_frame_equal(table,
+                    expected.reset_index(drop=True))
+        # endfor #
+        # the "#N/A" filler is not malformed
+        self.assertTrue(malformed.empty)
+        self.assertTrue(duplicates.empty)
+    # enddef test_same_as_read_tx_file() #
+
+    def test_malformed(self):
+        tx_file = os.path.join(self.tmp_dir, "bad.csv")
+        with open("Transactions.csv") as tf:
+            text = tf.read()
+        # endwith #
+        with open(tx_file, 'w') as tf:
+            tf.write(text.replace("$350.00", "$35O.00"))
+        # endwith #
+        tables, malformed, _ = tx_validate.validate_tx_file(tx_file, "2000-12")
+        self.assertEqual(list(malformed["Line"]), [7])
+        self.assertEqual(list(malformed["Amount"]), ["$35O.00"])
+        self.assertEqual(tables[1]["Amount [$]"].sum(), 5110.0)
+    # enddef test_malformed() #
+
+    def test_malformed_line(self):
+        tx_file = os.path.join(self.tmp_dir, "bad.csv")
+        with open("Transactions.csv") as tf:
+            text = tf.read()
+        # endwith #
+        # a description over two lines and a blank line before the row
+        text = text.replace(",Rent,", ',"Rent\nDecember",').replace(
+                ",12/15/2000,$350.00", "\n,12/15/2000,$35O.00")
+        with open(tx_file, 'w') as tf:
+            tf.write(text)
+        # endwith #
+        _, malformed, _ = tx_validate.validate_tx_file(tx_file, "2000-12")
+        self.assertEqual(list(malformed["Line"]), [9])
+        with open(tx_file) as tf:
+            self.assertIn("$35O.00", tf.read().splitlines()[8])
+        # endwith #
+    # enddef test_malformed_line() #
+
+    def test_duplicates(self):
+        fps = tx_validate.fingerprints(tx_validate.read_tx_rows(
+            "Transactions.csv"))
+        self.assertEqual(len(np.unique(fps)), len(fps))
+        tx_validate.validate_tx_file("Transactions.csv", "2000-12",
+                self.index_file)
+        # ingesting a period again replaces it
+        _, _, duplicates = tx_validate.validate_tx_file("Transactions.csv",
+                "2000-12", self.index_file)
+        self.assertTrue(duplicates.empty)
+        tables, _, duplicates = tx_validate.validate_tx_file(
+                "Transactions.csv", "2001-01", self.index_file)
+        self.assertEqual(len(duplicates), 7)
+        self.assertEqual(set(duplicates["Ingested in"]), {"2000-12"})
+        self.assertTrue(all(t.empty for t in tables))
+        index = tx_validate.load_index(self.index_file)
+        self.assertEqual(len(index["fingerprints"]), 7)
+    # enddef test_duplicates() #
+
+    def test_main(self):
+        for period in ["2000-12", "2001-01"]:
+            with self.assertWarns(UserWarning):
+                budget_analysis.main("Transactions.csv", period,
+                        os.path.join(self.tmp_dir, period + "_report.txt"),
+                        self.summary_file, a_plots=False,
+                        a_index_file=self.index_file)
+            # endwith #
+        # endfor #
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(list(summary_df["Income [$]"]), [4000.0, 0.0])
+    # enddef test_main() #
+
+    def test_main_failed_report(self):
+        with self.assertRaises(OSError):
+            budget_analysis.main("Transactions.csv", "2000-12",
+                    os.path.join(self.tmp_dir, "missing", "report.txt"),
+                    self.summary_file, a_plots=False,
+                    a_index_file=self.index_file)
+        # endwith #
+        # the period is not ingested without its report
+        self.assertFalse(os.path.exists(self.index_file))
+    # enddef test_main_failed_report() #
+
+    def test_main_compact(self):
+        for period in ["2000-12", "2001-01"]:
+            with self.assertWarns(UserWarning):
+                budget_analysis.main("Transactions.csv", period,
+                        os.path.join(self.tmp_dir, period + "_report.txt"),
+                        self.summary_file, a_plots=False, a_compact=True,
+                        a_index_file=self.index_file)
+            # endwith #
+        # endfor #
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(list(summary_df["Income [$]"]), [4000.0, 0.0])
+        self.assertIn("Paycheck",
+                summary_store.read_categories(self.summary_file))
+        with self.assertRaises(ValueError):
+            budget_analysis.main("Transactions.csv", "2001-02",
+                    os.path.join(self.tmp_dir, "2001-02_report.txt"),
+                    self.summary_file, a_chunksize=2, a_plots=False,
+                    a_index_file=self.index_file)
+        # endwith #
+    # enddef test_main_compact() #
+# endclass Test_tx_validate #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
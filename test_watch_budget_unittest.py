@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+import summary_store
+import watch_budget
+
+class Test_watch_budget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.summary_file = os.path.join(self.tmp_dir, "MyBudget_summary.csv")
+        self.periods = []
+        for period in ["2000-01", "2000-02"]:
+            tx_file = os.path.join(self.tmp_dir, period + ".csv")
+            shutil.copy("Transactions.csv", tx_file)
+            self.periods.append((period, tx_file))
+        # endfor #
+    # enddef setUp() #
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    # enddef tearDown() #
+
+    def test_debounce_poll(self):
+        state, pending = {}, {}
+        # new sheets are only reported once they stopped changing
+        self.assertEqual(watch_budget.poll(self.periods, state, pending, 0.0,
+            5.0), [])
+        self.assertEqual(watch_budget.poll(self.periods, state, pending, 6.0,
+            5.0), self.periods)
+        self.assertEqual(watch_budget.poll(self.periods, state, pending, 12.0,
+            5.0), [])
+        # a touched sheet with the same contents is not reprocessed
+        os.utime(self.periods[0][1], ns=(0, 0))
+        self.assertEqual(watch_budget.poll(self.periods, state, pending, 13.0,
+            0.0), [])
+        self.assertEqual(state[self.periods[0][1]]["signature"],
+                summary_store.file_signature(self.periods[0][1]))
+    # enddef test_debounce_poll() #
+
+    def test_process_changes(self):
+        state, pending = {}, {}
+        changed = watch_budget.poll(self.periods, state, pending, 0.0, 0.0)
+        watch_budget.process_changes(changed, self.summary_file, self.tmp_dir,
+                a_plots=False)
+        # double the first paycheck of February
+        with open(self.periods[1][1]) as tf:
+            contents = tf.read()
+        # endwith #
+        with open(self.periods[1][1], 'w') as tf:
+            tf.write(contents.replace('"$1,500.00"', '"$3,000.00"'))
+        # endwith #
+        os.utime(self.periods[1][1], ns=(1, 1))
+        changed = watch_budget.poll(self.periods, state, pending, 1.0, 0.0)
+        self.assertEqual(changed, self.periods[1:])
+        watch_budget.process_changes(changed, self.summary_file, self.tmp_dir,
+                a_plots=False)
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(summary_df["Time period"].tolist(),
+                ["2000-01", "2000-02"])
+        self.assertEqual(summary_df["Income [$]"].tolist(), [4000.0, 5500.0])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+            "Summary_report.txt")))
+    # enddef test_process_changes() #
+
+    def test_earlier_period(self):
+        watch_budget.process_changes(self.periods[1:], self.summary_file,
+                self.tmp_dir)
+        # plots of the period go to the report dir
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+            "Plot_Expenses_2000-02.png")))
+        # the sheet of January turns up after February was processed
+        watch_budget.process_changes(self.periods[:1], self.summary_file,
+                self.tmp_dir, a_plots=False)
+        summary_df = summary_store.read_periods(self.summary_file)
+        self.assertEqual(summary_df["Time period"].tolist(),
+                ["2000-01", "2000-02"])
+        self.assertEqual(summary_store.read_totals(self.summary_file)[
+            "n_periods"], 2)
+    # enddef test_earlier_period() #
+
+    def test_malformed_first_sheet(self):
+        os.remove(self.periods[1][1])
+        with open(self.periods[0][1]) as tf:
+            contents = tf.read()
+        # endwith #
+        with open(self.periods[0][1], 'w') as tf:
+            tf.write(contents.replace('"$1,500.00"', 'abc'))
+        # endwith #
+        # nothing to summarize yet, and the watch goes on
+        with self.assertWarnsRegex(UserWarning, "Skipping .*2000-01"):
+            watch_budget.watch(os.path.join(self.tmp_dir, "*.csv"),
+                    self.summary_file, self.tmp_dir, a_interval=0.0,
+                    a_debounce=0.0, a_plots=False, a_max_polls=1)
+        # endwith #
+        self.assertFalse(os.path.exists(self.summary_file))
+        # a summary report that cannot be written does not stop it either
+        with open(self.periods[0][1], 'w') as tf:
+            tf.write(contents)
+        # endwith #
+        os.mkdir(os.path.join(self.tmp_dir, "Summary_report.txt"))
+        with self.assertWarnsRegex(UserWarning, "Skipping the summary"):
+            watch_budget.process_changes(self.periods[:1], self.summary_file,
+                    self.tmp_dir, a_plots=False)
+        # endwith #
+        self.assertEqual(summary_store.read_periods(self.summary_file)[
+            "Time period"].tolist(), ["2000-01"])
+    # enddef test_malformed_first_sheet() #
+# endclass Test_watch_budget #
+
+if __name__ == "__main__":
+    unittest.main()
+# endif #
@@ -0,0 +1,187 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To cache parsed transaction files on disk between runs
+License: GPLv3+
+"""
+
+import os
+import glob
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+from budget_analysis import read_tx_file
+
+# in the working directory, like all other outputs; the CLIs use the cache
+# unless run with --no-cache
+DEFAULT_CACHE_DIR = ".mybudget_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+TABLE_NAMES = ("income", "expenses", "savings")
+# version of read_tx_file and of the layout of cache files; entries of other
+# versions are never reused, so bump it whenever either of them changes
+CACHE_VERSION = 5
+
+def cache_key(a_tx_file, a_read_kwargs=None):
+    """ Function to compute the cache key of a transactions file
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_read_kwargs (dict): Keyword arguments passed on to read_tx_file
+    Returns:
+        key (str): Hex digest of the cache version, file path, file content
+            and arguments
+    """
+    digest = hashlib.sha256()
+    digest.update("v{}".format(CACHE_VERSION).encode())
+    digest.update(os.path.abspath(a_tx_file).encode())
+    digest.update(repr(sorted((a_read_kwargs or {}).items())).encode())
+    with open(a_tx_file, 'rb') as tf:
+        for block in iter(lambda: tf.read(1 << 20), b''):
+            digest.update(block)
+        # endfor #
+    # endwith #
+    return digest.hexdigest()
+# enddef cache_key() #
+
+def save_tables(a_cache_file, a_tables):
+    """ Function to store parsed tables column by column in a .npz file
+    Parameters:
+        a_cache_file (str): Name of cache file to write
+        a_tables (tuple(DataFrame)): income, expenses and savings tables
+    Returns:
+        None
+    """
+    arrays = {}
+    for name, table in zip(TABLE_NAMES, a_tables):
+        cat_col, amt_col = table.columns[:2]
+        codes, uniques = pd.factorize(table[cat_col])
+        arrays[name + "_columns"] = np.array(table.columns.tolist())
+        arrays[name + "_index"] = table.index.to_numpy(np.int64)
+        arrays[name + "_codes"] = codes.astype(np.int32)
+        arrays[name + "_categories"] = np.asarray(uniques, dtype=np.str_)
+        arrays[name + "_amounts"] = table[amt_col].to_numpy(np.float64)
+        if len(table.columns) > 2:
+            # unparsed dates, see read_tx_file(..., a_date_col); missing
+            # dates are masked, as strings have no NaN
+            dates = table[table.columns[2]]
+            arrays[name + "_dates"] = dates.fillna("").to_numpy(np.str_)
+            arrays[name + "_dates_missing"] = dates.isna().to_numpy()
+        # endif #
+    # endfor #
+    # write to a temporary file first so that concurrent readers never see
+    # a partially written cache entry; the file is unique per call, as threads
+    # of one process may write the same entry at once
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(a_cache_file) or ".",
+            prefix=os.path.basename(a_cache_file) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as cf:
+            np.savez(cf, **arrays)
+        # endwith #
+        os.replace(tmp_file, a_cache_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    # endtry #
+# enddef save_tables() #
+
+def load_tables(a_cache_file):
+    """ Function to load parsed tables stored by save_tables()
+    Parameters:
+        a_cache_file (str): Name of cache file to read
+    Returns:
+        tables (tuple(DataFrame)): income, expenses and savings tables
+    """
+    tables = []
+    with np.load(a_cache_file) as arrays:
+        for name in TABLE_NAMES:
+            columns = arrays[name + "_columns"].tolist()
+            categories = arrays[name + "_categories"].astype(object)
+            table = pd.DataFrame(
+                {columns[0]: categories[arrays[name + "_codes"]],
+                columns[1]: arrays[name + "_amounts"]},
+                index=arrays[name + "_index"])
+            if len(columns) > 2:
+                dates = arrays[name + "_dates"].astype(object)
+                dates[arrays[name + "_dates_missing"]] = np.nan
+                table[columns[2]] = dates
+            # endif #
+            tables.append(table)
+        # endfor #
+    # endwith #
+    return tuple(tables)
+# enddef load_tables() #
+
+def evict_cache(a_cache_dir=DEFAULT_CACHE_DIR, a_max_bytes=DEFAULT_MAX_BYTES):
+    """ Function to remove least recently used cache entries until the cache
+    fits in a_max_bytes
+    Parameters:
+        a_cache_dir (str): Directory containing the cache
+        a_max_bytes (int): Maximum total size of the cache in bytes
+    Returns:
+        None
+    """
+    entries = []
+    for cache_file in glob.glob(os.path.join(a_cache_dir, "*.npz")):
+        try:
+            stat = os.stat(cache_file)
+        except FileNotFoundError:
+            # removed by a concurrent run
+            continue
+        # endtry #
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+    # endfor #
+    total_bytes = sum(e[1] for e in entries)
+    # cache hits refresh the modification time, so oldest = least recent
+    for _, size, cache_file in sorted(entries):
+        if total_bytes <= a_max_bytes:
+            break
+        # endif #
+        try:
+            os.remove(cache_file)
+        except FileNotFoundError:
+            pass
+        # endtry #
+        total_bytes -= size
+    # endfor #
+# enddef evict_cache() #
+
+def clear_cache(a_cache_dir=DEFAULT_CACHE_DIR):
+    """ Function to remove all cache entries
+    Parameters:
+        a_cache_dir (str): Directory containing the cache
+    Returns:
+        None
+    """
+    evict_cache(a_cache_dir, 0)
+# enddef clear_cache() #
+
+def read_tx_file_cached(a_tx_file, a_cache_dir=DEFAULT_CACHE_DIR,
+        a_max_bytes=DEFAULT_MAX_BYTES, **a_read_kwargs):
+    """ Function to read in transactions file through the on-disk cache
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_cache_dir (str): Directory containing the cache
+        a_max_bytes (int): Maximum total size of the cache in bytes
+        a_read_kwargs: Keyword arguments passed on to read_tx_file
+    Returns:
+        income (DataFrame): Dataframe containing only income information
+        expenses (DataFrame): Dataframe containing only expense information
+        savings (DataFrame): Dataframe containing only savings information
+    """
+    cache_file = os.path.join(a_cache_dir,
+            cache_key(a_tx_file, a_read_kwargs) + ".npz")
+    try:
+        tables = load_tables(cache_file)
+        # mark entry as recently used
+        os.utime(cache_file)
+        return tables
+    except (FileNotFoundError, OSError, KeyError, ValueError):
+        # missing, evicted or unreadable entry: parse the file again
+        pass
+    # endtry #
+    tables = read_tx_file(a_tx_file, **a_read_kwargs)
+    os.makedirs(a_cache_dir, exist_ok=True)
+    save_tables(cache_file, tables)
+    evict_cache(a_cache_dir, a_max_bytes)
+    return tables
+# enddef read_tx_file_cached() #
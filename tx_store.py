@@ -0,0 +1,242 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To keep parsed transactions of all periods in a SQLite database
+    and answer category and period questions with indexed SQL aggregates
+License: GPLv3+
+"""
+
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+from budget_analysis import read_tx_file
+
+KINDS = ("income", "expenses", "savings")
+# amounts are stored in integer cents, so sums over many years stay exact;
+# totals per (period, kind, category) are kept up to date at ingestion, so
+# queries over many years add up a few rows per period instead of every
+# transaction
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS periods (
+    id INTEGER PRIMARY KEY,
+    period TEXT UNIQUE NOT NULL,
+    tx_file TEXT);
+CREATE TABLE IF NOT EXISTS tx (
+    period TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    category TEXT NOT NULL,
+    cents INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS tx_period_kind_category
+    ON tx (period, kind, category);
+CREATE TABLE IF NOT EXISTS totals (
+    period TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    category TEXT NOT NULL,
+    cents INTEGER NOT NULL,
+    n_tx INTEGER NOT NULL,
+    PRIMARY KEY (period, kind, category)) WITHOUT ROWID;
+CREATE VIEW IF NOT EXISTS income AS
+    SELECT period, category, cents FROM tx WHERE kind = 'income';
+CREATE VIEW IF NOT EXISTS expenses AS
+    SELECT period, category, cents FROM tx WHERE kind = 'expenses';
+CREATE VIEW IF NOT EXISTS savings AS
+    SELECT period, category, cents FROM tx WHERE kind = 'savings';
+"""
+
+def connect(a_db_file):
+    """ Function to open a transaction database, creating it if needed
+    Parameters:
+        a_db_file (str): Name of SQLite database file, or ":memory:"
+    Returns:
+        conn (Connection): Connection to the database
+    """
+    conn = sqlite3.connect(a_db_file)
+    conn.executescript(SCHEMA)
+    return conn
+# enddef connect() #
+
+def ingest_tables(a_conn, a_period, a_tables, a_tx_file=None,
+        a_cols=['Category', 'Amount [$]']):
+    """ Function to store the transactions of one period, replacing any
+    transactions stored earlier for that period
+    Parameters:
+        a_conn (Connection): Connection to the database
+        a_period (str): Time period of the transactions
+        a_tables (tuple(DataFrame)): Income, expenses and savings tables as
+            returned by read_tx_file
+        a_tx_file (str): Name of the transactions file, kept for reference
+        a_cols (list of strings): Column names containing relevant
+            transaction information in the order (Category, Amount)
+    Returns:
+        n_rows (int): No. of transactions stored
+    """
+    n_rows = 0
+    # one transaction per period: readers never see a half-ingested period,
+    # and the rows are inserted without a commit (and fsync) per row
+    with a_conn:
+        a_conn.execute("DELETE FROM tx WHERE period = ?", (a_period,))
+        a_conn.execute("DELETE FROM totals WHERE period = ?", (a_period,))
+        a_conn.execute("INSERT OR IGNORE INTO periods (period) VALUES (?)",
+                (a_period,))
+        a_conn.execute("UPDATE periods SET tx_file = ? WHERE period = ?",
+                (a_tx_file, a_period))
+        for kind, table in zip(KINDS, a_tables):
+            cents = np.rint(100.0 * table[a_cols[1]].to_numpy(
+                dtype=np.float64)).astype(np.int64).tolist()
+            categories = table[a_cols[0]].astype(str).tolist()
+            a_conn.executemany(
+                    "INSERT INTO tx (period, kind, category, cents) " +
+                    "VALUES (?, ?, ?, ?)",
+                    zip([a_period] * len(cents), [kind] * len(cents),
+                        categories, cents))
+            n_rows += len(cents)
+        # endfor #
+        a_conn.execute("INSERT INTO totals " +
+                "SELECT period, kind, category, SUM(cents), COUNT(*) " +
+                "FROM tx WHERE period = ? GROUP BY kind, category",
+                (a_period,))
+    # endwith #
+    return n_rows
+# enddef ingest_tables() #
+
+def ingest_tx_file(a_conn, a_period, a_tx_file, a_cache_dir=None):
+    """ Function to parse a transactions file and store its transactions
+    Parameters:
+        a_conn (Connection): Connection to the database
+        a_period (str): Time period of the transactions
+        a_tx_file (str): Name of transactions CSV file
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+    Returns:
+        n_rows (int): No. of transactions stored
+    """
+    if a_cache_dir is None:
+        tables = read_tx_file(a_tx_file)
+    else:
+        from tx_cache import read_tx_file_cached
+        tables = read_tx_file_cached(a_tx_file, a_cache_dir)
+    # endif #
+    return ingest_tables(a_conn, a_period, tables, a_tx_file)
+# enddef ingest_tx_file() #
+
+def list_periods(a_conn):
+    """ Function to list the stored periods in the order they were ingested
+    Parameters:
+        a_conn (Connection): Connection to the database
+    Returns:
+        periods (list of strings): Stored time periods
+    """
+    return [row[0] for row in
+            a_conn.execute("SELECT period FROM periods ORDER BY id")]
+# enddef list_periods() #
+
+def categorize_periods(a_conn, a_kind, a_periods=None):
+    """ Function to total transactions per category, like categorize_tx
+    Parameters:
+        a_conn (Connection): Connection to the database
+        a_kind (str): One of "income", "expenses" or "savings"
+        a_periods (list of strings): Time periods to include; all stored
+            periods if None
+    Returns:
+        grouped_tx (DataFrame): Total of transactions per category
+    """
+    if a_kind not in KINDS:
+        raise ValueError("Unknown kind of transactions: {}".format(a_kind))
+    # endif #
+    if a_periods is None:
+        a_periods = list_periods(a_conn)
+    # endif #
+    query = ("SELECT category, SUM(cents) FROM totals " +
+            "WHERE period IN ({}) AND kind = ? ".format(
+                ",".join("?" * len(a_periods))) +
+            "GROUP BY category ORDER BY category")
+    rows = a_conn.execute(query, list(a_periods) + [a_kind]).fetchall()
+    cents = np.array([row[1] for row in rows], dtype=np.int64)
+    grouped_tx = pd.DataFrame({'Amount [$]': cents / 100.0},
+            index=pd.Index([row[0] for row in rows], name='Category'))
+    grouped_tx['Contribution [%]'] = 100 * cents / np.abs(cents.sum())
+    return grouped_tx
+# enddef categorize_periods() #
+
+def summarize_periods(a_conn, a_initial_net_worth=0.0):
+    """ Function to compute per-period totals, like the summary file read by
+    summarize_all_periods
+    Parameters:
+        a_conn (Connection): Connection to the database
+        a_initial_net_worth (float): Net worth at the beginning of all periods
+    Returns:
+        summary_df (DataFrame): One row per period, in ingestion order, with
+            the summary file columns and "Net worth [$]"
+    """
+    rows = a_conn.execute(
+            "SELECT p.period, " +
+            "(SELECT COALESCE(SUM(cents), 0) FROM totals " +
+            "WHERE period = p.period AND kind = 'income'), " +
+            "(SELECT COALESCE(SUM(cents), 0) FROM totals " +
+            "WHERE period = p.period AND kind = 'expenses'), " +
+            "(SELECT COALESCE(SUM(cents), 0) FROM totals " +
+            "WHERE period = p.period AND kind = 'savings') " +
+            "FROM periods AS p ORDER BY p.id").fetchall()
+    periods = [row[0] for row in rows]
+    inc, exp, sav = [np.array([row[k] for row in rows], dtype=np.int64)
+            for k in (1, 2, 3)]
+    net = inc - exp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sav_pct = np.where(inc < 0, -np.inf, 100.0 * net / inc)
+        sav_util = np.where(net < 0, -np.inf, 100.0 * sav / net)
+    # endwith #
+    summary_df = pd.DataFrame({"Time period": periods,
+        "Income [$]": inc / 100.0,
+        "Expenses [$]": exp / 100.0,
+        "Utilized savings [$]": sav / 100.0,
+        "Unutilzed savings [$]": (net - sav) / 100.0,
+        "pct-savings [%]": sav_pct,
+        "Savings utilization ratio [%]": sav_util})
+    summary_df["Net worth [$]"] = (round(100.0 * a_initial_net_worth) +
+            net.cumsum()) / 100.0
+    return summary_df
+# enddef summarize_periods() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_file", help="Name of SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest",
+            help="Store transactions of periods in the database")
+    ingest.add_argument("period", nargs='?', help="Time period")
+    ingest.add_argument("tx_file", nargs='?', help="Name of transactions file")
+    ingest.add_argument("--manifest", default=None,
+            help="CSV file with lines \"period,transactions file\"")
+    categorize = commands.add_parser("categorize",
+            help="Print totals per category")
+    categorize.add_argument("kind", choices=KINDS,
+            help="Kind of transactions")
+    categorize.add_argument("periods", nargs='*',
+            help="Time periods to include; all periods if none are given")
+    summary = commands.add_parser("summary", help="Print totals per period")
+    summary.add_argument("--initial-net-worth", type=float, default=0.0,
+            help="Net worth at the beginning of all periods")
+    args = parser.parse_args()
+    conn = connect(args.db_file)
+    if args.command == "ingest":
+        if args.manifest is not None:
+            from batch_analysis import read_manifest
+            periods = read_manifest(args.manifest)
+        elif args.tx_file is not None:
+            periods = [(args.period, args.tx_file)]
+        else:
+            parser.error("ingest needs a period and tx_file, or --manifest")
+        # endif #
+        for period, tx_file in periods:
+            n_rows = ingest_tx_file(conn, period, tx_file)
+            print("{}: {} transactions".format(period, n_rows))
+        # endfor #
+    elif args.command == "categorize":
+        print(categorize_periods(conn, args.kind,
+            args.periods or None).to_string())
+    else:
+        print(summarize_periods(conn, args.initial_net_worth).to_string())
+    # endif #
+    conn.close()
+# endif #
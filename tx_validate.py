@@ -0,0 +1,306 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To find transactions that were already read from another sheet and
+    rows whose amounts cannot be parsed
+License: GPLv3+
+"""
+
+import io
+import os
+import csv
+import argparse
+import numpy as np
+import pandas as pd
+
+# kind of each side-by-side table, by the suffix pandas gives its columns
+TABLE_KINDS = (("", "expenses"), (".1", "income"), (".2", "savings"))
+ROW_COLS = ['Date', 'Amount', 'Description', 'Category']
+
+def parse_amounts(a_amounts, a_currency_symbol='$', a_thousands=',',
+        a_errors='raise'):
+    """ Function to parse amounts such as "$1,500.00" into floats
+    Parameters:
+        a_amounts (Series): Unparsed amounts; missing amounts stay NaN
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+        a_errors (str): "raise" for a ValueError on amounts that cannot be
+            parsed, or "coerce" to make them NaN
+    Returns:
+        amounts (Series): Parsed amounts
+    """
+    # transactions share few distinct amounts, so each is only parsed once
+    codes, uniques = pd.factorize(a_amounts)
+    parsed = pd.to_numeric(pd.Series(uniques, dtype=object).str.replace(
+        a_currency_symbol, "", regex=False).str.replace(a_thousands, "",
+            regex=False).str.strip(), errors=a_errors).to_numpy(np.float64)
+    amounts = np.full(len(codes), np.nan)
+    amounts[codes >= 0] = parsed[codes[codes >= 0]]
+    return pd.Series(amounts, index=a_amounts.index, name=a_amounts.name)
+# enddef parse_amounts() #
+
+def row_lines(a_text, a_skiprows=3):
+    """ Function to find the line of a CSV text at which each data row starts
+    Parameters:
+        a_text (str): Contents of a transactions file
+        a_skiprows (int): No. of lines to skip at the start of the file
+    Returns:
+        lines (ndarray): 1-based line no. of each row that pandas reads
+            after the header; blank lines, which pandas skips, are left out,
+            and quoted fields may span several lines
+    """
+    lines = []
+    reader = csv.reader(io.StringIO(a_text, newline=''))
+    end = 0
+    for k, record in enumerate(reader):
+        start, end = end + 1, reader.line_num
+        # pandas skips lines that are empty or only hold whitespace
+        if k < a_skiprows or (len(record) <= 1 and not "".join(
+                record).strip()):
+            continue
+        # endif #
+        lines.append(start)
+    # endfor #
+    # the first row read is the header
+    return np.array(lines[1:], dtype=np.int64)
+# enddef row_lines() #
+
+def read_tx_rows(a_tx_file, a_skiprows=3, a_currency_symbol='$',
+        a_thousands=','):
+    """ Function to read every transaction of a transactions file, including
+    those that read_tx_file would drop
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_skiprows (int): No. of lines to skip at the start of the file
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+    Returns:
+        rows (DataFrame): "Kind", 1-based "Line" no. in the file at which
+            the row starts, the raw "Date", "Amount", "Description" and
+            "Category" text, and "Amount [$]", NaN if the amount could not
+            be parsed; empty filler rows of a table are left out
+    """
+    with open(a_tx_file, encoding='utf-8', newline='') as tf:
+        text = tf.read()
+    # endwith #
+    raw_df = pd.read_csv(io.StringIO(text), skiprows=a_skiprows, dtype=str,
+            keep_default_na=False, usecols=[c + s for s, _ in TABLE_KINDS
+                for c in ROW_COLS])
+    lines = row_lines(text, a_skiprows)
+    tables = []
+    for suffix, kind in TABLE_KINDS:
+        table = raw_df[[c + suffix for c in ROW_COLS]]
+        table.columns = ROW_COLS
+        table = table[(table != "").any(axis=1)]
+        table.insert(0, "Kind", kind)
+        table.insert(1, "Line", lines[table.index])
+        tables.append(table)
+    # endfor #
+    rows = pd.concat(tables, ignore_index=True)
+    rows["Amount [$]"] = parse_amounts(rows["Amount"], a_currency_symbol,
+            a_thousands, a_errors='coerce')
+    return rows
+# enddef read_tx_rows() #
+
+def malformed_rows(a_rows):
+    """ Function to find rows that read_tx_file would silently drop
+    Parameters:
+        a_rows (DataFrame): Rows from read_tx_rows()
+    Returns:
+        malformed (ndarray): Boolean mask of rows without a category or
+            whose amount could not be parsed
+    """
+    return (a_rows["Amount [$]"].isna() | (a_rows["Category"].str.strip()
+        == "")).to_numpy()
+# enddef malformed_rows() #
+
+def fingerprints(a_rows):
+    """ Function to fingerprint transactions
+    Parameters:
+        a_rows (DataFrame): Rows from read_tx_rows()
+    Returns:
+        fingerprints (ndarray): uint64 hash of date, amount in cents,
+            description, category and kind per row; the k-th of several
+            identical rows of one sheet also hashes k, so that it only
+            matches the k-th identical row of another sheet
+    """
+    keys = pd.DataFrame({"Kind": a_rows["Kind"].to_numpy(),
+        "Date": a_rows["Date"].str.strip().to_numpy(),
+        "Cents": np.rint(100.0 * a_rows["Amount [$]"].fillna(0.0)).astype(
+            np.int64).to_numpy(),
+        "Description": a_rows["Description"].str.strip().to_numpy(),
+        "Category": a_rows["Category"].str.strip().to_numpy()})
+    hashed = pd.util.hash_pandas_object(keys, index=False)
+    occurrence = hashed.groupby(hashed.to_numpy()).cumcount()
+    return pd.util.hash_pandas_object(pd.DataFrame({"Hash":
+        hashed.to_numpy(), "Occurrence": occurrence.to_numpy()}),
+        index=False).to_numpy()
+# enddef fingerprints() #
+
+def load_index(a_index_file):
+    """ Function to read the fingerprints of all ingested transactions
+    Parameters:
+        a_index_file (str): .npz file written by save_index(); nothing was
+            ingested yet if None or if the file does not exist
+    Returns:
+        index (dict): Unique "fingerprints" and the "periods" they were
+            first ingested in
+    """
+    if a_index_file is None or not os.path.exists(a_index_file):
+        return {"fingerprints": np.zeros(0, dtype=np.uint64),
+                "periods": np.zeros(0, dtype=str)}
+    # endif #
+    with np.load(a_index_file) as npz:
+        return {"fingerprints": npz["fingerprints"], "periods": npz["periods"]}
+    # endwith #
+# enddef load_index() #
+
+def save_index(a_index_file, a_index):
+    """ Function to store the fingerprints of all ingested transactions
+    Parameters:
+        a_index_file (str): .npz file to write
+        a_index (dict): Index, see load_index()
+    Returns:
+        None
+    """
+    tmp_file = a_index_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, fingerprints=a_index["fingerprints"],
+                periods=a_index["periods"])
+    # endwith #
+    os.replace(tmp_file, a_index_file)
+# enddef save_index() #
+
+def check_period(a_index, a_period, a_fingerprints):
+    """ Function to find transactions of a period that were ingested in
+    another period, and add the others to the index
+    Parameters:
+        a_index (dict): Index, see load_index()
+        a_period (str): Time period of the transactions; transactions of an
+            earlier ingest of this period are replaced
+        a_fingerprints (ndarray): Fingerprints of the transactions
+    Returns:
+        duplicates (ndarray): Boolean mask of transactions ingested in
+            another period, see duplicate_periods
+        duplicate_periods (ndarray): Period each transaction was ingested
+            in, or "" if it was not
+        index (dict): Updated index
+    """
+    keep = a_index["periods"] != a_period
+    index_fps = a_index["fingerprints"][keep]
+    index_periods = a_index["periods"][keep]
+    # one hash table lookup per transaction
+    positions = pd.Index(index_fps).get_indexer(a_fingerprints)
+    duplicates = positions >= 0
+    duplicate_periods = np.full(len(a_fingerprints), "", dtype=object)
+    duplicate_periods[duplicates] = index_periods[positions[duplicates]]
+    new_fps = a_fingerprints[~duplicates]
+    index = {"fingerprints": np.concatenate([index_fps, new_fps]),
+            "periods": np.concatenate([index_periods.astype(str),
+                np.full(len(new_fps), a_period)])}
+    return duplicates, duplicate_periods, index
+# enddef check_period() #
+
+def validate_rows(a_rows, a_period, a_index, a_drop_duplicates=True):
+    """ Function to leave out malformed rows and transactions that were
+    already ingested from other sheets
+    Parameters:
+        a_rows (DataFrame): Rows from read_tx_rows()
+        a_period (str): Time period of the transactions
+        a_index (dict): Index, see load_index()
+        a_drop_duplicates (bool): Whether to leave out duplicates, or only
+            report them
+    Returns:
+        tables (tuple(DataFrame)): Income, expenses and savings tables like
+            those of read_tx_file
+        malformed (DataFrame): Rows whose category or amount is missing or
+            could not be parsed
+        duplicates (DataFrame): Rows ingested before, with the "Ingested in"
+            period
+        index (dict): Index updated with this period, to be saved once the
+            period is ingested
+    """
+    bad = malformed_rows(a_rows)
+    malformed = a_rows[bad]
+    rows = a_rows[~bad].reset_index(drop=True)
+    dup, dup_periods, index = check_period(a_index, a_period,
+            fingerprints(rows))
+    duplicates = rows[dup].assign(**{"Ingested in": dup_periods[dup]})
+    if a_drop_duplicates:
+        rows = rows[~dup]
+    # endif #
+    tables = []
+    for kind in ("income", "expenses", "savings"):
+        table = rows.loc[rows["Kind"] == kind, ["Category", "Amount [$]"]]
+        tables.append(table.reset_index(drop=True))
+    # endfor #
+    return tuple(tables), malformed, duplicates, index
+# enddef validate_rows() #
+
+def validate_tx_file(a_tx_file, a_period, a_index_file=None,
+        a_drop_duplicates=True, a_skiprows=3, a_currency_symbol='$',
+        a_thousands=','):
+    """ Function to read a transactions file, leaving out malformed rows and
+    transactions that were already ingested from other sheets
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_period (str): Time period of the transactions
+        a_index_file (str): .npz file of fingerprints of transactions of all
+            ingested periods, updated with this period; duplicates are not
+            looked for if None
+        a_drop_duplicates (bool): Whether to leave out duplicates, or only
+            report them
+        a_skiprows (int): No. of lines to skip at the start of the file
+        a_currency_symbol (str): Currency symbol prefixed to amounts
+        a_thousands (str): Thousands separator used in amounts
+    Returns:
+        tables (tuple(DataFrame)): Income, expenses and savings tables like
+            those of read_tx_file
+        malformed (DataFrame): Rows whose category or amount is missing or
+            could not be parsed
+        duplicates (DataFrame): Rows ingested before, with the "Ingested in"
+            period
+    """
+    rows = read_tx_rows(a_tx_file, a_skiprows, a_currency_symbol, a_thousands)
+    tables, malformed, duplicates, index = validate_rows(rows, a_period,
+            load_index(a_index_file), a_drop_duplicates)
+    if a_index_file is not None:
+        save_index(a_index_file, index)
+    # endif #
+    return tables, malformed, duplicates
+# enddef validate_tx_file() #
+
+def format_issues(a_tx_file, a_malformed, a_duplicates):
+    """ Function to describe the issues found in a transactions file
+    Parameters:
+        a_tx_file (str): Name of transactions CSV file
+        a_malformed (DataFrame): Malformed rows from validate_tx_file()
+        a_duplicates (DataFrame): Duplicate rows from validate_tx_file()
+    Returns:
+        lines (list of strings): One line per issue
+    """
+    lines = ["{}:{}: malformed {} amount {!r}, category {!r}".format(
+        a_tx_file, r.Line, r.Kind, r.Amount, r.Category)
+        for r in a_malformed.itertuples()]
+    lines += ["{}:{}: {} {} {} {!r} already ingested in {}".format(a_tx_file,
+        r.Line, r.Kind, r.Date, r.Amount, r.Category, r[-1])
+        for r in a_duplicates.itertuples()]
+    return lines
+# enddef format_issues() #
+
+if __name__ == "__main__":
+    from batch_analysis import read_manifest
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest",
+            help="CSV file with lines \"period,transactions file\"")
+    parser.add_argument("--index-file", default="MyBudget_fingerprints.npz",
+            help="File of fingerprints of all ingested transactions")
+    args = parser.parse_args()
+    for period, tx_file in read_manifest(args.manifest):
+        _, malformed, duplicates = validate_tx_file(tx_file, period,
+                args.index_file)
+        for line in format_issues(tx_file, malformed, duplicates):
+            print(line)
+        # endfor #
+    # endfor #
+# endif #
@@ -0,0 +1,247 @@
+#!/anaconda3/bin/python
+"""
+Author: Shrikant Kshirsagar
+Purpose: To watch a directory of monthly budget sheets and reprocess only
+    the sheets that changed
+License: GPLv3+
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import warnings
+import budget_analysis
+import collate_periods
+import summary_store
+import tx_cache
+from batch_analysis import glob_periods, process_period
+
+def file_digest(a_file):
+    """ Function to hash the contents of a file
+    Parameters:
+        a_file (str): Name of file
+    Returns:
+        digest (str): Hex SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(a_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+        # endfor #
+    # endwith #
+    return digest.hexdigest()
+# enddef file_digest() #
+
+def load_state(a_state_file):
+    """ Function to read which sheets were processed by an earlier run
+    Parameters:
+        a_state_file (str): JSON file written by save_state(); nothing was
+            processed yet if None or if the file does not exist
+    Returns:
+        state (dict): Per transactions file, its "signature" (size and
+            modification time) and "sha256" when it was last processed
+    """
+    if a_state_file is None or not os.path.exists(a_state_file):
+        return {}
+    # endif #
+    with open(a_state_file) as sf:
+        return json.load(sf)
+    # endwith #
+# enddef load_state() #
+
+def save_state(a_state_file, a_state):
+    """ Function to store which sheets were processed
+    Parameters:
+        a_state_file (str): JSON file to write; nothing is written if None
+        a_state (dict): State, see load_state()
+    Returns:
+        None
+    """
+    if a_state_file is None:
+        return
+    # endif #
+    tmp_file = a_state_file + ".tmp"
+    with open(tmp_file, 'w') as sf:
+        json.dump(a_state, sf)
+    # endwith #
+    os.replace(tmp_file, a_state_file)
+# enddef save_state() #
+
+def poll(a_periods, a_state, a_pending, a_now, a_debounce):
+    """ Function to look for sheets that changed since they were processed
+    Parameters:
+        a_periods (list(tuple(str))): (period, tx_file) pairs to watch
+        a_state (dict): State of processed sheets, see load_state(); sheets
+            that were only touched get their new signature
+        a_pending (dict): Per changed transactions file, its signature and
+            the time it was first seen; updated in place
+        a_now (float): Current time [s]
+        a_debounce (float): Changes are only returned once no sheet has
+            changed for this many seconds
+    Returns:
+        changed (list(tuple(str))): (period, tx_file) pairs whose contents
+            changed, in the order of a_periods; empty while sheets are still
+            being written
+    """
+    periods = dict((f, p) for p, f in a_periods)
+    for tx_file in periods:
+        try:
+            signature = summary_store.file_signature(tx_file)
+        except FileNotFoundError:
+            a_pending.pop(tx_file, None)
+            continue
+        # endtry #
+        if signature == a_state.get(tx_file, {}).get("signature"):
+            a_pending.pop(tx_file, None)
+        elif a_pending.get(tx_file, (None,))[0] != signature:
+            a_pending[tx_file] = (signature, a_now)
+        # endif #
+    # endfor #
+    if not a_pending or a_now - max(t for _, t in a_pending.values()) < \
+            a_debounce:
+        return []
+    # endif #
+    changed = []
+    for tx_file in [f for _, f in a_periods if f in a_pending]:
+        signature, _ = a_pending.pop(tx_file)
+        digest = file_digest(tx_file)
+        if digest != a_state.get(tx_file, {}).get("sha256"):
+            changed.append((periods[tx_file], tx_file))
+        # endif #
+        a_state[tx_file] = {"signature": signature, "sha256": digest}
+    # endfor #
+    return changed
+# enddef poll() #
+
+def process_changes(a_changed, a_summary_file, a_report_dir=".",
+        a_initial_net_worth=0.0, a_cache_dir=None, a_plots=True):
+    """ Function to reprocess changed periods and refresh the summary
+    Parameters:
+        a_changed (list(tuple(str))): (period, tx_file) pairs to reprocess
+        a_summary_file (str): Filename where summaries of all periods are
+            stored; rows of reprocessed periods are replaced, and new periods
+            are inserted in the order of their names
+        a_report_dir (str): Directory in which reports and plots are written
+        a_initial_net_worth (float): Net worth at the beginning of all periods
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_plots (bool): Whether to plot
+    Returns:
+        None
+    """
+    n_processed = 0
+    for period, tx_file in a_changed:
+        # a sheet that is saved half-way must not stop the watch; it is
+        # retried when it changes again
+        try:
+            grouped = process_period((period, tx_file), a_cache_dir, None,
+                    a_plots, a_report_dir)
+        except Exception as e:
+            warnings.warn("Skipping {}: {}".format(tx_file, e))
+            continue
+        # endtry #
+        # a sheet of an earlier period that turns up later is summarized
+        # in period order, so that net worth adds up in the right order
+        budget_analysis.write_reports(
+                os.path.join(a_report_dir, period + "_report.txt"), period,
+                *grouped, a_summary_file, a_replace_summary=True,
+                a_sort_summary=True)
+        n_processed += 1
+    # endfor #
+    if n_processed == 0 or not os.path.exists(a_summary_file):
+        return
+    # endif #
+    # the summary only rereads one row per period, and the plots are only
+    # rendered again if their data changed
+    try:
+        collate_periods.main(a_initial_net_worth, a_summary_file,
+                os.path.join(a_report_dir, "Plot_incexp_summary.png"),
+                os.path.join(a_report_dir, "Plot_networth_savingspct.png"),
+                os.path.join(a_report_dir, "Summary_report.txt"), a_plots)
+    except Exception as e:
+        warnings.warn("Skipping the summary of {}: {}".format(a_summary_file,
+            e))
+    # endtry #
+# enddef process_changes() #
+
+def watch(a_pattern, a_summary_file="MyBudget_summary.csv", a_report_dir=".",
+        a_initial_net_worth=0.0, a_interval=2.0, a_debounce=5.0,
+        a_state_file=None, a_cache_dir=None, a_plots=True, a_max_polls=None):
+    """ Function to poll for changed sheets and reprocess them until stopped
+    Parameters:
+        a_pattern (str): Glob pattern of transactions files, named after the
+            period
+        a_summary_file (str): Filename where summaries of all periods are
+            stored
+        a_report_dir (str): Directory in which reports and plots are written
+        a_initial_net_worth (float): Net worth at the beginning of all periods
+        a_interval (float): Seconds between polls
+        a_debounce (float): Seconds without further changes to wait before
+            reprocessing a burst of changes
+        a_state_file (str): JSON file remembering processed sheets across
+            runs; all sheets are processed on start if None
+        a_cache_dir (str): Directory of the parsed-transaction cache; the
+            cache is bypassed if None
+        a_plots (bool): Whether to plot
+        a_max_polls (int): Stop after this many polls; run forever if None
+    Returns:
+        None
+    """
+    state = load_state(a_state_file)
+    pending = {}
+    n_polls = 0
+    # outputs may be written next to the sheets
+    outputs = set(os.path.abspath(f) for f in (a_summary_file, a_state_file)
+            if f is not None)
+    while a_max_polls is None or n_polls < a_max_polls:
+        periods = [(p, f) for p, f in glob_periods(a_pattern)
+                if os.path.abspath(f) not in outputs]
+        changed = poll(periods, state, pending, time.time(), a_debounce)
+        if changed:
+            print("Reprocessing " + ", ".join(p for p, _ in changed))
+            process_changes(changed, a_summary_file, a_report_dir,
+                    a_initial_net_worth, a_cache_dir, a_plots)
+            save_state(a_state_file, state)
+        # endif #
+        n_polls += 1
+        if a_max_polls is None or n_polls < a_max_polls:
+            time.sleep(a_interval)
+        # endif #
+    # endwhile #
+# enddef watch() #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pattern",
+            help="Glob pattern of transactions files, named after the period")
+    parser.add_argument("--summary-file", default="MyBudget_summary.csv",
+            help="Name of summary file")
+    parser.add_argument("--report-dir", default=".",
+            help="Directory in which to write reports and plots")
+    parser.add_argument("--initial-net-worth", type=float, default=0.0,
+            help="Net worth at the beginning of all periods")
+    parser.add_argument("--interval", type=float, default=2.0,
+            help="Seconds between polls")
+    parser.add_argument("--debounce", type=float, default=5.0,
+            help="Seconds without changes before reprocessing")
+    parser.add_argument("--state-file", default=".mybudget_watch.json",
+            help="File remembering which sheets were processed")
+    parser.add_argument("--cache-dir", default=tx_cache.DEFAULT_CACHE_DIR,
+            help="Directory of the parsed-transaction cache, created in the " +
+            "working directory by default; see --no-cache")
+    parser.add_argument("--no-cache", action='store_true',
+            help="Parse transaction files without using the cache")
+    parser.add_argument("--no-plots", action='store_true',
+            help="Only write reports and the summary, without plots")
+    args = parser.parse_args()
+    try:
+        watch(args.pattern, args.summary_file, args.report_dir,
+                args.initial_net_worth, args.interval, args.debounce,
+                args.state_file, None if args.no_cache else args.cache_dir,
+                not args.no_plots)
+    except KeyboardInterrupt:
+        pass
+    # endtry #
+# endif #